@@ -0,0 +1,113 @@
+"""
+Compare the ways of creating a game and linking it to the users of its room:
+
+- per_row: the previous implementation, commit and refresh the game, then add one UserGameLink per room user and
+  commit again.
+- bulk: `GameController.create_game`, the game, its room link and one multi-row insert of the user links in a
+  single transaction.
+
+    python -m benchmarks.create_game --players 4 20 100
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from sqlalchemy import Engine, event, insert
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+
+from ibg.api.controllers.game import GameController
+from ibg.api.models.game import GameCreate, GameType
+from ibg.api.models.relationship import RoomGameLink, RoomUserLink, UserGameLink
+from ibg.api.models.room import RoomStatus
+from ibg.api.models.table import Game, Room, User
+from ibg.database import EngineRegistry, create_db_and_tables
+from ibg.settings import Settings
+
+
+async def create_room(engine_registry: EngineRegistry, number_of_players: int) -> UUID:
+    users = [
+        {"id": uuid4(), "username": f"player-{index}", "email_address": f"player-{index}@ibg.com", "country": "FRA"}
+        for index in range(number_of_players)
+    ]
+    room_id = uuid4()
+    async with engine_registry.engine.begin() as connection:
+        await connection.execute(insert(User), [{**user, "password": "password"} for user in users])
+        await connection.execute(
+            insert(Room).values(
+                id=room_id, public_id="bench", owner_id=users[0]["id"], password="1234", status=RoomStatus.ONLINE
+            )
+        )
+        await connection.execute(insert(RoomUserLink), [{"room_id": room_id, "user_id": user["id"]} for user in users])
+    return room_id
+
+
+async def per_row(game_controller: GameController, game_create: GameCreate) -> None:
+    session = game_controller.session
+    new_game = Game(**game_create.model_dump())
+    room = (await session.exec(select(Room).where(Room.id == new_game.room_id).options(selectinload(Room.users)))).one()
+    session.add(new_game)
+    await session.commit()
+    await session.refresh(new_game)
+    for user in room.users:
+        session.add(UserGameLink(user_id=user.id, game_id=new_game.id))
+    session.add(RoomGameLink(room_id=new_game.room_id, game_id=new_game.id))
+    await session.commit()
+
+
+async def bulk(game_controller: GameController, game_create: GameCreate) -> None:
+    await game_controller.create_game(game_create)
+
+
+async def measure(engine_registry: EngineRegistry, strategy, room_id: UUID, repeat: int) -> tuple[list[float], int]:
+    queries = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    durations = []
+    event.listen(Engine, "before_cursor_execute", count_query)
+    try:
+        for _ in range(repeat):
+            game_create = GameCreate(room_id=room_id, type=GameType.UNDERCOVER, number_of_players=4)
+            async with engine_registry.session() as session:
+                start = time.perf_counter()
+                await strategy(GameController(session), game_create)
+                durations.append(time.perf_counter() - start)
+    finally:
+        event.remove(Engine, "before_cursor_execute", count_query)
+    return durations, len(queries) // repeat
+
+
+async def main(players: list[int], repeat: int) -> None:
+    for number_of_players in players:
+        with tempfile.TemporaryDirectory() as directory:
+            engine_registry = EngineRegistry(
+                Settings(
+                    database_url=f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.db'}",
+                    redis_om_url="",
+                    logfire_token="",
+                )
+            )
+            await create_db_and_tables(engine_registry.engine)
+            room_id = await create_room(engine_registry, number_of_players)
+            for name, strategy in (("per_row", per_row), ("bulk", bulk)):
+                durations, queries = await measure(engine_registry, strategy, room_id, repeat)
+                print(
+                    f"{number_of_players:>4} players  {name:<7}  {queries:>3} statements"
+                    f"  median {statistics.median(durations) * 1000:7.2f}ms  max {max(durations) * 1000:7.2f}ms"
+                )
+            await engine_registry.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[4, 20, 100])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.players, args.repeat))
@@ -0,0 +1,77 @@
+"""
+Measure the bytes written to Redis by one vote of an undercover game, as the turn history grows:
+
+- full: `save()`, the whole JSON document.
+- changes: `save_changes()`, the paths that changed since the last write.
+
+No Redis is needed, the documents are only compared, but the socket models read the settings (from the environment
+or `.env`) when imported:
+
+    REDIS_OM_URL=redis://127.0.0.1:6379 python -m benchmarks.json_changes --players 4 12 24 --turns 1 10 50
+"""
+
+import argparse
+import json
+import statistics
+import time
+from uuid import uuid4
+
+from ibg.api.models.undercover import UndercoverRole
+from ibg.socketio.models.json_changes import diff_json
+from ibg.socketio.models.socket import UndercoverGame, UndercoverTurn
+from ibg.socketio.models.user import UndercoverSocketPlayer
+
+
+def make_game(number_of_players: int, number_of_turns: int) -> UndercoverGame:
+    players = [
+        UndercoverSocketPlayer(
+            sid=f"sid-{index}", user_id=uuid4(), username=f"player-{index}", role=UndercoverRole.CIVILIAN
+        )
+        for index in range(number_of_players)
+    ]
+    turns = [
+        UndercoverTurn(votes={voter.user_id: voted.user_id for voter, voted in zip(players, players[1:] + players[:1])})
+        for _ in range(number_of_turns - 1)
+    ]
+    return UndercoverGame(
+        civilian_word="apple",
+        undercover_word="pear",
+        room_id=str(uuid4()),
+        id=str(uuid4()),
+        players=players,
+        turns=turns + [UndercoverTurn()],
+    )
+
+
+def measure(number_of_players: int, number_of_turns: int) -> tuple[int, int, float]:
+    game = make_game(number_of_players, number_of_turns)
+    document = game.to_document()
+    full_bytes, change_bytes, durations = [], [], []
+    for voter, voted in zip(game.players, game.players[1:] + game.players[:1]):
+        game.vote(voter, voted)
+        start = time.perf_counter()
+        new_document = game.to_document()
+        changes = diff_json(document, new_document)
+        durations.append(time.perf_counter() - start)
+        full_bytes.append(len(json.dumps(new_document)))
+        change_bytes.append(sum(change.size for change in changes))
+        document = new_document
+    return int(statistics.mean(full_bytes)), int(statistics.mean(change_bytes)), statistics.median(durations)
+
+
+def main(players: list[int], turns: list[int]) -> None:
+    for number_of_players in players:
+        for number_of_turns in turns:
+            full_bytes, change_bytes, duration = measure(number_of_players, number_of_turns)
+            print(
+                f"{number_of_players:>3} players  {number_of_turns:>3} turns  full {full_bytes:>7} B/vote"
+                f"  changes {change_bytes:>4} B/vote  diff {duration * 1_000_000:7.1f}us"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[4, 12, 24])
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+    main(args.players, args.turns)
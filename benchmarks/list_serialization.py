@@ -0,0 +1,94 @@
+"""
+Compare the throughput of a list endpoint (`GET /rooms`) as the page grows:
+
+- response_model: the previous path, every room is validated into a RoomView by the route, then validated again and
+  serialized by FastAPI through the `response_model`, and encoded with the standard json module.
+- render_view: every room is validated once by the cached type adapter of list[RoomView] and dumped straight to
+  bytes.
+
+The rooms are built in memory (with 4 users each) and served by two routes of a bare FastAPI app, so only the
+serialization is measured, through an in-process HTTP client:
+
+    python -m benchmarks.list_serialization --rows 1000 10000 --requests 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from ibg.api.models.room import RoomStatus, RoomType
+from ibg.api.models.table import Room, User
+from ibg.api.models.view import RoomView
+from ibg.api.routers.shared import render_view
+
+
+def make_rooms(number_of_rooms: int) -> list[Room]:
+    return [
+        Room(
+            id=uuid4(),
+            public_id=f"{index:05d}",
+            owner_id=uuid4(),
+            status=RoomStatus.ONLINE,
+            password="1234",
+            type=RoomType.ACTIVE,
+            created_at=datetime.now(),
+            users=[
+                User(
+                    id=uuid4(),
+                    username=f"player-{index}-{user_index}",
+                    email_address=f"player-{index}-{user_index}@test.com",
+                    country="FRA",
+                    password="securepassword",
+                )
+                for user_index in range(4)
+            ],
+            games=[],
+        )
+        for index in range(number_of_rooms)
+    ]
+
+
+def make_app(rooms: list[Room]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/response_model", response_model=list[RoomView])
+    async def response_model() -> list[RoomView]:
+        return [RoomView.model_validate(room) for room in rooms]
+
+    @app.get("/render_view", response_model=list[RoomView])
+    async def rendered():
+        return render_view(list[RoomView], rooms)
+
+    return app
+
+
+async def main(rows: list[int], number_of_requests: int) -> None:
+    for number_of_rows in rows:
+        rooms = make_rooms(number_of_rows)
+        async with AsyncClient(transport=ASGITransport(app=make_app(rooms)), base_url="http://test") as client:
+            for path in ("response_model", "render_view"):
+                durations = []
+                for _ in range(number_of_requests):
+                    start = time.perf_counter()
+                    response = await client.get(f"/{path}")
+                    durations.append(time.perf_counter() - start)
+                    assert len(response.json()) == number_of_rows
+                duration = statistics.median(durations)
+                print(
+                    f"{number_of_rows:>6} rows  {path:<14}  p50 {duration * 1000:8.1f}ms"
+                    f"  {number_of_rows / duration:9.0f} rows/s  {len(response.content) / 1024:7.0f}KiB"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.requests))
@@ -0,0 +1,61 @@
+"""
+Measure how long the event loop stalls while users sign up, and how many signups a worker hashes per second:
+
+- inline: the previous path, bcrypt runs on the event loop.
+- pool: PasswordHasher, bcrypt runs in a pool of `--workers` processes.
+
+A task ticks every 10ms on the event loop, the longest gap between two ticks is the longest the other sockets of the
+worker would wait. No database or Redis is needed:
+
+    python -m benchmarks.password_hashing --signups 16 --rounds 12 --workers 2
+"""
+
+import argparse
+import asyncio
+import time
+
+from ibg.api.controllers.password_hasher import PasswordHasher, get_crypt_context
+
+
+async def measure(number_of_signups: int, hash_password) -> tuple[float, float]:
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(hash_password(f"password-{index}") for index in range(number_of_signups)))
+    duration = time.perf_counter() - start
+    ticker.cancel()
+    return duration, max(later - earlier for earlier, later in zip(ticks, ticks[1:] + [time.perf_counter()]))
+
+
+async def main(number_of_signups: int, rounds: int, workers: int) -> None:
+    context = get_crypt_context(rounds)
+
+    async def inline(password: str) -> str:
+        return context.hash(password)
+
+    password_hasher = PasswordHasher(rounds=rounds, workers=workers, max_queue_size=number_of_signups)
+    # Start the processes before measuring
+    await password_hasher.hash("password")
+    for name, hash_password in (("inline", inline), ("pool", password_hasher.hash)):
+        duration, longest_stall = await measure(number_of_signups, hash_password)
+        print(
+            f"{name:<6}  {number_of_signups / duration:6.1f} signups/s"
+            f"  longest event loop stall {longest_stall * 1000:8.1f}ms"
+        )
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--signups", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(args.signups, args.rounds, args.workers))
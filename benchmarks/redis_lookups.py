@@ -0,0 +1,66 @@
+"""
+Compare the latency of reading a room from Redis by its id:
+
+- find: the previous path, a RediSearch query on the indexed `id` field.
+- get: a direct JSON.GET of the key of the room, keyed by its id.
+
+Run it against the Redis (with RediSearch) of `REDIS_OM_URL`, the other settings are read from the environment or
+`.env`:
+
+    REDIS_OM_URL=redis://127.0.0.1:6379 python -m benchmarks.redis_lookups --rooms 100 10000 --lookups 2000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from uuid import uuid4
+
+from aredis_om import Migrator
+
+from ibg.socketio.models.room import Room
+from ibg.socketio.models.user import User
+
+
+async def find(room_id: str) -> Room:
+    return await Room.find(Room.id == room_id).first()
+
+
+async def get(room_id: str) -> Room:
+    return await Room.get(room_id)
+
+
+async def main(rooms: list[int], number_of_lookups: int) -> None:
+    await Migrator().run()
+    for number_of_rooms in rooms:
+        room_ids = []
+        for _ in range(number_of_rooms):
+            room = Room(
+                id=str(uuid4()),
+                users=[User(id=str(uuid4()), username=f"player-{index}", sid=f"sid-{index}") for index in range(8)],
+            )
+            await room.save()
+            room_ids.append(room.id)
+        for name, lookup in (("find", find), ("get", get)):
+            durations = []
+            for room_id in random.choices(room_ids, k=number_of_lookups):
+                start = time.perf_counter()
+                await lookup(room_id)
+                durations.append(time.perf_counter() - start)
+            durations.sort()
+            print(
+                f"{number_of_rooms:>6} rooms  {name:<4}"
+                f"  p50 {statistics.median(durations) * 1000:6.3f}ms"
+                f"  p99 {durations[int(len(durations) * 0.99)] * 1000:6.3f}ms"
+            )
+        for room_id in room_ids:
+            await Room.delete(room_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rooms, args.lookups))
@@ -0,0 +1,67 @@
+"""
+Compare the latency of sending the role_assigned event to every player of a game:
+
+- serial: the previous path, one awaited emit per player.
+- fan_out: EventFanOut, one emit per distinct payload, run concurrently.
+
+The sockets are connected to an in-memory client manager, and sending a packet to a socket waits `--send-delay`
+seconds to stand for the write to its transport. No Redis is needed, but the socket models read the settings (from
+the environment or `.env`) when imported:
+
+    REDIS_OM_URL=redis://127.0.0.1:6379 python -m benchmarks.role_fan_out --players 8 24 100 --games 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from ibg.socketio.models.shared import IBGSocket
+from ibg.socketio.routers.shared import EventFanOut
+
+ROLES = [("undercover", "pear"), ("mr_white", "You are Mr. White. You have to guess the word.")]
+
+
+async def serial(sio: IBGSocket, payloads: dict[str, dict[str, str]]) -> None:
+    for sid, payload in payloads.items():
+        await sio.emit("role_assigned", payload, room=sid)
+
+
+async def main(players: list[int], number_of_games: int, send_delay: float) -> None:
+    sio = IBGSocket()
+
+    async def send_eio_packet(eio_sid, eio_packet):
+        await asyncio.sleep(send_delay)
+
+    sio._send_eio_packet = send_eio_packet
+    for number_of_players in players:
+        sids = [await sio.manager.connect(f"eio_sid-{index}", "/") for index in range(number_of_players)]
+        payloads = {
+            sid: dict(zip(("role", "word"), ROLES[index] if index < len(ROLES) else ("civilian", "apple")))
+            for index, sid in enumerate(sids)
+        }
+        event_fan_out = EventFanOut()
+        for name, send in (
+            ("serial", serial),
+            ("fan_out", lambda sio, payloads: event_fan_out.send(sio, "role_assigned", payloads)),
+        ):
+            durations = []
+            for _ in range(number_of_games):
+                start = time.perf_counter()
+                await send(sio, payloads)
+                durations.append(time.perf_counter() - start)
+            print(
+                f"{number_of_players:>4} players  {name:<7}"
+                f"  p50 {statistics.median(durations) * 1000:7.3f}ms  max {max(durations) * 1000:7.3f}ms"
+            )
+        for sid in sids:
+            await sio.manager.disconnect(sid, "/")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[8, 24, 100])
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--send-delay", type=float, default=0.0005)
+    args = parser.parse_args()
+    asyncio.run(main(args.players, args.games, args.send_delay))
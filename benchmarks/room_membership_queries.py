@@ -0,0 +1,139 @@
+"""
+Compare the hot queries of the room membership with and without the indexes of the tables, as the tables grow:
+
+- indexed: the indexes declared on RoomUserLink, Room and Turn.
+- unindexed: the same tables once those indexes are dropped, the previous schema.
+
+The rows are generated in SQL, every tenth room is active, a room has ten users and a game twenty turns:
+
+    python -m benchmarks.room_membership_queries --rows 10000 100000 1000000 --repeat 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from uuid import UUID
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ibg.api.controllers.room import RoomController
+from ibg.api.models.relationship import RoomUserLink
+from ibg.api.models.table import Turn
+from ibg.database import EngineRegistry, create_db_and_tables
+from ibg.settings import Settings
+
+INDEXES = [
+    "ix_roomuserlink_room_id_user_id_connected",
+    "ix_roomuserlink_connected_user_id",
+    "ix_room_active_public_id",
+    "ix_turn_game_id_start_time",
+]
+
+FILL_STATEMENTS = [
+    """
+    WITH RECURSIVE row(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM row WHERE i < {rows})
+    INSERT INTO roomuserlink (room_id, user_id, joined_at, connected)
+    SELECT printf('%032x', i / 10), printf('%032x', i), datetime('now'), i % 4 != 0 FROM row
+    """,
+    """
+    WITH RECURSIVE row(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM row WHERE i < {rows})
+    INSERT INTO room (id, public_id, owner_id, password, status, created_at, type)
+    SELECT printf('%032x', i), printf('%05d', (i / 10) % 100000), printf('%032x', i), '1234', 'ONLINE',
+        datetime('now'), CASE WHEN i % 10 = 0 THEN 'ACTIVE' ELSE 'INACTIVE' END
+    FROM row
+    """,
+    """
+    WITH RECURSIVE row(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM row WHERE i < {rows})
+    INSERT INTO turn (id, game_id, start_time, completed)
+    SELECT printf('%032x', i), printf('%032x', i / 20), datetime('now', '-' || i || ' seconds'), 0 FROM row
+    """,
+]
+
+
+async def fill_tables(engine_registry: EngineRegistry, number_of_rows: int) -> None:
+    async with engine_registry.engine.connect() as connection:
+        # The rows reference users and games that don't exist
+        await connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        for statement in FILL_STATEMENTS:
+            await connection.exec_driver_sql(statement.format(rows=number_of_rows))
+        await connection.commit()
+        await connection.exec_driver_sql("ANALYZE")
+    await engine_registry.engine.dispose()
+
+
+async def drop_indexes(engine_registry: EngineRegistry) -> None:
+    async with engine_registry.engine.begin() as connection:
+        for index in INDEXES:
+            await connection.exec_driver_sql(f"DROP INDEX {index}")
+
+
+def get_queries(number_of_rows: int):
+    # A user connected to a room in the middle of the table, and a game in the middle of the turns
+    user_id, room_id, game_id = UUID(int=number_of_rows // 2 + 1), UUID(int=number_of_rows // 20), UUID(int=42)
+    public_id = f"{number_of_rows // 200:05d}"
+    return [
+        ("connected room", lambda session: RoomController(session)._get_connected_link(user_id)),
+        ("membership", lambda session: RoomController(session).check_if_user_is_in_room(user_id, room_id)),
+        ("active room", lambda session: RoomController(session).get_active_room_by_public_id(public_id)),
+        (
+            "latest turn",
+            lambda session: session.exec(
+                select(Turn).where(Turn.game_id == game_id).order_by(Turn.start_time.desc()).limit(1)
+            ),
+        ),
+        (
+            "leave link",
+            lambda session: session.exec(
+                select(RoomUserLink).where(RoomUserLink.room_id == room_id).where(RoomUserLink.user_id == user_id)
+            ),
+        ),
+    ]
+
+
+async def measure(engine_registry: EngineRegistry, query, repeat: int) -> list[float]:
+    durations = []
+    async with AsyncSession(engine_registry.engine, expire_on_commit=False) as session:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await query(session)
+            durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def main(rows: list[int], repeat: int) -> None:
+    for number_of_rows in rows:
+        with tempfile.TemporaryDirectory() as directory:
+            engine_registry = EngineRegistry(
+                Settings(
+                    database_url=f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.db'}",
+                    redis_om_url="",
+                    logfire_token="",
+                )
+            )
+            await create_db_and_tables(engine_registry.engine)
+            await fill_tables(engine_registry, number_of_rows)
+            results = {}
+            for name in ("indexed", "unindexed"):
+                if name == "unindexed":
+                    await drop_indexes(engine_registry)
+                for query_name, query in get_queries(number_of_rows):
+                    results[name, query_name] = statistics.median(await measure(engine_registry, query, repeat))
+            for query_name, _ in get_queries(number_of_rows):
+                print(
+                    f"{number_of_rows:>8} rows  {query_name:<14}"
+                    f"  indexed {results['indexed', query_name] * 1000:8.3f}ms"
+                    f"  unindexed {results['unindexed', query_name] * 1000:8.3f}ms"
+                )
+            await engine_registry.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,131 @@
+"""
+Compare the ways of giving a public id to a new room as the number of active rooms grows:
+
+- scan: the previous implementation, read every active room, draw public ids until one is not taken by them, then
+  commit the room and its owner link in two transactions.
+- insert: `RoomController.create_room`, insert the room with a random public id and draw another one only when the
+  unique index of the active public ids skips the insert, in the transaction of the owner link.
+
+    python -m benchmarks.room_public_id --rooms 100 1000 10000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from sqlalchemy import Engine, event, insert
+from sqlmodel import select
+
+from ibg.api.controllers.room import RoomController
+from ibg.api.controllers.shared import create_random_public_id
+from ibg.api.models.relationship import RoomUserLink
+from ibg.api.models.room import RoomCreate, RoomStatus, RoomType
+from ibg.api.models.table import Room, User
+from ibg.database import EngineRegistry, create_db_and_tables
+from ibg.settings import Settings
+
+
+async def create_users(engine_registry: EngineRegistry, number_of_users: int) -> list[UUID]:
+    user_ids = [uuid4() for _ in range(number_of_users)]
+    async with engine_registry.engine.begin() as connection:
+        await connection.execute(
+            insert(User),
+            [
+                {"id": user_id, "username": f"player-{user_id}", "email_address": f"{user_id}@ibg.com", "password": "x"}
+                for user_id in user_ids
+            ],
+        )
+    return user_ids
+
+
+async def create_active_rooms(engine_registry: EngineRegistry, number_of_rooms: int) -> None:
+    owner_ids = await create_users(engine_registry, number_of_rooms)
+    public_ids = set()
+    while len(public_ids) < number_of_rooms:
+        public_ids.add(create_random_public_id())
+    async with engine_registry.engine.begin() as connection:
+        await connection.execute(
+            insert(Room),
+            [
+                {
+                    "id": uuid4(),
+                    "public_id": public_id,
+                    "owner_id": owner_id,
+                    "password": "1234",
+                    "status": RoomStatus.ONLINE,
+                }
+                for public_id, owner_id in zip(public_ids, owner_ids)
+            ],
+        )
+
+
+async def scan(room_controller: RoomController, room_create: RoomCreate) -> None:
+    session = room_controller.session
+    active_rooms = (await session.exec(select(Room).where(Room.type == RoomType.ACTIVE))).all()
+    room_public_id = create_random_public_id()
+    while any(room.public_id == room_public_id for room in active_rooms):
+        room_public_id = create_random_public_id()
+    new_room = Room(**room_create.model_dump(), public_id=room_public_id)
+    session.add(new_room)
+    await session.commit()
+    await session.refresh(new_room)
+    session.add(RoomUserLink(room_id=new_room.id, user_id=new_room.owner_id))
+    await session.commit()
+
+
+async def insert_room(room_controller: RoomController, room_create: RoomCreate) -> None:
+    await room_controller.create_room(room_create)
+
+
+async def measure(engine_registry: EngineRegistry, strategy, repeat: int) -> tuple[list[float], int]:
+    owner_ids = await create_users(engine_registry, repeat)
+    queries = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    durations = []
+    event.listen(Engine, "before_cursor_execute", count_query)
+    try:
+        for owner_id in owner_ids:
+            room_create = RoomCreate(status=RoomStatus.ONLINE, owner_id=owner_id, password="1234")
+            async with engine_registry.session() as session:
+                start = time.perf_counter()
+                await strategy(RoomController(session), room_create)
+                durations.append(time.perf_counter() - start)
+    finally:
+        event.remove(Engine, "before_cursor_execute", count_query)
+    return durations, len(queries) // repeat
+
+
+async def main(rooms: list[int], repeat: int) -> None:
+    for number_of_rooms in rooms:
+        with tempfile.TemporaryDirectory() as directory:
+            engine_registry = EngineRegistry(
+                Settings(
+                    database_url=f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.db'}",
+                    redis_om_url="",
+                    logfire_token="",
+                )
+            )
+            await create_db_and_tables(engine_registry.engine)
+            await create_active_rooms(engine_registry, number_of_rooms)
+            for name, strategy in (("scan", scan), ("insert", insert_room)):
+                durations, queries = await measure(engine_registry, strategy, repeat)
+                print(
+                    f"{number_of_rooms:>6} active rooms  {name:<6}  {queries:>3} statements"
+                    f"  median {statistics.median(durations) * 1000:7.2f}ms  max {max(durations) * 1000:7.2f}ms"
+                )
+            await engine_registry.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rooms, args.repeat))
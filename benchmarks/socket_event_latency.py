@@ -0,0 +1,64 @@
+"""
+Measure the latency of socket events while many clients hit the server at the same time.
+
+Every client repeatedly emits `join_room` for a room that does not exist: the server runs one database query,
+answers with an `error` event and we time the round trip. Run it against a live server before and after a change:
+
+    python -m benchmarks.socket_event_latency --url http://127.0.0.1:5000 --clients 50 --events 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import socketio
+
+
+async def run_client(
+    url: str, number_of_events: int, latencies: list[float], transports: list[str] | None = None
+) -> None:
+    client = socketio.AsyncClient()
+    answered = asyncio.Event()
+
+    @client.on("error")
+    async def on_error(data):
+        answered.set()
+
+    await client.connect(url, transports=transports)
+    for _ in range(number_of_events):
+        answered.clear()
+        start = time.perf_counter()
+        await client.emit(
+            "join_room",
+            {"user_id": "00000000-0000-0000-0000-000000000000", "public_room_id": "xxxxx", "password": "0000"},
+        )
+        await answered.wait()
+        latencies.append(time.perf_counter() - start)
+    await client.disconnect()
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def main(url: str, number_of_clients: int, number_of_events: int) -> None:
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(url, number_of_events, latencies) for _ in range(number_of_clients)))
+    elapsed = time.perf_counter() - start
+    print(f"{len(latencies)} events from {number_of_clients} clients in {elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.0f} events/s")
+    print(f"p50: {statistics.median(latencies) * 1000:.1f}ms")
+    print(f"p99: {percentile(latencies, 99) * 1000:.1f}ms")
+    print(f"max: {max(latencies) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.clients, args.events))
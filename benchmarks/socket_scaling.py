@@ -0,0 +1,78 @@
+"""
+Measure how the socket event throughput scales with the number of uvicorn workers.
+
+For every worker count, start `main:app` with the Redis client manager enabled (`SOCKETIO_REDIS_MANAGER=true`), run
+the clients of `benchmarks.socket_event_latency` against it and stop it. The clients only use the websocket transport:
+the long-polling requests of one client could be routed to different workers, which needs sticky sessions.
+The `DATABASE_URL`, `REDIS_OM_URL` and `LOGFIRE_TOKEN` of the environment (or `.env`) are used by the workers.
+
+    python -m benchmarks.socket_scaling --workers 1 2 4 --clients 200 --events 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from aiohttp import ClientConnectorError, ClientSession
+
+from benchmarks.socket_event_latency import percentile, run_client
+
+
+async def wait_for_server(url: str, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            async with ClientSession() as session:
+                async with session.get(f"{url}/docs") as response:
+                    if response.status == 200:
+                        return
+        except ClientConnectorError:
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"{url} did not start in {timeout}s")
+
+
+async def measure(url: str, number_of_clients: int, number_of_events: int) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(run_client(url, number_of_events, latencies, transports=["websocket"]) for _ in range(number_of_clients))
+    )
+    return len(latencies) / (time.perf_counter() - start), latencies
+
+
+async def main(workers: list[int], port: int, number_of_clients: int, number_of_events: int) -> None:
+    url = f"http://127.0.0.1:{port}"
+    baseline = None
+    for number_of_workers in workers:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(number_of_workers)],
+            env={**os.environ, "SOCKETIO_REDIS_MANAGER": "true"},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            await wait_for_server(url)
+            throughput, latencies = await measure(url, number_of_clients, number_of_events)
+        finally:
+            server.terminate()
+            server.wait()
+        baseline = baseline or throughput
+        print(
+            f"{number_of_workers:>2} workers  {throughput:8.0f} events/s  x{throughput / baseline:4.1f}"
+            f"  p50 {statistics.median(latencies) * 1000:6.1f}ms  p99 {percentile(latencies, 99) * 1000:6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.port, args.clients, args.events))
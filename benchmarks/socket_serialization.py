@@ -0,0 +1,90 @@
+"""
+Compare the cost of encoding the two packets of a join_room event (`room_status` to the user, `new_user_joined` to
+the room), which both carry the view of the room, as the room grows:
+
+- recursive: the previous path, `model_dump()` walked again to stringify the UUIDs and datetimes, then the view is
+  encoded with the rest of each packet.
+- compiled: the serializer compiled for RoomView encodes the view once, and both packets embed the encoded view.
+
+No Redis is needed, but the socket models read the settings (from the environment or `.env`) when imported:
+
+    REDIS_OM_URL=redis://127.0.0.1:6379 python -m benchmarks.socket_serialization --users 2 8 32 --events 2000
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import Any
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel
+from socketio.packet import Packet
+
+from ibg.api.models.room import RoomStatus, RoomType
+from ibg.api.models.table import Room, User
+from ibg.api.models.view import RoomView
+from ibg.socketio.models.serialization import SocketJSON
+from ibg.socketio.routers.shared import encode_model
+
+
+def recursive_serialize_model(data: Any) -> Any:
+    if isinstance(data, BaseModel):
+        return {key: recursive_serialize_model(value) for key, value in data.model_dump().items()}
+    elif isinstance(data, UUID):
+        return str(data)
+    elif isinstance(data, dict):
+        return {key: recursive_serialize_model(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [recursive_serialize_model(item) for item in data]
+    elif isinstance(data, datetime):
+        return data.strftime("%Y-%m-%d %H:%M:%S")
+    return data
+
+
+def make_room_view(number_of_users: int) -> RoomView:
+    room = Room(
+        id=uuid4(),
+        public_id="12345",
+        owner_id=uuid4(),
+        status=RoomStatus.ONLINE,
+        password="1234",
+        type=RoomType.ACTIVE,
+        created_at=datetime.now(),
+    )
+    room.users = [
+        User(
+            id=uuid4(),
+            username=f"player-{index}",
+            email_address=f"player-{index}@test.com",
+            country="FRA",
+            password="securepassword",
+        )
+        for index in range(number_of_users)
+    ]
+    room.games = []
+    return RoomView.model_validate(room)
+
+
+def encode_join_room_packets(room_view: Any) -> None:
+    for event in ("room_status", "new_user_joined"):
+        Packet(data=[event, {"message": "A user joined the room.", "data": room_view}]).encode()
+
+
+def main(users: list[int], number_of_events: int) -> None:
+    Packet.json = SocketJSON
+    for number_of_users in users:
+        room_view = make_room_view(number_of_users)
+        for name, serialize in (("recursive", recursive_serialize_model), ("compiled", encode_model)):
+            start = time.perf_counter()
+            for _ in range(number_of_events):
+                encode_join_room_packets(serialize(room_view))
+            duration = (time.perf_counter() - start) / number_of_events
+            print(f"{number_of_users:>4} users  {name:<9}  {duration * 1_000_000:8.1f}us per event")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.users, args.events)
@@ -0,0 +1,92 @@
+"""
+Compare the ways of picking a random term pair (and its two words) when a game starts:
+
+- full_scan: the previous implementation, load every term pair, `random.choice` one, then fetch both words by id.
+- seek: `UndercoverController.get_random_term_pair_with_words`, one query seeking a random UUID through the id index.
+
+    python -m benchmarks.term_pair_sampling --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy import insert
+from sqlmodel import select
+
+from ibg.api.controllers.undercover import UndercoverController
+from ibg.api.models.undercover import TermPair, Word
+from ibg.database import EngineRegistry, create_db_and_tables
+from ibg.settings import Settings
+
+BATCH_SIZE = 10_000
+
+
+async def fill_word_bank(engine_registry: EngineRegistry, number_of_pairs: int) -> None:
+    async with engine_registry.engine.begin() as connection:
+        for batch_start in range(0, number_of_pairs, BATCH_SIZE):
+            words, term_pairs = [], []
+            for index in range(batch_start, min(batch_start + BATCH_SIZE, number_of_pairs)):
+                word1 = {"id": uuid4(), "word": f"word-{index}-a", "category": f"category-{index % 20}"}
+                word2 = {"id": uuid4(), "word": f"word-{index}-b", "category": f"category-{index % 20}"}
+                for word in (word1, word2):
+                    word.update(short_description="", long_description="")
+                words += [word1, word2]
+                term_pairs.append({"id": uuid4(), "word1_id": word1["id"], "word2_id": word2["id"]})
+            await connection.execute(insert(Word), words)
+            await connection.execute(insert(TermPair), term_pairs)
+
+
+async def full_scan(undercover_controller: UndercoverController) -> None:
+    term_pair = random.choice((await undercover_controller.session.exec(select(TermPair))).all())
+    await undercover_controller.get_word_by_id(term_pair.word1_id)
+    await undercover_controller.get_word_by_id(term_pair.word2_id)
+
+
+async def seek(undercover_controller: UndercoverController) -> None:
+    await undercover_controller.get_random_term_pair_with_words()
+
+
+async def measure(engine_registry: EngineRegistry, strategy, repeat: int) -> list[float]:
+    durations = []
+    for _ in range(repeat):
+        async with engine_registry.session() as session:
+            start = time.perf_counter()
+            await strategy(UndercoverController(session))
+            durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def main(sizes: list[int], repeat: int, full_scan_repeat: int) -> None:
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            engine_registry = EngineRegistry(
+                Settings(
+                    database_url=f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.db'}",
+                    redis_om_url="",
+                    logfire_token="",
+                )
+            )
+            await create_db_and_tables(engine_registry.engine)
+            await fill_word_bank(engine_registry, size)
+            for name, strategy, strategy_repeat in (("full_scan", full_scan, full_scan_repeat), ("seek", seek, repeat)):
+                durations = await measure(engine_registry, strategy, strategy_repeat)
+                print(
+                    f"{size:>9} pairs  {name:<9}  median {statistics.median(durations) * 1000:9.2f}ms"
+                    f"  max {max(durations) * 1000:9.2f}ms"
+                )
+            await engine_registry.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--full-scan-repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat, args.full_scan_repeat))
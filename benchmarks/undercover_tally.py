@@ -0,0 +1,110 @@
+"""
+Compare the cost of a vote and of the end of turn checks of an undercover game as the number of players grows:
+
+- scan: the previous path, find the players of a vote with two scans of the players, then rebuild the tally and count
+  the alive players of each role with three more scans at the end of the turn.
+- indexed: the player index, the running tally and the alive counts of the game.
+
+No Redis is needed, but the socket models read the settings (from the environment or `.env`) when imported:
+
+    REDIS_OM_URL=redis://127.0.0.1:6379 python -m benchmarks.undercover_tally --players 10 100 1000 10000 --turns 20
+"""
+
+import argparse
+import statistics
+import time
+from uuid import UUID, uuid4
+
+from ibg.api.models.undercover import UndercoverRole
+from ibg.socketio.models.socket import UndercoverGame, UndercoverTurn
+from ibg.socketio.models.user import UndercoverSocketPlayer
+
+
+def make_game(number_of_players: int) -> UndercoverGame:
+    roles = [UndercoverRole.UNDERCOVER, UndercoverRole.MR_WHITE]
+    roles += [UndercoverRole.CIVILIAN] * (number_of_players - len(roles))
+    return UndercoverGame(
+        civilian_word="apple",
+        undercover_word="pear",
+        room_id=str(uuid4()),
+        id=str(uuid4()),
+        players=[
+            UndercoverSocketPlayer(sid=f"sid-{index}", user_id=uuid4(), username=f"player-{index}", role=role)
+            for index, role in enumerate(roles)
+        ],
+        turns=[UndercoverTurn()],
+    )
+
+
+def scan_vote(game: UndercoverGame, user_id: UUID, voted_user_id: UUID) -> bool:
+    player = next(player for player in game.players if player.user_id == user_id)
+    voted_player = next(player for player in game.players if player.user_id == voted_user_id)
+    game.turns[-1].votes[player.user_id] = voted_player.user_id
+    return len(game.turns[-1].votes) == len(game.players) - len(game.eliminated_players)
+
+
+def scan_end_of_turn(game: UndercoverGame) -> tuple[list[UUID], tuple[int, int, int]]:
+    vote_counts = {player.user_id: 0 for player in game.players}
+    for voted_id in game.turns[-1].votes.values():
+        vote_counts[voted_id] += 1
+    max_votes = max(vote_counts.values())
+    most_voted = [player_id for player_id, vote_count in vote_counts.items() if vote_count == max_votes]
+    alive_counts = tuple(
+        len([player for player in game.players if player.role == role and player.is_alive])
+        for role in (UndercoverRole.UNDERCOVER, UndercoverRole.CIVILIAN, UndercoverRole.MR_WHITE)
+    )
+    return most_voted, alive_counts
+
+
+def indexed_vote(game: UndercoverGame, user_id: UUID, voted_user_id: UUID) -> bool:
+    game.vote(game.get_player(user_id), game.get_player(voted_user_id))
+    return game.all_votes_in
+
+
+def indexed_end_of_turn(game: UndercoverGame) -> tuple[list[UndercoverSocketPlayer], tuple[int, int, int]]:
+    alive_counts = tuple(
+        game.number_of_alive_players_with_role(role)
+        for role in (UndercoverRole.UNDERCOVER, UndercoverRole.CIVILIAN, UndercoverRole.MR_WHITE)
+    )
+    return game.most_voted_players(), alive_counts
+
+
+def measure(number_of_players: int, number_of_turns: int, vote, end_of_turn) -> tuple[float, float]:
+    game = make_game(number_of_players)
+    # The votes of a turn go to a handful of players, as they do in a real game
+    candidates = game.players[:5]
+    votes = [
+        (player.user_id, candidates[(index + 1) % len(candidates)].user_id) for index, player in enumerate(game.players)
+    ]
+    vote_durations, end_of_turn_durations = [], []
+    for _ in range(number_of_turns):
+        start = time.perf_counter()
+        for user_id, voted_user_id in votes:
+            vote(game, user_id, voted_user_id)
+        vote_durations.append((time.perf_counter() - start) / number_of_players)
+        start = time.perf_counter()
+        end_of_turn(game)
+        end_of_turn_durations.append(time.perf_counter() - start)
+        game.start_turn()
+    return statistics.median(vote_durations), statistics.median(end_of_turn_durations)
+
+
+def main(players: list[int], number_of_turns: int) -> None:
+    for number_of_players in players:
+        for name, vote, end_of_turn in (
+            ("scan", scan_vote, scan_end_of_turn),
+            ("indexed", indexed_vote, indexed_end_of_turn),
+        ):
+            vote_duration, end_of_turn_duration = measure(number_of_players, number_of_turns, vote, end_of_turn)
+            print(
+                f"{number_of_players:>6} players  {name:<7}  vote {vote_duration * 1_000_000:9.2f}us"
+                f"  end of turn {end_of_turn_duration * 1_000_000:10.1f}us"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+    main(args.players, args.turns)
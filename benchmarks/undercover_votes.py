@@ -0,0 +1,86 @@
+"""
+Compare the votes per second of an undercover game:
+
+- redis: the previous path, find the game with a RediSearch query and save the whole document on every vote.
+- memory: the game store, get the live game from memory and let the periodic snapshot write it.
+
+Each turn, every player votes, then the game is written to Redis as at the end of the elimination phase. Run it
+against the Redis (with RediSearch) of `REDIS_OM_URL`, the other settings are read from the environment or `.env`:
+
+    REDIS_OM_URL=redis://127.0.0.1:6379 python -m benchmarks.undercover_votes --players 4 12 24 --turns 10
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from aredis_om import Migrator
+
+from ibg.api.models.undercover import UndercoverRole
+from ibg.socketio.controllers.game_store import GameStore
+from ibg.socketio.models.socket import UndercoverGame, UndercoverTurn
+from ibg.socketio.models.user import UndercoverSocketPlayer
+
+
+def make_game(number_of_players: int) -> UndercoverGame:
+    return UndercoverGame(
+        civilian_word="apple",
+        undercover_word="pear",
+        room_id=str(uuid4()),
+        id=str(uuid4()),
+        players=[
+            UndercoverSocketPlayer(
+                sid=f"sid-{index}", user_id=uuid4(), username=f"player-{index}", role=UndercoverRole.CIVILIAN
+            )
+            for index in range(number_of_players)
+        ],
+        turns=[UndercoverTurn()],
+    )
+
+
+async def redis(game: UndercoverGame, number_of_turns: int) -> None:
+    for _ in range(number_of_turns):
+        for voter, voted in zip(game.players, game.players[1:] + game.players[:1]):
+            game = await UndercoverGame.find(UndercoverGame.id == game.id).first()
+            game.turns[-1].votes[voter.user_id] = voted.user_id
+            await game.save()
+        game.turns.append(UndercoverTurn())
+        await game.save()
+
+
+async def memory(game: UndercoverGame, number_of_turns: int) -> None:
+    game_store = GameStore()
+    game_store.add(game)
+    game_store.start()
+    for _ in range(number_of_turns):
+        for voter, voted in zip(game.players, game.players[1:] + game.players[:1]):
+            live_game = await game_store.get(game.id)
+            live_game.vote(voter, voted)
+            await game_store.record_change(live_game)
+        live_game.start_turn()
+        await game_store.snapshot(live_game)
+    await game_store.stop()
+
+
+async def main(players: list[int], number_of_turns: int) -> None:
+    await Migrator().run()
+    for number_of_players in players:
+        for name, strategy in (("redis", redis), ("memory", memory)):
+            game = make_game(number_of_players)
+            await game.save()
+            start = time.perf_counter()
+            await strategy(game, number_of_turns)
+            elapsed = time.perf_counter() - start
+            await UndercoverGame.delete(game.pk)
+            print(
+                f"{number_of_players:>3} players  {name:<6}  {number_of_players * number_of_turns / elapsed:9.0f} votes/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[4, 12, 24])
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.players, args.turns))
@@ -0,0 +1,224 @@
+import asyncio
+import time
+from typing import Callable
+from uuid import UUID
+
+from loguru import logger
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ibg.api.models.event import EventCreate
+from ibg.api.models.relationship import RoomActivityLink, TurnEventLink
+from ibg.api.models.table import Activity, Event
+from ibg.database import get_engine_registry
+from ibg.settings import Settings
+
+_STOP = object()
+
+
+class EventWriterMetrics(BaseModel):
+    queued: int = 0
+    written: int = 0
+    failed: int = 0
+    flushes: int = 0
+    backpressure_waits: int = 0
+    flush_time_total: float = 0.0
+    flush_time_max: float = 0.0
+
+    def record_flush(self, duration: float) -> None:
+        self.flushes += 1
+        self.flush_time_total += duration
+        self.flush_time_max = max(self.flush_time_max, duration)
+
+
+class EventWriterStatus(EventWriterMetrics):
+    running: bool
+    queue_depth: int
+    max_queue_size: int
+    flush_time_avg: float
+
+
+class EventWriter:
+    """
+    Append-only writer of the room activities and turn events.
+    Nobody reads these rows back while the game is running, so the socket handlers queue them instead of waiting for
+    a commit, and a background task writes them in batches, when the batch is full or the flush interval elapsed.
+    When the queue is full, writers wait for the next flush. A batch that can't be written is logged and counted as
+    failed, the writer goes on with the next one.
+    While the writer is not running (scripts, tests, after shutdown), records are written as soon as they are queued.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue_size: int = 10_000,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.metrics = EventWriterMetrics()
+        self._session_factory = session_factory
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def write_room_activity(self, room_id: UUID, activity_create: EventCreate) -> Activity:
+        """
+        Queue an activity of a room.
+
+        :param room_id: The id of the room the activity happened in.
+        :param activity_create: The activity to write.
+        :return: The activity that will be written.
+        """
+        activity = Activity(
+            room_id=room_id,
+            user_id=activity_create.user_id,
+            name=activity_create.name,
+            data=to_jsonable_python(activity_create.data),
+        )
+        await self._put(activity)
+        return activity
+
+    async def write_turn_event(self, turn_id: UUID, event_create: EventCreate) -> Event:
+        """
+        Queue an event of a turn.
+
+        :param turn_id: The id of the turn the event happened in.
+        :param event_create: The event to write.
+        :return: The event that will be written.
+        """
+        event = Event(
+            turn_id=turn_id,
+            user_id=event_create.user_id,
+            name=event_create.name,
+            data=to_jsonable_python(event_create.data),
+        )
+        await self._put(event)
+        return event
+
+    async def _put(self, record: Activity | Event) -> None:
+        self.metrics.queued += 1
+        if not self.running:
+            await self._flush([record])
+            return
+        if self._queue.full():
+            self.metrics.backpressure_waits += 1
+        await self._queue.put(record)
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Write everything still queued and stop the background task. The records the task didn't write, e.g. when it
+        was cancelled, are written here.
+
+        :return: None
+        """
+        if self.running:
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+        batch = []
+        while not self._queue.empty():
+            record = self._queue.get_nowait()
+            if record is not _STOP:
+                batch.append(record)
+            if len(batch) == self.batch_size or (batch and self._queue.empty()):
+                await self._flush(batch)
+                batch = []
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            record = await self._queue.get()
+            if record is _STOP:
+                break
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[Activity | Event]) -> None:
+        start = time.perf_counter()
+        try:
+            await self._write(batch)
+            self.metrics.written += len(batch)
+        except SQLAlchemyError:
+            # One bad record (e.g. a deleted room) must not lose the whole batch
+            if len(batch) == 1:
+                logger.exception(f"Couldn't write {batch[0]!r}")
+                self.metrics.failed += 1
+            else:
+                for record in batch:
+                    await self._flush([record])
+                return
+        except Exception:
+            # Not a problem of the records (e.g. the database is unreachable), the writer goes on with the next batch
+            logger.exception(f"Couldn't write a batch of {len(batch)} records")
+            self.metrics.failed += len(batch)
+        self.metrics.record_flush(time.perf_counter() - start)
+
+    async def _write(self, batch: list[Activity | Event]) -> None:
+        activities = [record.model_dump() for record in batch if isinstance(record, Activity)]
+        events = [record.model_dump() for record in batch if isinstance(record, Event)]
+        session_factory = self._session_factory or get_engine_registry().session
+        async with session_factory() as session:
+            if activities:
+                await session.exec(insert(Activity), params=activities)
+                await session.exec(
+                    insert(RoomActivityLink),
+                    params=[{"activity_id": row["id"], "room_id": row["room_id"]} for row in activities],
+                )
+            if events:
+                await session.exec(insert(Event), params=events)
+                await session.exec(
+                    insert(TurnEventLink), params=[{"turn_id": row["turn_id"], "event_id": row["id"]} for row in events]
+                )
+            await session.commit()
+
+    def status(self) -> EventWriterStatus:
+        return EventWriterStatus(
+            **self.metrics.model_dump(),
+            running=self.running,
+            queue_depth=self._queue.qsize(),
+            max_queue_size=self._queue.maxsize,
+            flush_time_avg=self.metrics.flush_time_total / self.metrics.flushes if self.metrics.flushes else 0.0,
+        )
+
+
+_event_writer: EventWriter | None = None
+
+
+def get_event_writer() -> EventWriter:
+    """
+    Return the process-wide event writer, creating it from the settings on first use.
+
+    :return: The event writer.
+    """
+    global _event_writer
+    if _event_writer is None:
+        settings = Settings()
+        _event_writer = EventWriter(
+            batch_size=settings.event_writer_batch_size,
+            flush_interval=settings.event_writer_flush_interval,
+            max_queue_size=settings.event_writer_max_queue_size,
+        )
+    return _event_writer
@@ -1,60 +1,102 @@
 from datetime import datetime
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
+from sqlalchemy import insert, literal, update
 from sqlalchemy.exc import NoResultFound
-from sqlmodel import Session, desc, select
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql.base import ExecutableOption
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from ibg.api.controllers.shared import paginate
 from ibg.api.models.error import ErrorRoomIsNotActive, GameNotFoundError, NoTurnInsideGameError
 from ibg.api.models.event import EventCreate
 from ibg.api.models.game import GameCreate, GameUpdate
-from ibg.api.models.relationship import GameTurnLink, RoomGameLink, TurnEventLink, UserGameLink
+from ibg.api.models.pagination import STREAM_BATCH_SIZE
+from ibg.api.models.relationship import GameTurnLink, RoomGameLink, RoomUserLink, TurnEventLink, UserGameLink
 from ibg.api.models.room import RoomType
 from ibg.api.models.table import Event, Game, Room, Turn
 
 
 class GameController:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
     async def create_game(self, game_create: GameCreate) -> Game:
         """
-        Create a game. If the room is not active, raise an ErrorRoomIsNotActive exception.
+        Create a game with its room link and one user link per room user, in a single transaction.
+        If the room does not exist, raise a NoResultFound exception.
+        If the room is not active, raise an ErrorRoomIsNotActive exception.
 
         :param game_create: The game to create.
         :return: The created game.
         """
         new_game = Game(**game_create.model_dump())
-        room: Room = self.session.exec(select(Room).where(Room.id == new_game.room_id)).one()
-        if room.type != RoomType.ACTIVE:
-            raise ErrorRoomIsNotActive(room_id=room.id)  # type: ignore
+        # The room type and the ids of its users in one query, without loading the users themselves
+        room_users = (
+            await self.session.exec(
+                select(Room.type, RoomUserLink.user_id)
+                .outerjoin(RoomUserLink, RoomUserLink.room_id == Room.id)
+                .where(Room.id == new_game.room_id)
+                .distinct()
+            )
+        ).all()
+        if not room_users:
+            raise NoResultFound
+        if room_users[0].type != RoomType.ACTIVE:
+            raise ErrorRoomIsNotActive(room_id=new_game.room_id)  # type: ignore
         self.session.add(new_game)
-        self.session.commit()
-        self.session.refresh(new_game)
-        room_game_link = RoomGameLink(room_id=new_game.room_id, game_id=new_game.id)
-        for user in room.users:
-            user_game_link = UserGameLink(user_id=user.id, game_id=new_game.id)
-            self.session.add(user_game_link)
-        self.session.add(room_game_link)
-        self.session.commit()
+        await self.session.flush()
+        await self.session.exec(insert(RoomGameLink).values(room_id=new_game.room_id, game_id=new_game.id))
+        user_ids = [room_user.user_id for room_user in room_users if room_user.user_id is not None]
+        if user_ids:
+            await self.session.exec(
+                insert(UserGameLink).values([{"user_id": user_id, "game_id": new_game.id} for user_id in user_ids])
+            )
+        await self.session.commit()
+        # Every column has a client-side default, so there is nothing to refresh
         return new_game
 
-    async def get_games(self) -> Sequence[Game]:
+    async def get_games(
+        self, limit: int | None = None, after: UUID | None = None, loaders: Sequence[ExecutableOption] = ()
+    ) -> Sequence[Game]:
         """
-        Get all games. If no games exist, return an empty list.
+        Get the games sorted by id, one page at a time. If no games exist, return an empty list.
 
-        :return: A list of all games.
+        :param limit: The maximum number of games to return. If None, return every game after the cursor.
+        :param after: The id of the last game of the previous page.
+        :param loaders: The loader options of the relationships the caller will read, e.g. GAME_VIEW_LOADERS.
+        :return: A page of games.
         """
-        return self.session.exec(select(Game)).all()
+        return (await self.session.exec(paginate(select(Game).options(*loaders), Game.id, limit, after))).all()
 
-    async def get_game_by_id(self, game_id: UUID) -> Game:
+    async def stream_games(
+        self, after: UUID | None = None, loaders: Sequence[ExecutableOption] = ()
+    ) -> AsyncIterator[Game]:
+        """
+        Yield every game after the cursor, sorted by id, fetching them in batches from a server-side cursor.
+
+        :param after: The id of the last game already read.
+        :param loaders: The loader options of the relationships the caller will read, e.g. GAME_VIEW_LOADERS.
+        :return: An iterator over the games.
+        """
+        result = await self.session.stream_scalars(
+            paginate(select(Game).options(*loaders), Game.id, after=after),
+            execution_options={"yield_per": STREAM_BATCH_SIZE},
+        )
+        async for game in result:
+            yield game
+
+    async def get_game_by_id(self, game_id: UUID, loaders: Sequence[ExecutableOption] = ()) -> Game:
         """
         Get a game by its id. If the game does not exist, raise a NoResultFound exception.
 
         :param game_id: The id of the game to get.
+        :param loaders: The loader options of the relationships the caller will read, e.g. GAME_VIEW_LOADERS.
         :return: The game.
         """
-        return self.session.exec(select(Game).where(Game.id == game_id)).one()
+        return (await self.session.exec(select(Game).where(Game.id == game_id).options(*loaders))).one()
 
     async def update_game(self, game_id: UUID, game_update: GameUpdate) -> Game:
         """
@@ -64,12 +106,12 @@ class GameController:
         :param game_update: The updated game.
         :return: The updated game.
         """
-        db_game = self.session.exec(select(Game).where(Game.id == game_id)).one()
+        db_game = (await self.session.exec(select(Game).where(Game.id == game_id))).one()
         db_game_data = game_update.model_dump(exclude_unset=True)
         db_game.sqlmodel_update(db_game_data)
         self.session.add(db_game)
-        self.session.commit()
-        self.session.refresh(db_game)
+        await self.session.commit()
+        await self.session.refresh(db_game)
         return db_game
 
     async def end_game(self, game_id: UUID) -> Game:
@@ -79,11 +121,11 @@ class GameController:
         :param game_id: The id of the game to end.
         :return: The ended game.
         """
-        db_game = self.session.exec(select(Game).where(Game.id == game_id)).one()
+        db_game = (await self.session.exec(select(Game).where(Game.id == game_id))).one()
         db_game.end_time = datetime.now()
         self.session.add(db_game)
-        self.session.commit()
-        self.session.refresh(db_game)
+        await self.session.commit()
+        await self.session.refresh(db_game)
         return db_game
 
     async def delete_game(self, game_id: UUID) -> None:
@@ -93,76 +135,84 @@ class GameController:
         :param game_id: The id of the game to delete.
         :return: None
         """
-        db_game = self.session.exec(select(Game).where(Game.id == game_id)).one()
-        self.session.delete(db_game)
-        self.session.commit()
+        db_game = (await self.session.exec(select(Game).where(Game.id == game_id))).one()
+        await self.session.delete(db_game)
+        await self.session.commit()
 
     async def create_turn(self, game_id: UUID) -> Turn:
         """
-        Create a turn. If the game does not exist, raise a NoResultFound exception.
+        Create a turn and make it the current turn of its game, in a single transaction.
+        If the game does not exist, raise a GameNotFoundError exception.
 
         :param game_id: The id of the game to create a turn for.
-        :return: None
+        :return: The created turn, with its game.
         """
-        try:
-            db_game = self.session.exec(select(Game).where(Game.id == game_id)).one()
-            turn = Turn(
-                game_id=db_game.id,
+        new_turn = Turn(game_id=game_id)
+        # Checks that the game exists and points it at the new turn in one statement
+        db_game = (
+            await self.session.exec(
+                update(Game).where(Game.id == game_id).values(current_turn_id=new_turn.id).returning(Game)
             )
-            self.session.add(turn)
-            self.session.commit()
-            self.session.refresh(turn)
-            turn_game_link = GameTurnLink(game_id=db_game.id, turn_id=turn.id)
-            self.session.add(turn_game_link)
-            self.session.commit()
-            return turn
-        except NoResultFound:
+        ).scalar_one_or_none()
+        if db_game is None:
             raise GameNotFoundError(game_id=game_id)
+        turn = (await self.session.exec(insert(Turn).values(**new_turn.model_dump()).returning(Turn))).scalar_one()
+        await self.session.exec(insert(GameTurnLink).values(game_id=game_id, turn_id=turn.id))
+        await self.session.commit()
+        set_committed_value(turn, "game", db_game)
+        return turn
 
     async def create_turn_event(self, game_id: UUID, event_create: EventCreate) -> Event:
         """
-        Create an event. If the game does not exist, raise a NoResultFound exception.
+        Create an event in the current turn of a game, in a single transaction.
+        If the game does not exist, raise a GameNotFoundError exception.
+        If the game does not have a turn yet, raise a NoTurnInsideGameError exception.
 
         :param game_id: The id of the game to create an event for.
         :param event_create: The event to create.
-        :return: Event (TurnEvent or RoomEvent)
-        """
-        try:
-            db_game = self.session.exec(select(Game).where(Game.id == game_id)).one()
-            if not db_game.turns:
-                raise NoTurnInsideGameError(game_id=game_id)
-            latest_turn = self.session.exec(
-                select(Turn).where(Turn.game_id == db_game.id).order_by(desc(Turn.start_time))
-            ).first()
-            event = Event(
-                turn_id=latest_turn.id,
-                name=event_create.name,
-                data=event_create.data,
-                user_id=event_create.user_id,
+        :return: The created event, with its turn.
+        """
+        new_event = Event(**event_create.model_dump())
+        # Read the current turn of the game and insert the event in the same statement
+        columns = [column for column in Event.__table__.columns if column.name != "turn_id"]
+        current_turn_event = select(
+            *(literal(getattr(new_event, column.name), column.type) for column in columns),
+            Game.current_turn_id,
+        ).where(Game.id == game_id, Game.current_turn_id.is_not(None))
+        event = (
+            await self.session.exec(
+                insert(Event)
+                .from_select([*(column.name for column in columns), "turn_id"], current_turn_event)
+                .returning(Event)
             )
-            self.session.add(event)
-            self.session.commit()
-            self.session.refresh(event)
-            turn_event_link = TurnEventLink(turn_id=latest_turn.id, event_id=event.id)
-            self.session.add(turn_event_link)
-            self.session.commit()
-            return event
-        except NoResultFound:
-            raise GameNotFoundError(game_id=game_id)
+        ).scalar_one_or_none()
+        if event is None:
+            # Only look up what went wrong when something did. The game may have got its first turn since the insert,
+            # the event still had no turn to go in
+            await self.get_latest_turn(game_id)
+            raise NoTurnInsideGameError(game_id=game_id)
+        await self.session.exec(insert(TurnEventLink).values(turn_id=event.turn_id, event_id=event.id))
+        await self.session.commit()
+        # The turn is usually still in the session from create_turn, in which case this doesn't hit the database
+        set_committed_value(event, "turn", await self.session.get(Turn, event.turn_id))
+        return event
 
     async def get_latest_turn(self, game_id: UUID) -> Turn:
         """
-        Get the latest turn. If the game does not exist, raise a NoResultFound exception.
+        Get the current turn of a game.
+        If the game does not exist, raise a GameNotFoundError exception.
+        If the game does not have a turn yet, raise a NoTurnInsideGameError exception.
 
         :param game_id: The id of the game to get the latest turn for.
         :return: Turn
         """
-        try:
-            db_game = self.session.exec(select(Game).where(Game.id == game_id)).one()
-            if not db_game.turns:
-                raise NoTurnInsideGameError(game_id=game_id)
-            return self.session.exec(
-                select(Turn).where(Turn.game_id == db_game.id).order_by(desc(Turn.start_time))
-            ).first()
-        except NoResultFound:
+        game_turn = (
+            await self.session.exec(
+                select(Game.id, Turn).outerjoin(Turn, Turn.id == Game.current_turn_id).where(Game.id == game_id)
+            )
+        ).first()
+        if game_turn is None:
             raise GameNotFoundError(game_id=game_id)
+        if game_turn.Turn is None:
+            raise NoTurnInsideGameError(game_id=game_id)
+        return game_turn.Turn
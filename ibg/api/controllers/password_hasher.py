@@ -0,0 +1,152 @@
+import asyncio
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from passlib.context import CryptContext
+from pydantic import BaseModel
+
+from ibg.api.models.error import PasswordHasherBusyError
+from ibg.settings import Settings
+
+
+@lru_cache
+def get_crypt_context(rounds: int) -> CryptContext:
+    """
+    Return the bcrypt context of a cost factor. A hash of another cost needs an update, so it is rehashed with the
+    current cost the next time its password is verified.
+
+    :param rounds: The cost factor, the log2 of the number of rounds.
+    :return: The bcrypt context.
+    """
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds)
+
+
+def hash_password(rounds: int, password: str) -> str:
+    return get_crypt_context(rounds).hash(password)
+
+
+def verify_and_update_password(rounds: int, password: str, hashed_password: str) -> tuple[bool, str | None]:
+    context = get_crypt_context(rounds)
+    if context.identify(hashed_password, required=False) is None:
+        # The passwords stored before they were hashed are compared as is, and hashed once they match
+        if secrets.compare_digest(password.encode(), hashed_password.encode()):
+            return True, context.hash(password)
+        return False, None
+    return context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasherMetrics(BaseModel):
+    hashes: int = 0
+    verifications: int = 0
+    rehashes: int = 0
+    rejected: int = 0
+    hash_time_total: float = 0.0
+    hash_time_max: float = 0.0
+
+    def record_hash(self, duration: float) -> None:
+        self.hash_time_total += duration
+        self.hash_time_max = max(self.hash_time_max, duration)
+
+
+class PasswordHasherStatus(PasswordHasherMetrics):
+    rounds: int
+    workers: int
+    queue_depth: int
+    max_queue_size: int
+    hash_time_avg: float
+
+
+class PasswordHasher:
+    """
+    Hash and verify the passwords of the users with bcrypt in a pool of `workers` processes.
+    A bcrypt hash takes the CPU for 100+ ms at the default cost, which would freeze every socket of the worker if it
+    ran on the event loop. At most `max_queue_size` passwords are hashed or waiting for a process at once, the next
+    ones are refused with a PasswordHasherBusyError instead of piling up.
+    The processes are started on first use.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 2, max_queue_size: int = 64):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.metrics = PasswordHasherMetrics()
+        self._executor: ProcessPoolExecutor | None = None
+        self._queue_depth = 0
+
+    async def _run(self, function, *args):
+        if self._queue_depth >= self.max_queue_size:
+            self.metrics.rejected += 1
+            raise PasswordHasherBusyError(max_queue_size=self.max_queue_size)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._queue_depth += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, self.rounds, *args)
+        finally:
+            self._queue_depth -= 1
+            self.metrics.record_hash(time.perf_counter() - start)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with the current cost factor.
+
+        :param password: The password to hash.
+        :return: The hashed password.
+        """
+        hashed_password = await self._run(hash_password, password)
+        self.metrics.hashes += 1
+        return hashed_password
+
+    async def verify(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verify a password against its hash.
+
+        :param password: The password to verify.
+        :param hashed_password: The stored hash of the password.
+        :return: Whether the password is correct, and the new hash to store when the stored one was made with another
+            cost factor (or was not hashed), None otherwise.
+        """
+        is_valid, new_hashed_password = await self._run(verify_and_update_password, password, hashed_password)
+        self.metrics.verifications += 1
+        if new_hashed_password is not None:
+            self.metrics.rehashes += 1
+        return is_valid, new_hashed_password
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def status(self) -> PasswordHasherStatus:
+        hash_calls = self.metrics.hashes + self.metrics.verifications
+        return PasswordHasherStatus(
+            **self.metrics.model_dump(),
+            rounds=self.rounds,
+            workers=self.workers,
+            queue_depth=self._queue_depth,
+            max_queue_size=self.max_queue_size,
+            hash_time_avg=self.metrics.hash_time_total / hash_calls if hash_calls else 0.0,
+        )
+
+
+_password_hasher: PasswordHasher | None = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """
+    Return the process-wide password hasher, creating it from the settings on first use.
+
+    :return: The password hasher.
+    """
+    global _password_hasher
+    if _password_hasher is None:
+        settings = Settings()
+        _password_hasher = PasswordHasher(
+            rounds=settings.password_hasher_rounds,
+            workers=settings.password_hasher_workers,
+            max_queue_size=settings.password_hasher_max_queue_size,
+        )
+    return _password_hasher
@@ -1,55 +1,111 @@
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from sqlmodel import Session, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.base import ExecutableOption
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ibg.api.controllers.shared import create_random_public_id
+from ibg.api.controllers.shared import create_random_public_id, paginate
 from ibg.api.models.error import (
     RoomNotFoundError,
+    RoomPublicIdUnavailableError,
     UserAlreadyInRoomError,
     UserNotFoundError,
     UserNotInRoomError,
     WrongRoomPasswordError,
 )
 from ibg.api.models.event import EventCreate
+from ibg.api.models.pagination import STREAM_BATCH_SIZE
 from ibg.api.models.relationship import RoomActivityLink, RoomUserLink
 from ibg.api.models.room import RoomCreate, RoomJoin, RoomLeave, RoomType
-from ibg.api.models.table import Activity, Room, User
+from ibg.api.models.table import ACTIVE_ROOM, Activity, Room, User
+
+# A public id is drawn again when it is already taken by an active room. With 62^5 public ids, ten draws in a row
+# landing on active rooms would take hundreds of millions of them
+PUBLIC_ID_ATTEMPTS = 10
+# The inserts of the dialects that can skip a row conflicting with a unique index (ON CONFLICT DO NOTHING)
+ROOM_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
 
 
 class RoomController:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
     async def create_room(self, room_create: RoomCreate) -> Room:
-        is_user_in_room = self.session.exec(
-            select(RoomUserLink)
-            .where(RoomUserLink.user_id == room_create.owner_id)
-            .where(RoomUserLink.connected == True)  # noqa: E712
-        ).first()
-        if is_user_in_room:
-            raise UserAlreadyInRoomError(user_id=room_create.owner_id, room_id=is_user_in_room.room_id)
-        active_rooms = await self._get_all_active_rooms()
-        room_public_id = create_random_public_id()
-        while any(room.public_id == room_public_id for room in active_rooms):
-            room_public_id = create_random_public_id()
-        new_room = Room(**room_create.model_dump(), public_id=room_public_id)
-        self.session.add(new_room)
-        self.session.commit()
-        self.session.refresh(new_room)
-        room_user_link = RoomUserLink(room_id=new_room.id, user_id=new_room.owner_id)
-        self.session.add(room_user_link)
-        self.session.commit()
+        connected_link = await self._get_connected_link(room_create.owner_id)
+        if connected_link:
+            raise UserAlreadyInRoomError(user_id=room_create.owner_id, room_id=connected_link.room_id)
+        new_room = await self._insert_room(room_create)
+        await self._add_connected_link(RoomUserLink(room_id=new_room.id, user_id=new_room.owner_id))
+        await self.session.refresh(new_room, ["users", "games"])
         return new_room
 
-    async def check_if_user_is_in_room(self, user_id: UUID, room_id: UUID) -> bool:
-        try:
-            self.session.exec(
+    async def _get_connected_link(self, user_id: UUID) -> RoomUserLink | None:
+        """
+        Get the link of a user to the room they are connected to, if any. A user is connected to one room at a time.
+        :param user_id: The id of the user.
+        :return: The link of the user to their room, or None.
+        """
+        return (
+            await self.session.exec(
                 select(RoomUserLink)
-                .where(RoomUserLink.room_id == room_id)
                 .where(RoomUserLink.user_id == user_id)
                 .where(RoomUserLink.connected == True)  # noqa: E712
+            )
+        ).first()
+
+    async def _add_connected_link(self, room_user_link: RoomUserLink) -> None:
+        """
+        Connect a user to a room and commit. If the user was connected to another room since it was checked, the
+        unique index of the connected users refuses the link and a UserAlreadyInRoomError is raised.
+        :param room_user_link: The link of the user to the room.
+        :return: None
+        """
+        self.session.add(room_user_link)
+        try:
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            connected_link = await self._get_connected_link(room_user_link.user_id)
+            raise UserAlreadyInRoomError(
+                user_id=room_user_link.user_id,
+                room_id=connected_link.room_id if connected_link else room_user_link.room_id,
+            )
+
+    async def _insert_room(self, room_create: RoomCreate) -> Room:
+        """
+        Insert a room with a random public id. The public ids of the active rooms are unique in the database, so the
+        insert of a public id already taken does nothing and another public id is drawn, instead of reading the public
+        ids of every active room first. Two workers can't give the same public id to two active rooms.
+        :param room_create: The room to create.
+        :return: The inserted room.
+        """
+        insert = ROOM_INSERTS[self.session.bind.dialect.name]
+        for _ in range(PUBLIC_ID_ATTEMPTS):
+            room = Room(**room_create.model_dump(), public_id=create_random_public_id())
+            statement = (
+                insert(Room)
+                .values(**room.model_dump())
+                .on_conflict_do_nothing(index_elements=[Room.public_id], index_where=ACTIVE_ROOM)
+                .returning(Room)
+            )
+            new_room = (await self.session.exec(statement)).scalar_one_or_none()
+            if new_room is not None:
+                return new_room
+        raise RoomPublicIdUnavailableError(attempts=PUBLIC_ID_ATTEMPTS)
+
+    async def check_if_user_is_in_room(self, user_id: UUID, room_id: UUID) -> bool:
+        try:
+            (
+                await self.session.exec(
+                    select(RoomUserLink)
+                    .where(RoomUserLink.room_id == room_id)
+                    .where(RoomUserLink.user_id == user_id)
+                    .where(RoomUserLink.connected == True)  # noqa: E712
+                )
             ).one()
             return True
         except NoResultFound:
@@ -57,30 +113,49 @@ class RoomController:
 
     async def get_active_room_by_public_id(self, public_id: str) -> Room:
         try:
-            return self.session.exec(
-                select(Room).where(Room.public_id == public_id).where(Room.type == RoomType.ACTIVE)
-            ).one()
+            return (await self.session.exec(select(Room).where(Room.public_id == public_id).where(ACTIVE_ROOM))).one()
         except NoResultFound:
             raise RoomNotFoundError(room_id=public_id)
 
-    async def _get_all_active_rooms(self) -> Sequence[Room]:
-        return self.session.exec(select(Room).where(Room.type == RoomType.ACTIVE)).all()
+    async def get_rooms(
+        self, limit: int | None = None, after: UUID | None = None, loaders: Sequence[ExecutableOption] = ()
+    ) -> Sequence[Room]:
+        """
+        Get the rooms sorted by id, one page at a time. If no rooms exist, return an empty list.
+        :param limit: The maximum number of rooms to return. If None, return every room after the cursor.
+        :param after: The id of the last room of the previous page.
+        :param loaders: The loader options of the relationships the caller will read, e.g. ROOM_VIEW_LOADERS.
+        :return: A page of rooms.
+        """
+        statement = select(Room).options(*loaders)
+        return (await self.session.exec(paginate(statement, Room.id, limit, after))).all()
 
-    async def get_rooms(self) -> Sequence[Room]:
+    async def stream_rooms(
+        self, after: UUID | None = None, loaders: Sequence[ExecutableOption] = ()
+    ) -> AsyncIterator[Room]:
         """
-        Get all rooms. If no rooms exist, return an empty list.
-        :return: A list of all rooms.
+        Yield every room after the cursor, sorted by id. The rooms are fetched in batches from a server-side cursor
+        and the relationships of each batch are loaded with it.
+        :param after: The id of the last room already read.
+        :param loaders: The loader options of the relationships the caller will read, e.g. ROOM_VIEW_LOADERS.
+        :return: An iterator over the rooms.
         """
-        return self.session.exec(select(Room)).all()
+        statement = select(Room).options(*loaders)
+        result = await self.session.stream_scalars(
+            paginate(statement, Room.id, after=after), execution_options={"yield_per": STREAM_BATCH_SIZE}
+        )
+        async for room in result:
+            yield room
 
-    async def get_room_by_id(self, room_id: UUID) -> Room:
+    async def get_room_by_id(self, room_id: UUID, loaders: Sequence[ExecutableOption] = ()) -> Room:
         """
         Get a room by its id. If the room does not exist, raise a NoResultFound exception.
         :param room_id: The id of the room to get.
+        :param loaders: The loader options of the relationships the caller will read, e.g. ROOM_VIEW_LOADERS.
         :return: The room.
         """
         try:
-            return self.session.exec(select(Room).where(Room.id == room_id)).one()
+            return (await self.session.exec(select(Room).where(Room.id == room_id).options(*loaders))).one()
         except NoResultFound:
             raise RoomNotFoundError(room_id=room_id)
 
@@ -91,41 +166,55 @@ class RoomController:
         :return: None
         """
         try:
-            db_room = self.session.exec(select(Room).where(Room.id == room_id)).one()
-            self.session.delete(db_room)
-            self.session.commit()
+            db_room = (await self.session.exec(select(Room).where(Room.id == room_id))).one()
+            await self.session.delete(db_room)
+            await self.session.commit()
         except NoResultFound:
             raise RoomNotFoundError(room_id=room_id)
 
     async def join_room(self, room_join: RoomJoin) -> Room:
         """
         Add a user to a room. If the room does not exist, raise a NoResultFound exception. If the password is incorrect, raise a WrongRoomPasswordError.
+        If the user is already connected to a room, raise a UserAlreadyInRoomError.
         :param room_join: The room and user to join.
         :return: The updated room.
         """
+        db_user, db_room = await self.check_room_join(room_join)
+        return await self.add_user_to_room(db_room, db_user)
+
+    async def check_room_join(self, room_join: RoomJoin) -> tuple[User, Room]:
+        """
+        Check that a user can join a room, without writing anything. If the user or the room does not exist, raise a
+        UserNotFoundError or a RoomNotFoundError. If the password is incorrect, raise a WrongRoomPasswordError.
+        If the user is already connected to a room, raise a UserAlreadyInRoomError.
+        :param room_join: The room and user to join.
+        :return: The user and the room.
+        """
         try:
-            db_user = self.session.exec(select(User).where(User.id == room_join.user_id)).one()
+            db_user = (await self.session.exec(select(User).where(User.id == room_join.user_id))).one()
         except NoResultFound:
             raise UserNotFoundError(user_id=room_join.user_id)
         try:
-            db_room = self.session.exec(select(Room).where(Room.id == room_join.room_id)).one()
+            db_room = (await self.session.exec(select(Room).where(Room.id == room_join.room_id))).one()
         except NoResultFound:
             raise RoomNotFoundError(room_id=room_join.room_id)
         if db_room.password != room_join.password:
             raise WrongRoomPasswordError(room_id=db_room.id)
-        existing_link = self.session.exec(
-            select(RoomUserLink).where(
-                RoomUserLink.room_id == db_room.id,
-                RoomUserLink.user_id == db_user.id,
-                RoomUserLink.connected == True,  # noqa: E712
-            )
-        ).first()
-        if existing_link:
-            raise UserAlreadyInRoomError(user_id=room_join.user_id, room_id=room_join.room_id)
-        user_room_link = RoomUserLink(room_id=db_room.id, user_id=db_user.id)
-        self.session.add(user_room_link)
-        self.session.commit()
-        self.session.refresh(db_room)
+        connected_link = await self._get_connected_link(db_user.id)
+        if connected_link:
+            raise UserAlreadyInRoomError(user_id=room_join.user_id, room_id=connected_link.room_id)
+        return db_user, db_room
+
+    async def add_user_to_room(self, db_room: Room, db_user: User) -> Room:
+        """
+        Connect a user checked by `check_room_join` to a room. If the user was connected to another room since, raise
+        a UserAlreadyInRoomError.
+        :param db_room: The room to join.
+        :param db_user: The user joining the room.
+        :return: The updated room.
+        """
+        await self._add_connected_link(RoomUserLink(room_id=db_room.id, user_id=db_user.id))
+        await self.session.refresh(db_room, ["users", "games"])
         return db_room
 
     async def leave_room(self, room_leave: RoomLeave) -> Room:
@@ -138,12 +227,16 @@ class RoomController:
         :return: The updated room.
         """
         try:
-            db_room = self.session.exec(select(Room).where(Room.id == room_leave.room_id)).one()
+            db_room = (
+                await self.session.exec(
+                    select(Room).where(Room.id == room_leave.room_id).options(selectinload(Room.users))
+                )
+            ).one()
         except NoResultFound:
             raise RoomNotFoundError(room_id=room_leave.room_id)
 
         try:
-            db_user = self.session.exec(select(User).where(User.id == room_leave.user_id)).one()
+            db_user = (await self.session.exec(select(User).where(User.id == room_leave.user_id))).one()
         except NoResultFound:
             raise UserNotFoundError(user_id=room_leave.user_id)
 
@@ -154,10 +247,12 @@ class RoomController:
             self.session.add(db_room)
 
         try:
-            user_room_link = self.session.exec(
-                select(RoomUserLink)
-                .where(RoomUserLink.room_id == room_leave.room_id)
-                .where(RoomUserLink.user_id == db_user.id)
+            user_room_link = (
+                await self.session.exec(
+                    select(RoomUserLink)
+                    .where(RoomUserLink.room_id == room_leave.room_id)
+                    .where(RoomUserLink.user_id == db_user.id)
+                )
             ).one()
         except NoResultFound:
             raise UserNotInRoomError(user_id=db_user.id, room_id=room_leave.room_id)  # type: ignore
@@ -166,8 +261,8 @@ class RoomController:
         else:
             raise UserNotInRoomError(user_id=db_user.id, room_id=room_leave.room_id)  # type: ignore
         self.session.add(user_room_link)
-        self.session.commit()
-        self.session.refresh(db_room)
+        await self.session.commit()
+        await self.session.refresh(db_room, ["users", "games"])
         return db_room
 
     async def create_room_activity(self, room_id: UUID, activity_create: EventCreate) -> Activity:
@@ -179,7 +274,7 @@ class RoomController:
         :return: Activity
         """
         try:
-            db_room = self.session.exec(select(Room).where(Room.id == room_id)).one()
+            db_room = (await self.session.exec(select(Room).where(Room.id == room_id))).one()
             activity = Activity(
                 room_id=db_room.id,
                 user_id=activity_create.user_id,
@@ -187,11 +282,12 @@ class RoomController:
                 data=activity_create.data,
             )
             self.session.add(activity)
-            self.session.commit()
-            self.session.refresh(activity)
+            await self.session.commit()
+            await self.session.refresh(activity)
             room_activity_link = RoomActivityLink(activity_id=activity.id, room_id=db_room.id)
             self.session.add(room_activity_link)
-            self.session.commit()
+            await self.session.commit()
+            await self.session.refresh(activity, ["room"])
             return activity
         except NoResultFound:
             raise RoomNotFoundError(room_id=room_id)
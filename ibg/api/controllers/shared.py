@@ -1,30 +1,12 @@
+import bisect
 import secrets
 import string
+from typing import Sequence, TypeVar
+from uuid import UUID
 
-from passlib.context import CryptContext
+from sqlmodel.sql.expression import SelectOfScalar
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Verify a password against a hashed password. Return True if the password is correct, False otherwise.
-
-    :param plain_password: The plain password to verify.
-    :param hashed_password: The hashed password to verify against.
-    :return: True if the password is correct, False otherwise.
-    """
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """
-    Get the hash of a password.
-
-    :param password: The password to hash.
-    :return: The hashed password.
-    """
-    return pwd_context.hash(password)
+T = TypeVar("T")
 
 
 def create_random_string() -> str:
@@ -45,10 +27,35 @@ def create_random_public_id() -> str:
     return "".join(secrets.choice(string.ascii_letters + string.digits) for _ in range(5))
 
 
-def generate_password() -> str:
+def paginate(
+    statement: SelectOfScalar[T], column, limit: int | None = None, after: UUID | None = None
+) -> SelectOfScalar[T]:
+    """
+    Order a select statement by a unique column and seek past the cursor, so that the database reads one page
+    through the index instead of skipping over every previous row.
+
+    :param statement: The select statement to paginate.
+    :param column: The unique column to order and seek by, usually the primary key.
+    :param limit: The maximum number of rows to return. If None, return every row after the cursor.
+    :param after: The value of the column of the last row of the previous page. If None, start from the first row.
+    :return: The paginated select statement.
+    """
+    statement = statement.order_by(column)
+    if after is not None:
+        statement = statement.where(column > after)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def paginate_rows(rows: Sequence[T], limit: int | None = None, after: UUID | None = None) -> Sequence[T]:
     """
-    It generates a random hashed password.
+    Same as `paginate` for rows already in memory and sorted by id.
 
-    :return: A hashed string of 16 characters, including letters, numbers, and punctuation.
+    :param rows: The rows to paginate, sorted by id.
+    :param limit: The maximum number of rows to return. If None, return every row after the cursor.
+    :param after: The id of the last row of the previous page. If None, start from the first row.
+    :return: The page of rows.
     """
-    return get_password_hash(create_random_string())
+    start = bisect.bisect_right(rows, after, key=lambda row: row.id) if after is not None else 0
+    return rows[start : start + limit] if limit is not None else rows[start:]
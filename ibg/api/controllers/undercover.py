@@ -1,10 +1,14 @@
 import random
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from sqlmodel import Session, select
+from sqlalchemy.orm import aliased
+from sqlmodel import desc, func, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from ibg.api.controllers.shared import paginate_rows
+from ibg.api.controllers.word_bank import WordBank, word_bank
 from ibg.api.models.error import (
     TermPairAlreadyExistsError,
     TermPairNotFoundError,
@@ -12,25 +16,47 @@ from ibg.api.models.error import (
     WordNotFoundErrorId,
     WordNotFoundErrorName,
 )
+from ibg.api.models.table import Game
 from ibg.api.models.undercover import TermPair, Word, WordCreate, WordUpdate
 
 
 class UndercoverController:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession, word_bank: WordBank = word_bank):
         self.session = session
+        self.word_bank = word_bank
 
     async def create_word(self, word_create: WordCreate):
         try:
             new_word = Word(**word_create.model_dump())
             self.session.add(new_word)
-            self.session.commit()
-            self.session.refresh(new_word)
+            await self.session.commit()
+            await self.session.refresh(new_word)
+            await self.word_bank.invalidate()
             return new_word
         except IntegrityError:
             raise WordAlreadyExistsError(word=word_create.word)
 
-    async def get_words(self) -> Sequence[Word]:
-        return self.session.exec(select(Word)).all()
+    async def get_words(self, limit: int | None = None, after: UUID | None = None) -> Sequence[Word]:
+        """
+        Get the words sorted by id, one page at a time.
+
+        :param limit: The maximum number of words to return. If None, return every word after the cursor.
+        :param after: The id of the last word of the previous page.
+        :return: A page of words.
+        """
+        await self.word_bank.ensure_loaded(self.session)
+        return paginate_rows(self.word_bank.words, limit, after)
+
+    async def stream_words(self, after: UUID | None = None) -> AsyncIterator[Word]:
+        """
+        Yield every word after the cursor, sorted by id. The words are served from the word bank, so this never
+        copies the vocabulary.
+
+        :param after: The id of the last word already read.
+        :return: An iterator over the words.
+        """
+        for word in await self.get_words(after=after):
+            yield word
 
     async def get_word_by_id(self, word_id: UUID) -> Word:
         """
@@ -41,66 +67,151 @@ class UndercoverController:
         :return: The word.
         :rtype: Word
         """
-        try:
-            return self.session.exec(select(Word).where(Word.id == word_id)).one()
-        except NoResultFound:
+        await self.word_bank.ensure_loaded(self.session)
+        if word_id not in self.word_bank.words_by_id:
             raise WordNotFoundErrorId(word_id=word_id)
+        return self.word_bank.words_by_id[word_id]
 
     async def get_word_by_word(self, word: str) -> Word:
-        try:
-            return self.session.exec(select(Word).where(Word.word == word)).one()
-        except NoResultFound:
+        await self.word_bank.ensure_loaded(self.session)
+        if word not in self.word_bank.words_by_word:
             raise WordNotFoundErrorName(word=word)
+        return self.word_bank.words_by_word[word]
 
     async def delete_word(self, word_id: UUID) -> None:
-        db_word = self.session.exec(select(Word).where(Word.id == word_id)).one()
-        self.session.delete(db_word)
-        self.session.commit()
+        db_word = (await self.session.exec(select(Word).where(Word.id == word_id))).one()
+        await self.session.delete(db_word)
+        await self.session.commit()
+        await self.word_bank.invalidate()
 
     async def update_word(self, word_id: UUID, word_update: WordUpdate) -> Word:
         try:
-            db_word = self.session.exec(select(Word).where(Word.id == word_id)).one()
+            db_word = (await self.session.exec(select(Word).where(Word.id == word_id))).one()
         except NoResultFound:
             raise WordNotFoundErrorId(word_id=word_id)
         db_word_data = word_update.model_dump(exclude_unset=True)
         db_word.sqlmodel_update(db_word_data)
         self.session.add(db_word)
-        self.session.commit()
-        self.session.refresh(db_word)
+        await self.session.commit()
+        await self.session.refresh(db_word)
+        await self.word_bank.invalidate()
         return db_word
 
     async def get_words_by_category(self, category: str) -> Sequence[Word]:
-        return self.session.exec(select(Word).where(Word.category == category)).all()
+        await self.word_bank.ensure_loaded(self.session)
+        return self.word_bank.get_words_by_category(category)
 
     async def create_term_pair(self, word1_id: UUID, word2_id: UUID) -> TermPair:
         try:
             new_term_pair = TermPair(word1_id=word1_id, word2_id=word2_id)
             self.session.add(new_term_pair)
-            self.session.commit()
-            self.session.refresh(new_term_pair)
+            await self.session.commit()
+            await self.session.refresh(new_term_pair)
+            await self.word_bank.invalidate()
             return new_term_pair
         except IntegrityError:
             raise TermPairAlreadyExistsError(term1=str(word1_id), term2=str(word2_id))
 
-    async def get_term_pairs(self) -> Sequence[TermPair]:
-        return self.session.exec(select(TermPair)).all()
+    async def get_term_pairs(self, limit: int | None = None, after: UUID | None = None) -> Sequence[TermPair]:
+        """
+        Get the term pairs sorted by id, one page at a time.
+
+        :param limit: The maximum number of term pairs to return. If None, return every term pair after the cursor.
+        :param after: The id of the last term pair of the previous page.
+        :return: A page of term pairs.
+        """
+        await self.word_bank.ensure_loaded(self.session)
+        return paginate_rows(self.word_bank.term_pairs, limit, after)
+
+    async def stream_term_pairs(self, after: UUID | None = None) -> AsyncIterator[TermPair]:
+        """
+        Yield every term pair after the cursor, sorted by id, straight from the word bank.
+
+        :param after: The id of the last term pair already read.
+        :return: An iterator over the term pairs.
+        """
+        for term_pair in await self.get_term_pairs(after=after):
+            yield term_pair
 
     async def get_term_pair_by_id(self, term_pair_id: UUID) -> TermPair:
-        try:
-            return self.session.exec(select(TermPair).where(TermPair.id == term_pair_id)).one()
-        except NoResultFound:
+        await self.word_bank.ensure_loaded(self.session)
+        if term_pair_id not in self.word_bank.term_pairs_by_id:
             raise TermPairNotFoundError(term_pair_id=term_pair_id)
+        return self.word_bank.term_pairs_by_id[term_pair_id]
 
-    async def get_random_term_pair(self) -> TermPair:
-        try:
-            return random.choice(self.session.exec(select(TermPair)).all())
-        except IndexError:
+    async def get_random_term_pair(self, category: str | None = None) -> TermPair:
+        term_pair, _, _ = await self.get_random_term_pair_with_words(category=category)
+        return term_pair
+
+    async def get_random_term_pair_with_words(
+        self, category: str | None = None, excluded_term_pair_ids: Sequence[UUID] = ()
+    ) -> tuple[TermPair, Word, Word]:
+        """
+        Get a random term pair together with its two words.
+        When the word bank is warm we pick from memory. Otherwise we don't reload the whole bank on the game start
+        path: we count the matching pairs and read the one at a random offset, so every pair has the same chance.
+        If no term pair matches, raise a NoResultFound exception.
+
+        :param category: Only pick pairs where one of the words belongs to this category.
+        :param excluded_term_pair_ids: The ids of the term pairs that must not be picked, e.g. the ones a room just played.
+        :return: The term pair, its first word and its second word.
+        """
+        if self.word_bank.loaded:
+            self.word_bank.metrics.hits += 1
+            term_pair = self.word_bank.random_term_pair(category, excluded_term_pair_ids)
+            return (
+                term_pair,
+                self.word_bank.words_by_id[term_pair.word1_id],
+                self.word_bank.words_by_id[term_pair.word2_id],
+            )
+        self.word_bank.metrics.misses += 1
+        word1 = aliased(Word)
+        word2 = aliased(Word)
+        query = (
+            select(TermPair, word1, word2)
+            .join(word1, TermPair.word1_id == word1.id)  # type: ignore
+            .join(word2, TermPair.word2_id == word2.id)  # type: ignore
+        )
+        if category:
+            query = query.where(or_(word1.category == category, word2.category == category))
+        if excluded_term_pair_ids:
+            query = query.where(TermPair.id.not_in(excluded_term_pair_ids))  # type: ignore
+        count = (await self.session.exec(select(func.count()).select_from(query.subquery()))).one()
+        if not count:
             raise NoResultFound
+        row = (await self.session.exec(query.order_by(TermPair.id).offset(random.randrange(count)).limit(1))).first()
+        if row is None:
+            # A pair was deleted between the two queries
+            raise NoResultFound
+        return row
+
+    async def get_recent_term_pair_ids(self, room_id: UUID, number_of_games: int) -> list[UUID]:
+        """
+        Get the ids of the term pairs played in the latest games of a room.
+
+        :param room_id: The id of the room.
+        :param number_of_games: How many of the latest games to look at.
+        :return: The ids of the term pairs, most recent first.
+        """
+        game_configurations = (
+            await self.session.exec(
+                select(Game.game_configurations)
+                .where(Game.room_id == room_id)
+                .order_by(desc(Game.start_time))
+                .limit(number_of_games)
+            )
+        ).all()
+        return [
+            UUID(configuration["term_pair_id"])
+            for configuration in game_configurations
+            if configuration and configuration.get("term_pair_id")
+        ]
 
     async def delete_term_pair(self, term_pair_id: UUID) -> None:
         try:
-            db_term_pair = self.session.exec(select(TermPair).where(TermPair.id == term_pair_id)).one()
-            self.session.delete(db_term_pair)
-            self.session.commit()
+            db_term_pair = (await self.session.exec(select(TermPair).where(TermPair.id == term_pair_id))).one()
+            await self.session.delete(db_term_pair)
+            await self.session.commit()
+            await self.word_bank.invalidate()
         except NoResultFound:
             raise TermPairNotFoundError(term_pair_id=term_pair_id)
@@ -1,17 +1,22 @@
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from ibg.api.controllers.password_hasher import PasswordHasher, get_password_hasher
+from ibg.api.controllers.shared import paginate
 from ibg.api.models.error import UserAlreadyExistsError, UserNotFoundError
+from ibg.api.models.pagination import STREAM_BATCH_SIZE
 from ibg.api.models.table import User
 from ibg.api.models.user import UserCreate, UserUpdate
 
 
 class UserController:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession, password_hasher: PasswordHasher | None = None):
         self.session = session
+        self.password_hasher = password_hasher or get_password_hasher()
 
     async def create_user(self, user_create: UserCreate) -> User:
         """
@@ -20,21 +25,38 @@ class UserController:
         :param user_create: The body of the user we have to create.
         :return: The created user.
         """
+        # Hash before the try, so a PasswordHasherBusyError isn't mistaken for an IntegrityError
+        hashed_password = await self.password_hasher.hash(user_create.password)
         try:
-            new_user = User(**user_create.model_dump())
+            new_user = User(**user_create.model_dump(exclude={"password"}), password=hashed_password)
             self.session.add(new_user)
-            self.session.commit()
-            self.session.refresh(new_user)
+            await self.session.commit()
+            await self.session.refresh(new_user)
             return new_user
         except IntegrityError:
             raise UserAlreadyExistsError(email_address=user_create.email_address)
 
-    async def get_users(self) -> Sequence[User]:
+    async def get_users(self, limit: int | None = None, after: UUID | None = None) -> Sequence[User]:
         """
-        Get all users from the database.
-        :return: A list of all users in the database.
+        Get the users from the database sorted by id, one page at a time.
+        :param limit: The maximum number of users to return. If None, return every user after the cursor.
+        :param after: The id of the last user of the previous page.
+        :return: A page of users.
         """
-        return self.session.exec(select(User)).all()
+        return (await self.session.exec(paginate(select(User), User.id, limit, after))).all()
+
+    async def stream_users(self, after: UUID | None = None) -> AsyncIterator[User]:
+        """
+        Yield every user after the cursor, sorted by id. The rows are fetched in batches from a server-side cursor,
+        so the whole table is never held in memory.
+        :param after: The id of the last user already read.
+        :return: An iterator over the users.
+        """
+        result = await self.session.stream_scalars(
+            paginate(select(User), User.id, after=after), execution_options={"yield_per": STREAM_BATCH_SIZE}
+        )
+        async for user in result:
+            yield user
 
     async def get_user_by_id(self, user_id: UUID) -> User:
         """
@@ -43,7 +65,7 @@ class UserController:
         :return: The user with the given id.
         """
         try:
-            return self.session.exec(select(User).where(User.id == user_id)).one()
+            return (await self.session.exec(select(User).where(User.id == user_id))).one()
         except NoResultFound:
             raise UserNotFoundError(user_id=user_id)
 
@@ -55,12 +77,12 @@ class UserController:
         :return: The updated user.
         """
         try:
-            db_user = self.session.exec(select(User).where(User.id == user_id)).one()
+            db_user = (await self.session.exec(select(User).where(User.id == user_id))).one()
             db_user_data = user_update.model_dump(exclude_unset=True)
             db_user.sqlmodel_update(db_user_data)
             self.session.add(db_user)
-            self.session.commit()
-            self.session.refresh(db_user)
+            await self.session.commit()
+            await self.session.refresh(db_user)
             return db_user
         except NoResultFound:
             raise UserNotFoundError(user_id=user_id)
@@ -72,9 +94,9 @@ class UserController:
         :return: None
         """
         try:
-            db_user = self.session.exec(select(User).where(User.id == user_id)).one()
-            self.session.delete(db_user)
-            self.session.commit()
+            db_user = (await self.session.exec(select(User).where(User.id == user_id))).one()
+            await self.session.delete(db_user)
+            await self.session.commit()
         except NoResultFound:
             raise UserNotFoundError(user_id=user_id)
 
@@ -86,11 +108,28 @@ class UserController:
         :return: The updated user.
         """
         try:
-            db_user = self.session.exec(select(User).where(User.id == user_id)).one()
-            db_user.password = password
+            db_user = (await self.session.exec(select(User).where(User.id == user_id))).one()
+            db_user.password = await self.password_hasher.hash(password)
             self.session.add(db_user)
-            self.session.commit()
-            self.session.refresh(db_user)
+            await self.session.commit()
+            await self.session.refresh(db_user)
             return db_user
         except NoResultFound:
             raise UserNotFoundError(user_id=user_id)
+
+    async def verify_password(self, user_id: UUID, password: str) -> bool:
+        """
+        Verify the password of a user. If the user does not exist it raises a UserNotFoundError.
+        A correct password whose hash was made with another cost factor, or that was stored before the passwords were
+        hashed, is hashed again with the current cost factor and saved.
+        :param user_id: The id of the user.
+        :param password: The password to verify.
+        :return: True if the password is correct, False otherwise.
+        """
+        db_user = await self.get_user_by_id(user_id)
+        is_valid, new_hashed_password = await self.password_hasher.verify(password, db_user.password)
+        if new_hashed_password is not None:
+            db_user.password = new_hashed_password
+            self.session.add(db_user)
+            await self.session.commit()
+        return is_valid
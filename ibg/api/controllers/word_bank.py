@@ -0,0 +1,187 @@
+import asyncio
+import random
+from collections import defaultdict
+from typing import Sequence
+from uuid import UUID, uuid4
+
+from loguru import logger
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import NoResultFound
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ibg.api.models.undercover import TermPair, Word
+
+WORD_BANK_CHANNEL = "ibg:word_bank:invalidate"
+RANDOM_PICK_ATTEMPTS = 10
+
+
+class WordBankMetrics(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    invalidations: int = 0
+    words: int = 0
+    term_pairs: int = 0
+
+
+class WordBank:
+    """
+    Process-local copy of the undercover vocabulary, sorted by id and indexed by id, by word and by category.
+    Words and term pairs are almost never written, so we serve every read from memory and reload the whole bank
+    lazily after a write. Writes are broadcast over Redis so that the other workers drop their copy too.
+    """
+
+    def __init__(self):
+        self.instance_id = str(uuid4())
+        self.metrics = WordBankMetrics()
+        self.words: list[Word] = []
+        self.words_by_id: dict[UUID, Word] = {}
+        self.words_by_word: dict[str, Word] = {}
+        self.words_by_category: dict[str, list[Word]] = {}
+        self.term_pairs_by_id: dict[UUID, TermPair] = {}
+        self.term_pairs: list[TermPair] = []
+        self.term_pairs_by_category: dict[str, list[TermPair]] = {}
+        self.loaded = False
+        self._version = 0
+        self._lock = asyncio.Lock()
+        self._redis: Redis | None = None
+        self._listener: asyncio.Task | None = None
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Load every word and term pair from the database. The cached objects are copies that are not attached to
+        the session, so nothing a request does with its own objects can leak into the cache.
+
+        :param session: The session to read the word bank with.
+        :return: None
+        """
+        version = self._version
+        words = [Word.model_validate(word) for word in (await session.exec(select(Word).order_by(Word.id))).all()]
+        term_pairs = [
+            TermPair.model_validate(term_pair)
+            for term_pair in (await session.exec(select(TermPair).order_by(TermPair.id))).all()
+        ]
+
+        words_by_category = defaultdict(list)
+        for word in words:
+            words_by_category[word.category].append(word)
+        words_by_id = {word.id: word for word in words}
+        term_pairs_by_category = defaultdict(list)
+        for term_pair in term_pairs:
+            categories = {words_by_id[term_pair.word1_id].category, words_by_id[term_pair.word2_id].category}
+            for category in categories:
+                term_pairs_by_category[category].append(term_pair)
+
+        self.words = words
+        self.words_by_id = words_by_id
+        self.words_by_word = {word.word: word for word in words}
+        self.words_by_category = dict(words_by_category)
+        self.term_pairs_by_id = {term_pair.id: term_pair for term_pair in term_pairs}
+        self.term_pairs = term_pairs
+        self.term_pairs_by_category = dict(term_pairs_by_category)
+        self.metrics.loads += 1
+        self.metrics.words = len(words)
+        self.metrics.term_pairs = len(term_pairs)
+        # A write that happened while we were reading invalidates what we just loaded
+        self.loaded = version == self._version
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """
+        Count a hit if the bank is warm, otherwise count a miss and load it.
+
+        :param session: The session to load the word bank with if it is cold.
+        :return: None
+        """
+        if self.loaded:
+            self.metrics.hits += 1
+            return
+        self.metrics.misses += 1
+        async with self._lock:
+            if not self.loaded:
+                await self.load(session)
+
+    def invalidate_local(self) -> None:
+        self._version += 1
+        self.loaded = False
+        self.metrics.invalidations += 1
+
+    async def invalidate(self) -> None:
+        """
+        Drop the local copy and tell the other workers to drop theirs.
+
+        :return: None
+        """
+        self.invalidate_local()
+        if self._redis is not None:
+            try:
+                await self._redis.publish(WORD_BANK_CHANNEL, self.instance_id)
+            except RedisError:
+                logger.exception("Couldn't broadcast the word bank invalidation")
+
+    def get_words_by_category(self, category: str) -> Sequence[Word]:
+        return self.words_by_category.get(category, [])
+
+    def random_term_pair(self, category: str | None = None, excluded_term_pair_ids: Sequence[UUID] = ()) -> TermPair:
+        """
+        Pick a random term pair from memory. If no term pair matches, raise a NoResultFound exception.
+
+        :param category: Only pick pairs where one of the words belongs to this category.
+        :param excluded_term_pair_ids: The ids of the term pairs that must not be picked.
+        :return: The term pair.
+        """
+        candidates = self.term_pairs_by_category.get(category, []) if category else self.term_pairs
+        excluded = set(excluded_term_pair_ids)
+        for _ in range(RANDOM_PICK_ATTEMPTS if candidates else 0):
+            term_pair = random.choice(candidates)
+            if term_pair.id not in excluded:
+                return term_pair
+        # Most candidates are excluded, fall back to filtering them
+        candidates = [term_pair for term_pair in candidates if term_pair.id not in excluded]
+        if not candidates:
+            raise NoResultFound
+        return random.choice(candidates)
+
+    async def listen(self, redis: Redis) -> None:
+        """
+        Start listening to the invalidations broadcast by the other workers.
+
+        :param redis: The Redis connection to publish and subscribe with.
+        :return: None
+        """
+        self._redis = redis
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        resubscribing = False
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(WORD_BANK_CHANNEL)
+                if resubscribing:
+                    # We may have missed invalidations while we were not subscribed
+                    self.invalidate_local()
+                async for message in pubsub.listen():
+                    if message["type"] == "message" and message["data"] != self.instance_id:
+                        self.invalidate_local()
+            except RedisError:
+                logger.exception("Lost the word bank invalidation channel, subscribing again")
+                resubscribing = True
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self._redis = None
+
+
+word_bank = WordBank()
@@ -214,6 +214,22 @@ class CantVoteForDeadPersonError(BaseError):
         super().__init__(name=self.name, message=self.message, status_code=self.status_code)
 
 
+class CantVoteTurnIsOverError(BaseError):
+    def __init__(
+        self,
+        user_id: UUID | str,
+        game_id: UUID | str,
+        status_code: int = 403,
+        name: str = "CantVoteTurnIsOverError",
+    ):
+        self.name = name
+        self.message = (
+            f"User with id {user_id} can't vote, the votes of the turn of game {game_id} were already counted"
+        )
+        self.status_code = status_code
+        super().__init__(name=self.name, message=self.message, status_code=self.status_code)
+
+
 class RoomAlreadyExistsError(BaseError):
     def __init__(
         self,
@@ -225,3 +241,29 @@ class RoomAlreadyExistsError(BaseError):
         self.message = f"Room with id {room_id} already exists"
         self.status_code = status_code
         super().__init__(name=self.name, message=self.message, status_code=self.status_code)
+
+
+class PasswordHasherBusyError(BaseError):
+    def __init__(
+        self,
+        max_queue_size: int,
+        status_code: int = 503,
+        name: str = "PasswordHasherBusyError",
+    ):
+        self.name = name
+        self.message = f"{max_queue_size} passwords are already being hashed, try again later"
+        self.status_code = status_code
+        super().__init__(name=self.name, message=self.message, status_code=self.status_code)
+
+
+class RoomPublicIdUnavailableError(BaseError):
+    def __init__(
+        self,
+        attempts: int,
+        status_code: int = 503,
+        name: str = "RoomPublicIdUnavailableError",
+    ):
+        self.name = name
+        self.message = f"No free room code was found in {attempts} attempts, try again later"
+        self.status_code = status_code
+        super().__init__(name=self.name, message=self.message, status_code=self.status_code)
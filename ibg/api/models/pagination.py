@@ -0,0 +1,14 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class Pagination(BaseModel):
+    limit: int = DEFAULT_PAGE_SIZE
+    after: UUID | None = None
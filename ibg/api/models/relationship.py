@@ -1,6 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
+from sqlalchemy import Index
 from sqlmodel import Field
 
 from ibg.api.models.shared import DBModel
@@ -14,6 +15,18 @@ class RoomUserLink(DBModel, table=True):
     connected: bool = True
 
 
+# The membership of a user in a room, read when a user joins, leaves or acts in a room
+Index("ix_roomuserlink_room_id_user_id_connected", RoomUserLink.room_id, RoomUserLink.user_id, RoomUserLink.connected)
+# A user is connected to one room at a time, this is also the index of the room a user is connected to
+Index(
+    "ix_roomuserlink_connected_user_id",
+    RoomUserLink.user_id,
+    unique=True,
+    postgresql_where=RoomUserLink.connected == True,  # noqa: E712
+    sqlite_where=RoomUserLink.connected == True,  # noqa: E712
+)
+
+
 class RoomGameLink(DBModel, table=True):
     room_id: UUID | None = Field(default=None, foreign_key="room.id", primary_key=True)
     game_id: UUID | None = Field(default=None, foreign_key="game.id", primary_key=True)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID, uuid4
 
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index, literal_column
 from sqlmodel import Field, Relationship
 
 from ibg.api.models.event import TurnBase
@@ -35,10 +35,18 @@ class Room(RoomBase, table=True):
     activities: list["Activity"] = Relationship(back_populates="room", link_model=RoomActivityLink)
 
 
+# Two active rooms can't share a public id, the public id of an inactive room can be given to a new room. The type is
+# written as a literal so that the databases can match the index to the queries and inserts filtering on ACTIVE_ROOM
+ACTIVE_ROOM = Room.type == literal_column(f"'{RoomType.ACTIVE.name}'")
+Index("ix_room_active_public_id", Room.public_id, unique=True, postgresql_where=ACTIVE_ROOM, sqlite_where=ACTIVE_ROOM)
+
+
 class Game(GameBase, table=True):
     id: UUID | None = Field(default_factory=uuid4, primary_key=True, unique=True)
     room_id: UUID | None = Field(foreign_key="room.id")
     user_id: UUID | None = Field(foreign_key="user.id")
+    # The turn events are appended to. Not a foreign key, turn already references game
+    current_turn_id: UUID | None = None
     room: Room = Relationship(back_populates="games", link_model=RoomGameLink)
     users: list["User"] = Relationship(back_populates="games", link_model=UserGameLink)
     turns: list["Turn"] = Relationship(back_populates="game", link_model=GameTurnLink)
@@ -76,3 +84,7 @@ class Turn(TurnBase, table=True):
     game_id: UUID | None = Field(foreign_key="game.id")
     game: Game = Relationship(back_populates="turns", link_model=GameTurnLink)
     events: list[Event] = Relationship(back_populates="turn", link_model=TurnEventLink)
+
+
+# The turns of a game, the latest first
+Index("ix_turn_game_id_start_time", Turn.game_id, Turn.start_time.desc())
@@ -1,6 +1,9 @@
 from datetime import datetime
 from uuid import UUID
 
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import Field
+
 from ibg.api.models.event import TurnBase
 from ibg.api.models.game import GameBase
 from ibg.api.models.room import RoomBase, RoomType
@@ -8,6 +11,13 @@ from ibg.api.models.table import Event, Game, Room, Turn, User
 from ibg.api.models.user import UserBase
 
 
+# Loader options to give to the controller queries whose rows are rendered with each view, so that the
+# relationships the view reads are fetched with the rows instead of once per row
+ROOM_VIEW_LOADERS = (selectinload(Room.users), selectinload(Room.games))
+GAME_VIEW_LOADERS = (joinedload(Game.room), selectinload(Game.users), selectinload(Game.turns))
+TURN_VIEW_LOADERS = (joinedload(Turn.game), selectinload(Turn.events))
+
+
 class TurnView(TurnBase):
     id: UUID
     game_id: UUID
@@ -18,7 +28,7 @@ class TurnView(TurnBase):
 class GameView(GameBase):
     id: UUID
     room_id: UUID
-    user_id: UUID
+    user_id: UUID | None
     room: Room
     users: list[User]
     turns: list[Turn]
@@ -26,6 +36,8 @@ class GameView(GameBase):
 
 class UserView(UserBase):
     id: UUID
+    # The address was validated when the user was written, email_validator is too slow to run on every row we read
+    email_address: str = Field(schema_extra={"json_schema_extra": {"format": "email"}})
 
     class Config:
         # Custom JSON encoders dictionary
@@ -1,11 +1,15 @@
+from typing import Callable
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ibg.api.controllers.game import GameController
 from ibg.api.models.game import GameCreate, GameUpdate
+from ibg.api.models.pagination import Pagination
 from ibg.api.models.table import Game
-from ibg.dependencies import get_game_controller
+from ibg.api.routers.shared import render_view, set_next_cursor, stream_ndjson, wants_ndjson
+from ibg.dependencies import get_game_controller, get_pagination, get_session_factory
 
 router = APIRouter(
     prefix="/games",
@@ -19,16 +23,26 @@ async def create_game(
     *,
     game_create: GameCreate,
     game_controller: GameController = Depends(get_game_controller),
-) -> Game:
-    return Game.model_validate(await game_controller.create_game(game_create))
+) -> Response:
+    return render_view(Game, await game_controller.create_game(game_create), status_code=201)
 
 
 @router.get("", response_model=list[Game])
 async def get_all_undercover_games(
     *,
+    request: Request,
+    pagination: Pagination = Depends(get_pagination),
     game_controller: GameController = Depends(get_game_controller),
-) -> list[Game]:
-    return [Game.model_validate(game) for game in await game_controller.get_games()]
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+) -> Response:
+    if wants_ndjson(request):
+        return stream_ndjson(
+            session_factory, lambda session: GameController(session).stream_games(pagination.after), Game
+        )
+    games = await game_controller.get_games(pagination.limit, pagination.after)
+    response = render_view(list[Game], games)
+    set_next_cursor(response, games, pagination)
+    return response
 
 
 @router.get("/{game_id}", response_model=Game)
@@ -36,8 +50,8 @@ async def get_undercover_game(
     *,
     game_id: UUID,
     game_controller: GameController = Depends(get_game_controller),
-) -> Game:
-    return Game.model_validate(await game_controller.get_game_by_id(game_id))
+) -> Response:
+    return render_view(Game, await game_controller.get_game_by_id(game_id))
 
 
 @router.patch("/{game_id}", response_model=Game)
@@ -46,8 +60,8 @@ async def update_undercover_game(
     game_id: UUID,
     game_update: GameUpdate,
     game_controller: GameController = Depends(get_game_controller),
-) -> Game:
-    return Game.model_validate(await game_controller.update_game(game_id, game_update))
+) -> Response:
+    return render_view(Game, await game_controller.update_game(game_id, game_update))
 
 
 @router.patch("/{game_id}/end", response_model=Game)
@@ -55,8 +69,8 @@ async def end_undercover_game(
     *,
     game_id: UUID,
     game_controller: GameController = Depends(get_game_controller),
-) -> Game:
-    return Game.model_validate(await game_controller.end_game(game_id))
+) -> Response:
+    return render_view(Game, await game_controller.end_game(game_id))
 
 
 @router.delete("/{game_id}", status_code=204)
@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends
+
+from ibg.api.controllers.event_writer import EventWriter, EventWriterStatus, get_event_writer
+from ibg.api.controllers.password_hasher import PasswordHasher, PasswordHasherStatus, get_password_hasher
+from ibg.api.controllers.word_bank import WordBank, WordBankMetrics
+from ibg.database import EngineRegistry, PoolStatus, RedisPoolStatus, RedisRegistry, get_redis_registry
+from ibg.dependencies import get_database_registry, get_word_bank
+from ibg.socketio.controllers.game_store import GameStore, GameStoreStatus, get_game_store
+from ibg.socketio.controllers.room_shards import RoomShards, RoomShardsStatus, get_room_shards
+from ibg.socketio.routers.shared import EventFanOut, FanOutStatus, get_event_fan_out
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/database", response_model=PoolStatus)
+async def get_database_metrics(
+    *,
+    engine_registry: EngineRegistry = Depends(get_database_registry),
+) -> PoolStatus:
+    return engine_registry.status()
+
+
+@router.get("/redis", response_model=RedisPoolStatus)
+async def get_redis_metrics(
+    *,
+    redis_registry: RedisRegistry = Depends(get_redis_registry),
+) -> RedisPoolStatus:
+    return redis_registry.status()
+
+
+@router.get("/word_bank", response_model=WordBankMetrics)
+async def get_word_bank_metrics(
+    *,
+    word_bank: WordBank = Depends(get_word_bank),
+) -> WordBankMetrics:
+    return word_bank.metrics
+
+
+@router.get("/event_writer", response_model=EventWriterStatus)
+async def get_event_writer_metrics(
+    *,
+    event_writer: EventWriter = Depends(get_event_writer),
+) -> EventWriterStatus:
+    return event_writer.status()
+
+
+@router.get("/password_hasher", response_model=PasswordHasherStatus)
+async def get_password_hasher_metrics(
+    *,
+    password_hasher: PasswordHasher = Depends(get_password_hasher),
+) -> PasswordHasherStatus:
+    return password_hasher.status()
+
+
+@router.get("/room_shards", response_model=RoomShardsStatus)
+async def get_room_shards_metrics(
+    *,
+    room_shards: RoomShards = Depends(get_room_shards),
+) -> RoomShardsStatus:
+    return room_shards.status()
+
+
+@router.get("/game_store", response_model=GameStoreStatus)
+async def get_game_store_metrics(
+    *,
+    game_store: GameStore = Depends(get_game_store),
+) -> GameStoreStatus:
+    return game_store.status()
+
+
+@router.get("/fan_out", response_model=FanOutStatus)
+async def get_fan_out_metrics(
+    *,
+    event_fan_out: EventFanOut = Depends(get_event_fan_out),
+) -> FanOutStatus:
+    return event_fan_out.status()
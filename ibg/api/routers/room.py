@@ -1,12 +1,16 @@
+from typing import Callable
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import HTTP_201_CREATED, HTTP_204_NO_CONTENT
 
 from ibg.api.controllers.room import RoomController
+from ibg.api.models.pagination import Pagination
 from ibg.api.models.room import RoomCreate, RoomJoin, RoomLeave
-from ibg.api.models.view import RoomView
-from ibg.dependencies import get_room_controller
+from ibg.api.models.view import ROOM_VIEW_LOADERS, RoomView
+from ibg.api.routers.shared import render_view, set_next_cursor, stream_ndjson, wants_ndjson
+from ibg.dependencies import get_pagination, get_room_controller, get_session_factory
 
 router = APIRouter(
     prefix="/rooms",
@@ -20,16 +24,28 @@ async def create_room(
     *,
     room_create: RoomCreate,
     room_controller: RoomController = Depends(get_room_controller),
-) -> RoomView:
-    return RoomView.model_validate(await room_controller.create_room(room_create))
+) -> Response:
+    return render_view(RoomView, await room_controller.create_room(room_create), status_code=HTTP_201_CREATED)
 
 
 @router.get("", response_model=list[RoomView])
 async def get_all_rooms(
     *,
+    request: Request,
+    pagination: Pagination = Depends(get_pagination),
     room_controller: RoomController = Depends(get_room_controller),
-) -> list[RoomView]:
-    return [RoomView.model_validate(room) for room in await room_controller.get_rooms()]
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+) -> Response:
+    if wants_ndjson(request):
+        return stream_ndjson(
+            session_factory,
+            lambda session: RoomController(session).stream_rooms(pagination.after, ROOM_VIEW_LOADERS),
+            RoomView,
+        )
+    rooms = await room_controller.get_rooms(pagination.limit, pagination.after, ROOM_VIEW_LOADERS)
+    response = render_view(list[RoomView], rooms)
+    set_next_cursor(response, rooms, pagination)
+    return response
 
 
 @router.get("/{room_id}", response_model=RoomView)
@@ -37,8 +53,8 @@ async def get_room(
     *,
     room_id: UUID,
     room_controller: RoomController = Depends(get_room_controller),
-) -> RoomView:
-    return RoomView.model_validate(await room_controller.get_room_by_id(room_id))
+) -> Response:
+    return render_view(RoomView, await room_controller.get_room_by_id(room_id, ROOM_VIEW_LOADERS))
 
 
 @router.patch("/join", response_model=RoomView)
@@ -46,8 +62,8 @@ async def join_room(
     *,
     room_join: RoomJoin,
     room_controller: RoomController = Depends(get_room_controller),
-) -> RoomView:
-    return RoomView.model_validate(await room_controller.join_room(room_join))
+) -> Response:
+    return render_view(RoomView, await room_controller.join_room(room_join))
 
 
 @router.patch("/leave", response_model=RoomView)
@@ -55,8 +71,8 @@ async def leave_room(
     *,
     room_leave: RoomLeave,
     room_controller: RoomController = Depends(get_room_controller),
-) -> RoomView:
-    return RoomView.model_validate(await room_controller.leave_room(room_leave))
+) -> Response:
+    return render_view(RoomView, await room_controller.leave_room(room_leave))
 
 
 @router.delete("/{room_id}", status_code=HTTP_204_NO_CONTENT)
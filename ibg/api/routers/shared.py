@@ -0,0 +1,81 @@
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Sequence
+
+from fastapi import Request, Response
+from pydantic import BaseModel, TypeAdapter
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.responses import StreamingResponse
+
+from ibg.api.models.pagination import NDJSON_MEDIA_TYPE, NEXT_CURSOR_HEADER, Pagination
+
+
+@lru_cache
+def get_view_adapter(view: Any) -> TypeAdapter:
+    """
+    Return the type adapter of a view, built once per view since building its validator and serializer is costly.
+
+    :param view: The type the rows are rendered with, e.g. RoomView or list[RoomView].
+    :return: The type adapter of the view.
+    """
+    return TypeAdapter(view)
+
+
+def render_view(view: Any, content: Any, status_code: int = 200) -> Response:
+    """
+    Validate the result of a controller into its view and serialize it to JSON in one pass.
+    Returning a Response skips the `response_model` of the route (kept for the OpenAPI schema), which would validate
+    and serialize the view a second time and encode it with the standard json module.
+
+    :param view: The type the content is rendered with, e.g. RoomView or list[RoomView].
+    :param content: The ORM rows or models to render.
+    :param status_code: The status code of the response.
+    :return: The JSON response.
+    """
+    adapter = get_view_adapter(view)
+    return Response(
+        adapter.dump_json(adapter.validate_python(content, from_attributes=True)),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def set_next_cursor(response: Response, rows: Sequence, pagination: Pagination) -> None:
+    """
+    Give the cursor of the next page in the `X-Next-Cursor` header. A page shorter than the limit is the last one.
+
+    :param response: The response of the route.
+    :param rows: The rows of the current page.
+    :param pagination: The pagination of the request.
+    :return: None
+    """
+    if len(rows) == pagination.limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(rows[-1].id)
+
+
+def stream_ndjson(
+    session_factory: Callable[[], AsyncSession],
+    rows: Callable[[AsyncSession], AsyncIterator],
+    view: type[BaseModel],
+) -> StreamingResponse:
+    """
+    Stream rows as newline-delimited JSON, one view per line.
+    The request session is closed before the response body is sent, so the rows are read with a session of their own.
+
+    :param session_factory: The factory of the session to read the rows with.
+    :param rows: Build the iterator over the rows from the session.
+    :param view: The model every row is serialized with.
+    :return: The streaming response.
+    """
+
+    adapter = get_view_adapter(view)
+
+    async def content() -> AsyncIterator[bytes]:
+        async with session_factory() as session:
+            async for row in rows(session):
+                yield adapter.dump_json(adapter.validate_python(row, from_attributes=True)) + b"\n"
+
+    return StreamingResponse(content(), media_type=NDJSON_MEDIA_TYPE)
@@ -1,11 +1,15 @@
-from typing import Sequence
+from typing import Callable, Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ibg.api.controllers.undercover import UndercoverController
+from ibg.api.controllers.word_bank import WordBank
+from ibg.api.models.pagination import Pagination
 from ibg.api.models.undercover import TermPair, TermPairCreate, Word, WordCreate
-from ibg.dependencies import get_undercover_controller
+from ibg.api.routers.shared import render_view, set_next_cursor, stream_ndjson, wants_ndjson
+from ibg.dependencies import get_pagination, get_session_factory, get_undercover_controller, get_word_bank
 
 router = APIRouter(
     prefix="/undercover",
@@ -19,16 +23,29 @@ async def create_word(
     *,
     word_create: WordCreate,
     undercover_controller: UndercoverController = Depends(get_undercover_controller),
-) -> Word:
-    return await undercover_controller.create_word(word_create)
+) -> Response:
+    return render_view(Word, await undercover_controller.create_word(word_create), status_code=201)
 
 
 @router.get("/words", response_model=Sequence[Word])
 async def get_all_words(
     *,
+    request: Request,
+    pagination: Pagination = Depends(get_pagination),
     undercover_controller: UndercoverController = Depends(get_undercover_controller),
-) -> Sequence[Word]:
-    return await undercover_controller.get_words()
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+    word_bank: WordBank = Depends(get_word_bank),
+) -> Response:
+    if wants_ndjson(request):
+        return stream_ndjson(
+            session_factory,
+            lambda session: UndercoverController(session, word_bank).stream_words(pagination.after),
+            Word,
+        )
+    words = await undercover_controller.get_words(pagination.limit, pagination.after)
+    response = render_view(list[Word], words)
+    set_next_cursor(response, words, pagination)
+    return response
 
 
 @router.get("/words/{word_id}", response_model=Word)
@@ -36,8 +53,8 @@ async def get_word_by_id(
     *,
     word_id: UUID,
     undercover_controller: UndercoverController = Depends(get_undercover_controller),
-) -> Word:
-    return await undercover_controller.get_word_by_id(word_id)
+) -> Response:
+    return render_view(Word, await undercover_controller.get_word_by_id(word_id))
 
 
 @router.get("/words/search/{word}", response_model=Word)
@@ -45,8 +62,8 @@ async def get_word_by_word(
     *,
     word: str,
     undercover_controller: UndercoverController = Depends(get_undercover_controller),
-) -> Word:
-    return await undercover_controller.get_word_by_word(word)
+) -> Response:
+    return render_view(Word, await undercover_controller.get_word_by_word(word))
 
 
 @router.delete("/words/{word_id}", response_model=None, status_code=204)
@@ -63,16 +80,33 @@ async def create_term_pair(
     *,
     term_pair_create: TermPairCreate,
     undercover_controller: UndercoverController = Depends(get_undercover_controller),
-) -> TermPair:
-    return await undercover_controller.create_term_pair(term_pair_create.word1_id, term_pair_create.word2_id)
+) -> Response:
+    return render_view(
+        TermPair,
+        await undercover_controller.create_term_pair(term_pair_create.word1_id, term_pair_create.word2_id),
+        status_code=201,
+    )
 
 
 @router.get("/termpair", response_model=Sequence[TermPair])
 async def get_all_term_pairs(
     *,
+    request: Request,
+    pagination: Pagination = Depends(get_pagination),
     undercover_controller: UndercoverController = Depends(get_undercover_controller),
-) -> Sequence[TermPair]:
-    return await undercover_controller.get_term_pairs()
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+    word_bank: WordBank = Depends(get_word_bank),
+) -> Response:
+    if wants_ndjson(request):
+        return stream_ndjson(
+            session_factory,
+            lambda session: UndercoverController(session, word_bank).stream_term_pairs(pagination.after),
+            TermPair,
+        )
+    term_pairs = await undercover_controller.get_term_pairs(pagination.limit, pagination.after)
+    response = render_view(list[TermPair], term_pairs)
+    set_next_cursor(response, term_pairs, pagination)
+    return response
 
 
 @router.get("/termpair/{term_pair_id}", response_model=TermPair)
@@ -80,16 +114,17 @@ async def get_term_pair_by_id(
     *,
     term_pair_id: UUID,
     undercover_controller: UndercoverController = Depends(get_undercover_controller),
-) -> TermPair:
-    return await undercover_controller.get_term_pair_by_id(term_pair_id)
+) -> Response:
+    return render_view(TermPair, await undercover_controller.get_term_pair_by_id(term_pair_id))
 
 
 @router.get("/termpair/search/random", response_model=TermPair)
 async def get_random_term_pair(
     *,
+    category: str | None = None,
     undercover_controller: UndercoverController = Depends(get_undercover_controller),
-) -> TermPair:
-    return await undercover_controller.get_random_term_pair()
+) -> Response:
+    return render_view(TermPair, await undercover_controller.get_random_term_pair(category=category))
 
 
 @router.delete("/termpair/{term_pair_id}", response_model=None, status_code=204)
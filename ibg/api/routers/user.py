@@ -1,12 +1,15 @@
-from typing import Sequence
+from typing import Callable, Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ibg.api.controllers.user import UserController
+from ibg.api.models.pagination import Pagination
 from ibg.api.models.user import UserCreate, UserUpdate, UserUpdatePassword
 from ibg.api.models.view import UserView
-from ibg.dependencies import get_user_controller
+from ibg.api.routers.shared import render_view, set_next_cursor, stream_ndjson, wants_ndjson
+from ibg.dependencies import get_pagination, get_session_factory, get_user_controller
 
 router = APIRouter(
     prefix="/users",
@@ -20,16 +23,26 @@ async def create_user(
     *,
     user: UserCreate,
     user_controller: UserController = Depends(get_user_controller),
-) -> UserView:
-    return UserView.model_validate(await user_controller.create_user(user))
+) -> Response:
+    return render_view(UserView, await user_controller.create_user(user), status_code=201)
 
 
 @router.get("", response_model=Sequence[UserView])
 async def get_all_users(
     *,
+    request: Request,
+    pagination: Pagination = Depends(get_pagination),
     user_controller: UserController = Depends(get_user_controller),
-) -> Sequence[UserView]:
-    return [UserView.model_validate(user) for user in await user_controller.get_users()]
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+) -> Response:
+    if wants_ndjson(request):
+        return stream_ndjson(
+            session_factory, lambda session: UserController(session).stream_users(pagination.after), UserView
+        )
+    users = await user_controller.get_users(pagination.limit, pagination.after)
+    response = render_view(list[UserView], users)
+    set_next_cursor(response, users, pagination)
+    return response
 
 
 @router.get("/{user_id}", response_model=UserView)
@@ -37,8 +50,8 @@ async def get_user_by_id(
     *,
     user_id: UUID,
     user_controller: UserController = Depends(get_user_controller),
-) -> UserView:
-    return UserView.model_validate(await user_controller.get_user_by_id(user_id))
+) -> Response:
+    return render_view(UserView, await user_controller.get_user_by_id(user_id))
 
 
 @router.patch("/{user_id}", response_model=UserView)
@@ -47,8 +60,8 @@ async def update_user(
     user_id: UUID,
     user: UserUpdate,
     user_controller: UserController = Depends(get_user_controller),
-) -> UserView:
-    return UserView.model_validate(await user_controller.update_user_by_id(user_id, user))
+) -> Response:
+    return render_view(UserView, await user_controller.update_user_by_id(user_id, user))
 
 
 @router.patch("/{user_id}/password", response_model=UserView)
@@ -57,8 +70,8 @@ async def update_user_password(
     user_id: UUID,
     user_update_password: UserUpdatePassword,
     user_controller: UserController = Depends(get_user_controller),
-) -> UserView:
-    return UserView.model_validate(await user_controller.update_user_password(user_id, user_update_password.password))
+) -> Response:
+    return render_view(UserView, await user_controller.update_user_password(user_id, user_update_password.password))
 
 
 @router.delete("/{user_id}", status_code=204)
@@ -7,10 +7,12 @@ from starlette.responses import JSONResponse
 
 from ibg.api.models.error import BaseError
 from ibg.api.routers.game import router as game_router
+from ibg.api.routers.metrics import router as metrics_router
 from ibg.api.routers.room import router as room_router
 from ibg.api.routers.undercover import router as undercover_router
 from ibg.api.routers.user import router as user_router
-from ibg.socketio.models.shared import IBGSocket
+from ibg.settings import Settings
+from ibg.socketio.models.shared import IBGSocket, create_client_manager
 from ibg.socketio.routers import room, undercover
 from ibg.socketio.routers.room import router as socket_router
 
@@ -20,7 +22,7 @@ def create_socket_io_app() -> socketio.ASGIApp:
     It creates a socket.io app and adds the events we created earlier
     :return: A socket.io app
     """
-    sio = IBGSocket()
+    sio = IBGSocket(client_manager=create_client_manager(Settings()))
     socketio_app = socketio.ASGIApp(sio)
     room.room_events(sio)
     undercover.undercover_events(sio)
@@ -47,6 +49,7 @@ def create_app(lifespan) -> FastAPI:
     app.include_router(room_router)
     app.include_router(game_router)
     app.include_router(undercover_router)
+    app.include_router(metrics_router)
     app.include_router(socket_router)
     # logfire.configure(
     #     send_to_logfire=True,
@@ -1,19 +1,111 @@
-import os
+import asyncio
+import time
+from typing import Any
 
-from aredis_om import get_redis_connection
-from sqlalchemy import Engine, create_engine
+from pydantic import BaseModel
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.commands.core import AsyncScript
+from redis.exceptions import ConnectionError
+from sqlalchemy import AsyncAdaptedQueuePool, make_url
 from sqlalchemy.event import listens_for
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import ConnectionPoolEntry
 from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ibg.settings import Settings
 
 
-def create_app_engine():
-    settings = Settings()
-    if "sqlite" in settings.database_url:
-        engine = create_engine(settings.database_url, connect_args={"check_same_thread": False}, echo=True)
+class PoolMetrics(BaseModel):
+    checkouts: int = 0
+    checkins: int = 0
+    connects: int = 0
+    invalidations: int = 0
+    waits: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
 
-        @listens_for(engine, "connect")
+    def record_wait(self, duration: float) -> None:
+        self.waits += 1
+        self.wait_time_total += duration
+        self.wait_time_max = max(self.wait_time_max, duration)
+
+
+class PoolStatus(PoolMetrics):
+    pool_size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    wait_time_avg: float
+
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Swap the driver of a database url for its asyncio counterpart (asyncpg for PostgreSQL, aiosqlite for SQLite).
+    Urls that already name an asyncio driver are returned unchanged.
+
+    :param database_url: The database url from the settings.
+    :return: The database url to give to the async engine.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() in ASYNC_DRIVERS and url.get_driver_name() not in ("asyncpg", "aiosqlite"):
+        url = url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+    return url.render_as_string(hide_password=False)
+
+
+def _metered_pool_class(metrics: PoolMetrics) -> type[AsyncAdaptedQueuePool]:
+    """
+    Build an AsyncAdaptedQueuePool subclass that records how long a checkout waited for a connection, when there was no
+    idle connection and no overflow left to open a new one. The metrics object is bound on the class so that it survives `Pool.recreate()` on dispose.
+
+    :param metrics: The metrics object to record waits into.
+    :return: A QueuePool subclass.
+    """
+
+    class MeteredQueuePool(AsyncAdaptedQueuePool):
+        _metrics = metrics
+
+        def _do_get(self) -> ConnectionPoolEntry:
+            if self.checkedin() or self._max_overflow == -1 or self._overflow < self._max_overflow:
+                return super()._do_get()
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                self._metrics.record_wait(time.perf_counter() - start)
+
+    return MeteredQueuePool
+
+
+def create_app_engine(settings: Settings | None = None, metrics: PoolMetrics | None = None) -> AsyncEngine:
+    settings = settings or Settings()
+    metrics = metrics or PoolMetrics()
+    database_url = get_async_database_url(settings.database_url)
+    pool_options = {
+        "poolclass": _metered_pool_class(metrics),
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+    if "sqlite" in database_url:
+        engine = create_async_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            echo=settings.database_echo,
+            **pool_options,
+        )
+
+        @listens_for(engine.sync_engine, "connect")
         def set_sqlite_pragma(dbapi_connection, connection_record):
             cursor = dbapi_connection.cursor()
             cursor.execute("PRAGMA foreign_keys=ON")
@@ -22,15 +114,263 @@ def create_app_engine():
         # SQLAlchemyInstrumentor().instrument(engine=engine)
 
     else:
-        engine = create_engine(settings.database_url, echo=True)
+        engine = create_async_engine(database_url, echo=settings.database_echo, **pool_options)
+
+    @listens_for(engine.sync_engine, "connect")
+    def count_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @listens_for(engine.sync_engine, "checkout")
+    def count_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkouts += 1
+
+    @listens_for(engine.sync_engine, "checkin")
+    def count_checkin(dbapi_connection, connection_record):
+        metrics.checkins += 1
+
+    @listens_for(engine.sync_engine, "invalidate")
+    def count_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
     return engine
 
 
-def create_db_and_tables(engine: Engine):
-    SQLModel.metadata.create_all(engine)
+async def create_db_and_tables(engine: AsyncEngine):
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+
+
+class EngineRegistry:
+    """
+    Process-wide holder of the application engine and its connection pool.
+    Every HTTP request, socket event and script checks its sessions out of the same pool.
+    """
+
+    def __init__(self, settings: Settings | None = None):
+        self.settings = settings or Settings()
+        self.metrics = PoolMetrics()
+        self.engine = create_app_engine(self.settings, self.metrics)
+
+    def session(self) -> AsyncSession:
+        return AsyncSession(self.engine, expire_on_commit=False)
+
+    def status(self) -> PoolStatus:
+        pool = self.engine.pool
+        return PoolStatus(
+            **self.metrics.model_dump(),
+            pool_size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            wait_time_avg=self.metrics.wait_time_total / self.metrics.waits if self.metrics.waits else 0.0,
+        )
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+
+
+_engine_registry: EngineRegistry | None = None
+
+
+def get_engine_registry() -> EngineRegistry:
+    """
+    Return the process-wide engine registry, creating it on first use.
+
+    :return: The engine registry.
+    """
+    global _engine_registry
+    if _engine_registry is None:
+        _engine_registry = EngineRegistry()
+    return _engine_registry
+
+
+class RedisPoolMetrics(BaseModel):
+    checkouts: int = 0
+    checkins: int = 0
+    connects: int = 0
+    exhausted: int = 0
+    waits: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+
+    def record_wait(self, duration: float) -> None:
+        self.waits += 1
+        self.wait_time_total += duration
+        self.wait_time_max = max(self.wait_time_max, duration)
+
+
+class RedisPoolStatus(RedisPoolMetrics):
+    max_connections: int
+    in_use: int
+    idle: int
+    utilization: float
+    wait_time_avg: float
+
+
+class MeteredBlockingConnectionPool(BlockingConnectionPool):
+    """
+    A BlockingConnectionPool that records its checkouts, and how long a checkout waited for a free connection when all
+    the connections were in use.
+    When all the connections are in use for `timeout` seconds, the checkout fails and is counted as exhausted.
+    """
+
+    def __init__(self, metrics: RedisPoolMetrics | None = None, **kwargs):
+        self.metrics = metrics or RedisPoolMetrics()
+        super().__init__(**kwargs)
+
+    async def get_connection(self, *args, **kwargs):
+        waiting = not self.idle and self.in_use >= self.max_connections
+        start = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except ConnectionError as error:
+            if isinstance(error.__cause__, asyncio.TimeoutError):
+                self.metrics.exhausted += 1
+            raise
+        finally:
+            if waiting:
+                self.metrics.record_wait(time.perf_counter() - start)
+        self.metrics.checkouts += 1
+        return connection
+
+    async def release(self, connection) -> None:
+        self.metrics.checkins += 1
+        await super().release(connection)
+
+    def make_connection(self):
+        self.metrics.connects += 1
+        return super().make_connection()
+
+    @property
+    def in_use(self) -> int:
+        return len(self._in_use_connections)
+
+    @property
+    def idle(self) -> int:
+        return len(self._available_connections)
+
+
+def redis_connection_options(settings: Settings) -> dict[str, Any]:
+    """
+    Return the options of a connection to the `redis_om_url` Redis, shared by the connection pool of the app and the
+    Socket.IO client manager: the password, the TLS certificates of a `rediss://` url, the socket timeouts, and the
+    exponential backoff that retries the commands failing on a connection or timeout error.
+
+    :param settings: The settings of the app.
+    :return: The keyword arguments of `Redis.from_url`.
+    """
+    options = {
+        "socket_connect_timeout": settings.redis_socket_connect_timeout,
+        "socket_timeout": settings.redis_socket_timeout,
+        "health_check_interval": settings.redis_health_check_interval,
+        "retry": Retry(
+            ExponentialBackoff(cap=settings.redis_retry_backoff_cap, base=settings.redis_retry_backoff_base),
+            settings.redis_retries,
+        ),
+    }
+    if settings.redis_password is not None:
+        options["password"] = settings.redis_password
+    if settings.redis_om_url.startswith("rediss://"):
+        options["ssl_cert_reqs"] = settings.redis_ssl_cert_reqs
+        options["ssl_ca_certs"] = settings.redis_ssl_ca_certs
+    return options
+
+
+def create_redis_pool(
+    settings: Settings | None = None, metrics: RedisPoolMetrics | None = None
+) -> MeteredBlockingConnectionPool:
+    """
+    Create the Redis connection pool of the app from the settings.
+    The url gives the host, the port, the database and the credentials, `rediss://` connects with TLS. Commands
+    that fail on a connection or timeout error are retried with an exponential backoff.
+
+    :param settings: The settings of the app.
+    :param metrics: The metrics object to record the checkouts into.
+    :return: The connection pool, no connection is opened until the first command.
+    """
+    settings = settings or Settings()
+    return MeteredBlockingConnectionPool.from_url(
+        settings.redis_om_url,
+        metrics=metrics,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+        # Redis OM reads and writes strings
+        decode_responses=True,
+        encoding="utf-8",
+        **redis_connection_options(settings),
+    )
+
+
+class RedisRegistry:
+    """
+    Process-wide holder of the Redis client and its connection pool.
+    The Redis OM models, the scripts, the pub/sub listeners and the game store share the same pool.
+    """
+
+    def __init__(self, settings: Settings | None = None):
+        self.settings = settings or Settings()
+        self.metrics = RedisPoolMetrics()
+        self.pool = create_redis_pool(self.settings, self.metrics)
+        self.client = Redis(connection_pool=self.pool)
+        self._scripts: dict[str, AsyncScript] = {}
+
+    async def connect(self) -> None:
+        """
+        Check that Redis answers, so a wrong url or password fails the startup instead of the first event.
+
+        :return: None
+        """
+        await self.client.ping()
+
+    def status(self) -> RedisPoolStatus:
+        in_use = self.pool.in_use
+        return RedisPoolStatus(
+            **self.metrics.model_dump(),
+            max_connections=self.pool.max_connections,
+            in_use=in_use,
+            idle=self.pool.idle,
+            utilization=in_use / self.pool.max_connections,
+            wait_time_avg=self.metrics.wait_time_total / self.metrics.waits if self.metrics.waits else 0.0,
+        )
+
+    def script(self, source: str) -> AsyncScript:
+        """
+        Return a Lua script registered on the client, registering it on first use.
+
+        :param source: The source of the script.
+        :return: The script, called with its keys and args.
+        """
+        if source not in self._scripts:
+            self._scripts[source] = self.client.register_script(source)
+        return self._scripts[source]
+
+    async def dispose(self) -> None:
+        await self.pool.disconnect()
+
+
+_redis_registry: RedisRegistry | None = None
+
+
+def get_redis_registry() -> RedisRegistry:
+    """
+    Return the process-wide Redis registry, creating it on first use.
+
+    :return: The Redis registry.
+    """
+    global _redis_registry
+    if _redis_registry is None:
+        _redis_registry = RedisRegistry()
+    return _redis_registry
+
 
+async def close_redis_registry() -> None:
+    """
+    Close the connections of the process-wide Redis registry and forget it, the next `get_redis_registry()` creates a
+    new one. The connections are bound to the event loop that opened them, e.g. the one of the lifespan.
 
-def get_redis_om_connection():
-    redis_url = os.getenv("REDIS_OM_URL")
-    host, port = redis_url.split("//")[1].split(":")
-    return get_redis_connection(host=host, port=int(port), decode_responses=True, encoding="utf-8")
+    :return: None
+    """
+    global _redis_registry
+    if _redis_registry is not None:
+        await _redis_registry.dispose()
+        _redis_registry = None
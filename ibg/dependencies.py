@@ -1,32 +1,57 @@
-from fastapi import Depends
-from sqlmodel import Session
+from typing import Callable
+from uuid import UUID
+
+from fastapi import Depends, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ibg.api.controllers.game import GameController
 from ibg.api.controllers.room import RoomController
 from ibg.api.controllers.undercover import UndercoverController
 from ibg.api.controllers.user import UserController
-from ibg.database import create_app_engine
+from ibg.api.controllers.word_bank import WordBank, word_bank
+from ibg.api.models.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Pagination
+from ibg.database import EngineRegistry, get_engine_registry
 
 
-def get_session():
-    engine = create_app_engine()
-    with Session(engine) as session:
+async def get_session():
+    async with get_engine_registry().session() as session:
         yield session
 
 
-def get_user_controller(session: Session = Depends(get_session)) -> UserController:
+def get_session_factory() -> Callable[[], AsyncSession]:
+    # Streaming responses outlive the request dependencies, so they open their own session
+    return get_engine_registry().session
+
+
+def get_database_registry() -> EngineRegistry:
+    return get_engine_registry()
+
+
+def get_pagination(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: UUID | None = None,
+) -> Pagination:
+    return Pagination(limit=limit, after=after)
+
+
+def get_word_bank() -> WordBank:
+    return word_bank
+
+
+def get_user_controller(session: AsyncSession = Depends(get_session)) -> UserController:
     return UserController(session)
 
 
-def get_room_controller(session: Session = Depends(get_session)) -> RoomController:
+def get_room_controller(session: AsyncSession = Depends(get_session)) -> RoomController:
     return RoomController(session)
 
 
-def get_game_controller(session: Session = Depends(get_session)) -> GameController:
+def get_game_controller(session: AsyncSession = Depends(get_session)) -> GameController:
     return GameController(session)
 
 
 def get_undercover_controller(
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
+    word_bank: WordBank = Depends(get_word_bank),
 ) -> UndercoverController:
-    return UndercoverController(session)
+    return UndercoverController(session, word_bank)
@@ -6,3 +6,51 @@ class Settings(BaseSettings):
     database_url: str
     redis_om_url: str
     logfire_token: str
+
+    # Database connection pool
+    database_echo: bool = False
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
+    database_pool_timeout: float = 30.0
+    database_pool_recycle: int = 1800
+    database_pool_pre_ping: bool = True
+
+    # Redis connection pool, a `rediss://` url connects with TLS
+    redis_max_connections: int = 50
+    redis_pool_timeout: float = 20.0
+    redis_socket_connect_timeout: float | None = 5.0
+    # Also bounds the blocking reads of the pub/sub listeners, which are idle most of the time
+    redis_socket_timeout: float | None = None
+    redis_health_check_interval: int = 30
+    redis_retries: int = 3
+    redis_retry_backoff_base: float = 0.05
+    redis_retry_backoff_cap: float = 1.0
+    redis_password: str | None = None
+    redis_ssl_ca_certs: str | None = None
+    redis_ssl_cert_reqs: str = "required"
+
+    # Background writer of the room activities and turn events
+    event_writer_batch_size: int = 500
+    event_writer_flush_interval: float = 0.5
+    event_writer_max_queue_size: int = 10_000
+
+    # Passwords of the users, hashed with bcrypt in a pool of processes. The hashes of another cost factor are
+    # rehashed the next time their password is verified
+    password_hasher_rounds: int = 12
+    password_hasher_workers: int = 2
+    password_hasher_max_queue_size: int = 64
+
+    # Socket.IO: share rooms and emits between workers through the `redis_om_url` Redis
+    socketio_redis_manager: bool = False
+    socketio_redis_channel: str = "ibg:socketio"
+
+    # Socket.IO: shard the rooms between `socketio_worker_count` workers, `socketio_worker_id` is this worker
+    socketio_worker_id: int = 0
+    socketio_worker_count: int = 1
+    # Handle the events of a room here when its owner is unreachable, the room then has two writers for a while
+    socketio_local_fallback: bool = True
+
+    # Live undercover games, kept in memory and written to Redis at the end of each phase and every interval when every
+    # room has a single owner, read from and written to Redis at each change otherwise
+    game_store_snapshot_interval: float = 1.0
+    game_store_idle_timeout: float = 3600.0
@@ -0,0 +1,250 @@
+import asyncio
+import time
+from typing import Callable, TypeVar
+
+from aredis_om import NotFoundError
+from loguru import logger
+from pydantic import BaseModel
+from redis.exceptions import RedisError, WatchError
+
+from ibg.settings import Settings
+from ibg.socketio.controllers.room_shards import rooms_have_a_single_owner
+from ibg.socketio.models.socket import UndercoverGame
+
+T = TypeVar("T")
+
+
+class GameStoreMetrics(BaseModel):
+    hits: int = 0
+    recoveries: int = 0
+    snapshots: int = 0
+    snapshot_failures: int = 0
+    evictions: int = 0
+    conflicts: int = 0
+
+
+class GameStoreStatus(GameStoreMetrics):
+    single_owner: bool
+    running: bool
+    games: int
+    dirty: int
+
+
+class GameStore:
+    """
+    Live undercover games of this worker, keyed by id.
+    When the events of a room are handled by a single worker (`single_owner`: the only one, or the owner of the room
+    with RoomShards and no local fallback), its memory is the authoritative state of the game and a vote only changes
+    the game in memory. Redis keeps a snapshot of every game, written at the end of each phase (start of the game, new
+    turn, elimination) and every `snapshot_interval` seconds for the changes in between. A game missing from memory,
+    e.g. after a restart, is recovered from its last snapshot. Games unused for `idle_timeout` seconds are evicted.
+    Otherwise, another worker may change the game at the same time, so no copy is kept: every read gets the game from
+    Redis and every change is written to Redis at once.
+    The events that change a game across an await hold the lock of the game, so they apply one after the other.
+    The changes that must see every previous change of the game, like the votes, go through `update`.
+    """
+
+    def __init__(self, snapshot_interval: float = 1.0, idle_timeout: float = 3600.0, single_owner: bool = True):
+        self.snapshot_interval = snapshot_interval
+        self.idle_timeout = idle_timeout
+        self.single_owner = single_owner
+        self.metrics = GameStoreMetrics()
+        self._games: dict[str, UndercoverGame] = {}
+        self._last_used: dict[str, float] = {}
+        self._dirty: set[str] = set()
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def get(self, game_id: str) -> UndercoverGame:
+        """
+        Get a live game, recovering it from its Redis snapshot when it is not in memory. Without a single owner, the
+        game is always read from Redis. If the game does not exist, raise a NotFoundError.
+
+        :param game_id: The id of the game.
+        :return: The game.
+        """
+        if not self.single_owner:
+            game = await UndercoverGame.get(game_id)
+            self.metrics.recoveries += 1
+            return game
+        game = self._games.get(game_id)
+        if game is not None:
+            self.metrics.hits += 1
+        else:
+            try:
+                recovered_game = await UndercoverGame.get(game_id)
+            except NotFoundError:
+                # Don't keep the locks of the games that don't exist
+                self._locks.pop(game_id, None)
+                raise
+            # Another event of the game may have recovered it while we were waiting
+            game = self._games.setdefault(game_id, recovered_game)
+            self.metrics.recoveries += 1
+        self._last_used[game_id] = time.monotonic()
+        return game
+
+    def lock(self, game_id: str) -> asyncio.Lock:
+        """
+        Return the lock of a game, e.g. held by a vote from its recording to the elimination it may trigger.
+
+        :param game_id: The id of the game.
+        :return: The lock of the game.
+        """
+        return self._locks.setdefault(game_id, asyncio.Lock())
+
+    async def update(self, game_id: str, change: Callable[[UndercoverGame], T]) -> tuple[UndercoverGame, T]:
+        """
+        Apply a change to a game, one change of the game at a time. With a single owner, the change holds the lock of
+        the game and is written by the next periodic snapshot. Otherwise, the game is read from Redis and written back
+        in a transaction that fails when another worker wrote the game in between (WATCH), in which case the change is
+        applied again to the new game. If the game does not exist, raise a NotFoundError.
+
+        :param game_id: The id of the game.
+        :param change: Changes the game and returns a result. It may run several times, so it doesn't await anything.
+        :return: The changed game and the result of the change.
+        """
+        if self.single_owner:
+            async with self.lock(game_id):
+                game = await self.get(game_id)
+                result = change(game)
+                self._dirty.add(game.id)
+                return game, result
+        async with UndercoverGame.db().pipeline(transaction=True) as pipeline:
+            while True:
+                try:
+                    await pipeline.watch(UndercoverGame.make_primary_key(game_id))
+                    game = await self.get(game_id)
+                    result = change(game)
+                    pipeline.multi()
+                    await game.save(pipeline)
+                    await pipeline.execute()
+                    self.metrics.snapshots += 1
+                    return game, result
+                except WatchError:
+                    self.metrics.conflicts += 1
+
+    def add(self, game: UndercoverGame) -> None:
+        if not self.single_owner:
+            # The game is written by its first snapshot
+            return
+        self._games[game.id] = game
+        self._last_used[game.id] = time.monotonic()
+        self._dirty.add(game.id)
+
+    async def record_change(self, game: UndercoverGame) -> None:
+        """
+        Record that a game changed. It will be written to Redis by the next periodic snapshot, or now without a single
+        owner.
+
+        :param game: The game that changed.
+        :return: None
+        """
+        if not self.single_owner:
+            await self.snapshot(game)
+            return
+        self._dirty.add(game.id)
+
+    async def snapshot(self, game: UndercoverGame) -> None:
+        """
+        Write the changes of a game to Redis now, at the end of a phase. When Redis is unavailable, the game stays in
+        memory and the periodic snapshot tries again. Without a single owner there is no copy to try again with, so
+        the RedisError is raised.
+        The snapshots of a game hold its lock: the changes are computed from the document last written, so two
+        snapshots at once would both write the same changes, e.g. append the same turn twice.
+
+        :param game: The game to write.
+        :return: None
+        """
+        async with self.lock(game.id):
+            if not self.single_owner:
+                await game.save_changes()
+                self.metrics.snapshots += 1
+                return
+            self._dirty.discard(game.id)
+            try:
+                await game.save_changes()
+                self.metrics.snapshots += 1
+            except RedisError:
+                logger.exception(f"Couldn't write the snapshot of the game {game.id}")
+                self.metrics.snapshot_failures += 1
+                self._dirty.add(game.id)
+
+    def discard(self, game_id: str) -> None:
+        self._games.pop(game_id, None)
+        self._last_used.pop(game_id, None)
+        self._dirty.discard(game_id)
+        self._locks.pop(game_id, None)
+
+    async def flush(self) -> None:
+        """
+        Write the snapshots of the games changed since the last flush and evict the idle games.
+
+        :return: None
+        """
+        for game_id in list(self._dirty):
+            if game_id in self._games:
+                await self.snapshot(self._games[game_id])
+            else:
+                self._dirty.discard(game_id)
+        idle_since = time.monotonic() - self.idle_timeout
+        for game_id, last_used in list(self._last_used.items()):
+            if last_used < idle_since and game_id not in self._dirty and not self.lock(game_id).locked():
+                self.discard(game_id)
+                self.metrics.evictions += 1
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the periodic snapshots and write the games that changed since the last one.
+
+        :return: None
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            await self.flush()
+
+    def status(self) -> GameStoreStatus:
+        return GameStoreStatus(
+            **self.metrics.model_dump(),
+            single_owner=self.single_owner,
+            running=self.running,
+            games=len(self._games),
+            dirty=len(self._dirty),
+        )
+
+
+_game_store: GameStore | None = None
+
+
+def get_game_store() -> GameStore:
+    """
+    Return the game store of this worker, creating it from the settings on first use.
+
+    :return: The game store.
+    """
+    global _game_store
+    if _game_store is None:
+        settings = Settings()
+        _game_store = GameStore(
+            snapshot_interval=settings.game_store_snapshot_interval,
+            idle_timeout=settings.game_store_idle_timeout,
+            single_owner=rooms_have_a_single_owner(settings),
+        )
+    return _game_store
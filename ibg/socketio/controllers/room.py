@@ -1,5 +1,6 @@
-from aredis_om import NotFoundError
+import json
 
+from ibg.api.controllers.event_writer import EventWriter
 from ibg.api.controllers.game import GameController
 from ibg.api.controllers.room import RoomController
 from ibg.api.controllers.undercover import UndercoverController
@@ -8,10 +9,60 @@ from ibg.api.models.error import RoomNotFoundError, UserAlreadyInRoomError, User
 from ibg.api.models.event import EventCreate
 from ibg.api.models.room import RoomCreate, RoomJoin, RoomLeave
 from ibg.api.models.table import Room
+from ibg.database import get_redis_registry
 from ibg.socketio.models.room import JoinRoomUser, LeaveRoomUser
 from ibg.socketio.models.room import Room as RedisRoom
 from ibg.socketio.models.user import User
 
+# The statuses answered by the scripts
+ROOM_NOT_FOUND = 0
+ROOM_UPDATED = 1
+USER_ALREADY_IN_ROOM = USER_NOT_IN_ROOM = 2
+
+# KEYS: the room, the user. ARGV: the JSONPath of the user in the room, the user document. Answers the previous
+# document of the user, false when there was none.
+JOIN_ROOM_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {0}
+end
+if redis.call('JSON.GET', KEYS[1], ARGV[1]) ~= '[]' then
+    return {2}
+end
+local previous_user = redis.call('JSON.GET', KEYS[2], '.')
+redis.call('JSON.SET', KEYS[2], '$', ARGV[2])
+redis.call('JSON.ARRAPPEND', KEYS[1], '$.users', ARGV[2])
+return {1, previous_user}
+"""
+
+# KEYS: the room, the user. ARGV: the JSONPath of the user in the room, the previous document of the user or an empty
+# string. Undoes JOIN_ROOM_SCRIPT.
+CANCEL_JOIN_ROOM_SCRIPT = """
+redis.call('JSON.DEL', KEYS[1], ARGV[1])
+if ARGV[2] == '' then
+    redis.call('DEL', KEYS[2])
+else
+    redis.call('JSON.SET', KEYS[2], '$', ARGV[2])
+end
+return {1}
+"""
+
+# KEYS: the room, the user. ARGV: the JSONPath of the user in the room. Answers the room and the removed user.
+LEAVE_ROOM_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {0}
+end
+local user = redis.call('JSON.GET', KEYS[1], ARGV[1])
+if redis.call('JSON.DEL', KEYS[1], ARGV[1]) == 0 then
+    return {2}
+end
+redis.call('DEL', KEYS[2])
+return {1, redis.call('JSON.GET', KEYS[1], '$'), user}
+"""
+
+
+def user_path(user_id: str) -> str:
+    return f'$.users[?(@.id=="{user_id}")]'
+
 
 class SocketRoomController:
 
@@ -21,11 +72,13 @@ class SocketRoomController:
         game_controller: GameController,
         user_controller: UserController,
         undercover_controller: UndercoverController,
+        event_writer: EventWriter,
     ):
         self._room_controller = room_controller
         self._game_controller = game_controller
         self._user_controller = user_controller
         self._undercover_controller = undercover_controller
+        self._event_writer = event_writer
 
     async def user_join_room(self, sid: str, join_room_user: JoinRoomUser) -> Room:
         """
@@ -35,25 +88,30 @@ class SocketRoomController:
         :return: None
         """
         db_room = await self._room_controller.get_active_room_by_public_id(join_room_user.public_room_id)
-        try:
-            redis_room = await RedisRoom.find(RedisRoom.id == str(db_room.id)).first()
-        except NotFoundError:
-            raise RoomNotFoundError(room_id=join_room_user.public_room_id)
-        db_user = await self._user_controller.get_user_by_id(join_room_user.user_id)
-        db_room = await self._room_controller.join_room(
-            RoomJoin(
-                room_id=db_room.id,
-                user_id=join_room_user.user_id,
-                password=join_room_user.password,
-            )
+        # Check the password and the rooms of the user before anything is written to Redis
+        db_user, db_room = await self._room_controller.check_room_join(
+            RoomJoin(room_id=db_room.id, user_id=join_room_user.user_id, password=join_room_user.password)
         )
-        if any(user.id == str(db_user.id) for user in redis_room.users):
-            raise UserAlreadyInRoomError(user_id=join_room_user.user_id, room_id=join_room_user.public_room_id)
         user = User(id=str(db_user.id), username=db_user.username, sid=sid)
-        await user.save()
-        redis_room.users.append(user)
-        await redis_room.save()
-        await self._room_controller.create_room_activity(
+        room_key = RedisRoom.make_primary_key(str(db_room.id))
+        # Join the Redis room before the database commits the link, so a failure of the script writes nothing
+        status, *previous_user = await get_redis_registry().script(JOIN_ROOM_SCRIPT)(
+            keys=[room_key, user.key()], args=[user_path(user.id), user.model_dump_json()]
+        )
+        if status == ROOM_NOT_FOUND:
+            raise RoomNotFoundError(room_id=join_room_user.public_room_id)
+        if status == USER_ALREADY_IN_ROOM:
+            raise UserAlreadyInRoomError(user_id=join_room_user.user_id, room_id=join_room_user.public_room_id)
+        try:
+            db_room = await self._room_controller.add_user_to_room(db_room, db_user)
+        except Exception:
+            # The user joined another room since the check, take them out of the Redis room and put their previous
+            # document back
+            await get_redis_registry().script(CANCEL_JOIN_ROOM_SCRIPT)(
+                keys=[room_key, user.key()], args=[user_path(user.id), previous_user[0] or ""]
+            )
+            raise
+        await self._event_writer.write_room_activity(
             room_id=db_room.id,
             activity_create=EventCreate(
                 name="join_room",
@@ -75,24 +133,34 @@ class SocketRoomController:
         :param leave_room_user: The user to leave the room.
         :return: None
         """
-        try:
-            redis_room = await RedisRoom.find(RedisRoom.id == str(leave_room_user.room_id)).first()
-        except NotFoundError:
-            raise RoomNotFoundError(room_id=leave_room_user.room_id)
         db_user = await self._user_controller.get_user_by_id(leave_room_user.user_id)
-        if not any(user.id == str(db_user.id) for user in redis_room.users):
-            raise UserNotInRoomError(user_id=leave_room_user.user_id, room_id=leave_room_user.room_id)
-        db_room = await self._room_controller.leave_room(
-            RoomLeave(room_id=leave_room_user.room_id, user_id=leave_room_user.user_id)
-        )
         # Check that the user is not currently in a game within the room TODO - Implement this
         # if any(game['players'] == leave_room_user.user_id for game in rooms[leave_room_user.room_id]["games"]):
         #    raise UserInGameError(user_id=leave_room_user.user_id, room_id=leave_room_user.room_id)
-        redis_room.users.remove(User(id=str(db_user.id), username=db_user.username))
-        await redis_room.save()
-        redis_user = await User.find(User.id == str(db_user.id)).first()
-        await redis_user.delete()
-        await self._room_controller.create_room_activity(
+        room_key = RedisRoom.make_primary_key(str(leave_room_user.room_id))
+        user_key = User.make_primary_key(str(db_user.id))
+        # Leave the Redis room before the database commits the link, so a failure of the script writes nothing
+        status, *documents = await get_redis_registry().script(LEAVE_ROOM_SCRIPT)(
+            keys=[room_key, user_key], args=[user_path(str(db_user.id))]
+        )
+        if status == ROOM_NOT_FOUND:
+            raise RoomNotFoundError(room_id=leave_room_user.room_id)
+        if status == USER_NOT_IN_ROOM:
+            raise UserNotInRoomError(user_id=leave_room_user.user_id, room_id=leave_room_user.room_id)
+        # JSON.GET with a JSONPath answers the list of the matching values
+        [room_document], [user_document] = (json.loads(document) for document in documents)
+        try:
+            db_room = await self._room_controller.leave_room(
+                RoomLeave(room_id=leave_room_user.room_id, user_id=leave_room_user.user_id)
+            )
+        except Exception:
+            # The database kept the user in the room, put them back in the Redis room
+            await get_redis_registry().script(JOIN_ROOM_SCRIPT)(
+                keys=[room_key, user_key], args=[user_path(str(db_user.id)), json.dumps(user_document)]
+            )
+            raise
+        redis_room = RedisRoom(**room_document)
+        await self._event_writer.write_room_activity(
             room_id=leave_room_user.room_id,
             activity_create=EventCreate(
                 name="leave_room",
@@ -117,7 +185,9 @@ class SocketRoomController:
         db_user = await self._user_controller.get_user_by_id(room_create.owner_id)
         db_room = await self._room_controller.create_room(room_create)
         redis_user = User(id=str(db_user.id), username=db_user.username, sid=sid)
-        await redis_user.save()
         redis_room = RedisRoom(id=str(db_room.id), users=[redis_user])
-        await redis_room.save()
+        async with get_redis_registry().client.pipeline(transaction=True) as pipeline:
+            await redis_user.save(pipeline)
+            await redis_room.save(pipeline)
+            await pipeline.execute()
         return db_room
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import zlib
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+from loguru import logger
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ibg.api.models.table import Room
+from ibg.database import get_engine_registry
+from ibg.settings import Settings
+
+ROOM_SHARDS_CHANNEL = "ibg:socketio:worker:{worker_id}"
+PUBLIC_ID_CACHE_SIZE = 10_000
+
+SocketHandler = Callable[[str, Any], Awaitable[None]]
+
+
+def owner_of(public_id: str, worker_count: int) -> int:
+    """
+    Return the worker that owns a room. `hash()` is salted per process, so we use a checksum that every worker agrees
+    on.
+
+    :param public_id: The public id of the room.
+    :param worker_count: The number of workers.
+    :return: The id of the worker, between 0 and worker_count - 1.
+    """
+    return zlib.crc32(public_id.encode()) % worker_count
+
+
+def rooms_have_a_single_owner(settings: Settings) -> bool:
+    """
+    Whether the events of a room are always handled by the same worker: a single worker that doesn't share its rooms,
+    or the owner of the room when the rooms are sharded and the unrouted events aren't handled locally.
+
+    :param settings: The settings of the worker.
+    :return: True when the state of a room has a single writer.
+    """
+    if settings.socketio_worker_count > 1:
+        return not settings.socketio_local_fallback
+    return not settings.socketio_redis_manager
+
+
+class RoomShardsMetrics(BaseModel):
+    handled: int = 0
+    forwarded: int = 0
+    received: int = 0
+    unrouted: int = 0
+
+
+class RoomShardsStatus(RoomShardsMetrics):
+    worker_id: int
+    worker_count: int
+    listening: bool
+
+
+class RoomShards:
+    """
+    Shard the rooms between the workers by hashing their public id.
+    The socket events of a room are handled by the worker that owns it: the other workers forward them on the Redis
+    channel of the owner, so the state of a room only has one writer and can be kept in its memory.
+    The owner answers through the Socket.IO client manager, which needs `socketio_redis_manager` when the sockets are
+    connected to another worker.
+    With a single worker (the default), every event is handled where it is received.
+    When the owner is unreachable, the event is handled locally with `local_fallback`, and dropped otherwise.
+    """
+
+    def __init__(
+        self,
+        worker_id: int = 0,
+        worker_count: int = 1,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        local_fallback: bool = True,
+    ):
+        if not 0 <= worker_id < worker_count:
+            raise ValueError(f"The worker id must be between 0 and {worker_count - 1}, got {worker_id}")
+        self.worker_id = worker_id
+        self.worker_count = worker_count
+        self.local_fallback = local_fallback
+        self.metrics = RoomShardsMetrics()
+        self._session_factory = session_factory
+        self._handlers: dict[str, SocketHandler] = {}
+        self._public_ids: OrderedDict[str, str] = OrderedDict()
+        self._redis: Redis | None = None
+        self._listener: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.worker_count > 1
+
+    def owns(self, public_id: str) -> bool:
+        return owner_of(public_id, self.worker_count) == self.worker_id
+
+    def route(self, field: str) -> Callable[[SocketHandler], SocketHandler]:
+        """
+        Route a socket event to the worker that owns its room. Put it between `sio.event` and the handler.
+
+        :param field: The field of the event data holding the room, either its public id or its id.
+        :return: The decorator.
+        """
+
+        def decorator(handler: SocketHandler) -> SocketHandler:
+            self._handlers[handler.__name__] = handler
+
+            @wraps(handler)
+            async def wrapper(sid: str, data: Any) -> None:
+                public_id = await self._public_id_of(data, field) if self.enabled else None
+                if public_id is None or self.owns(public_id):
+                    # Invalid events are handled here, the handler answers with the validation error
+                    self.metrics.handled += 1
+                    return await handler(sid, data)
+                owner = owner_of(public_id, self.worker_count)
+                if await self._forward(owner, handler.__name__, sid, data):
+                    self.metrics.forwarded += 1
+                    return
+                self.metrics.unrouted += 1
+                if not self.local_fallback:
+                    logger.warning(f"Worker {owner} is unreachable, dropping {handler.__name__} of room {public_id}")
+                    return
+                logger.warning(f"Worker {owner} is unreachable, handling {handler.__name__} of room {public_id} here")
+                return await handler(sid, data)
+
+            return wrapper
+
+        return decorator
+
+    async def _public_id_of(self, data: Any, field: str) -> str | None:
+        value = data.get(field) if isinstance(data, dict) else None
+        if not isinstance(value, str):
+            return None
+        try:
+            room_id = UUID(value)
+        except ValueError:
+            return value
+        if value not in self._public_ids:
+            session_factory = self._session_factory or get_engine_registry().session
+            async with session_factory() as session:
+                public_id = (await session.exec(select(Room.public_id).where(Room.id == room_id))).first()
+            if public_id is None:
+                return None
+            self._public_ids[value] = public_id
+            if len(self._public_ids) > PUBLIC_ID_CACHE_SIZE:
+                self._public_ids.popitem(last=False)
+        self._public_ids.move_to_end(value)
+        return self._public_ids[value]
+
+    async def _forward(self, worker_id: int, event: str, sid: str, data: Any) -> bool:
+        if self._redis is None:
+            return False
+        message = json.dumps({"event": event, "sid": sid, "data": data})
+        try:
+            return await self._redis.publish(ROOM_SHARDS_CHANNEL.format(worker_id=worker_id), message) > 0
+        except RedisError:
+            logger.exception(f"Couldn't forward {event} to worker {worker_id}")
+            return False
+
+    async def listen(self, redis: Redis) -> None:
+        """
+        Start handling the events forwarded by the other workers. Does nothing with a single worker.
+
+        :param redis: The Redis connection to publish and subscribe with.
+        :return: None
+        """
+        if not self.enabled:
+            return
+        self._redis = redis
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(ROOM_SHARDS_CHANNEL.format(worker_id=self.worker_id))
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._dispatch(json.loads(message["data"]))
+            except RedisError:
+                logger.exception("Lost the room shards channel, subscribing again")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    def _dispatch(self, message: dict[str, Any]) -> None:
+        handler = self._handlers.get(message["event"])
+        if handler is None:
+            logger.warning(f"No handler for the forwarded event {message['event']}")
+            return
+        self.metrics.received += 1
+        # Like Socket.IO, handle the events concurrently
+        task = asyncio.create_task(handler(message["sid"], message["data"]))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._redis = None
+
+    def status(self) -> RoomShardsStatus:
+        return RoomShardsStatus(
+            **self.metrics.model_dump(),
+            worker_id=self.worker_id,
+            worker_count=self.worker_count,
+            listening=self._listener is not None and not self._listener.done(),
+        )
+
+
+_room_shards: RoomShards | None = None
+
+
+def get_room_shards() -> RoomShards:
+    """
+    Return the room shards of this worker, creating them from the settings on first use.
+
+    :return: The room shards.
+    """
+    global _room_shards
+    if _room_shards is None:
+        settings = Settings()
+        if settings.socketio_worker_count > 1 and not settings.socketio_redis_manager:
+            raise ValueError("Sharding the rooms between workers needs socketio_redis_manager")
+        _room_shards = RoomShards(
+            worker_id=settings.socketio_worker_id,
+            worker_count=settings.socketio_worker_count,
+            local_fallback=settings.socketio_local_fallback,
+        )
+    return _room_shards
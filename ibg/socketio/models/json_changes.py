@@ -0,0 +1,64 @@
+import json
+from enum import Enum
+from typing import Any, NamedTuple
+
+
+class JsonOperation(str, Enum):
+    SET = "set"
+    APPEND = "append"
+    DELETE = "delete"
+
+
+class JsonChange(NamedTuple):
+    operation: JsonOperation
+    path: str
+    values: tuple[Any, ...] = ()
+
+    @property
+    def size(self) -> int:
+        """
+        The number of bytes of the path and the values sent to Redis.
+        """
+        return len(self.path) + sum(len(json.dumps(value)) for value in self.values)
+
+
+def json_path(path: str, key: str | int) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    if key.isidentifier():
+        return f"{path}.{key}"
+    # Dictionary keys such as UUIDs need the bracket notation
+    return f"{path}['{key}']"
+
+
+def diff_json(old: Any, new: Any, path: str = "$") -> list[JsonChange]:
+    """
+    Compute the changes that turn the JSON document `old` into `new`.
+    Values appended to a list are an APPEND, keys removed from an object are DELETEs, and anything else that changed
+    is a SET of the smallest enclosing path. A list that shrank is SET as a whole.
+
+    :param old: The document stored in Redis.
+    :param new: The current document.
+    :param path: The JSONPath of the documents.
+    :return: The changes, in the order they have to be applied.
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = [JsonChange(JsonOperation.DELETE, json_path(path, key)) for key in old if key not in new]
+        for key, value in new.items():
+            if key in old:
+                changes.extend(diff_json(old[key], value, json_path(path, key)))
+            else:
+                changes.append(JsonChange(JsonOperation.SET, json_path(path, key), (value,)))
+        return changes
+    if isinstance(old, list) and isinstance(new, list) and len(new) >= len(old):
+        changes = [
+            change
+            for index, (old_value, new_value) in enumerate(zip(old, new))
+            for change in diff_json(old_value, new_value, json_path(path, index))
+        ]
+        if len(new) > len(old):
+            changes.append(JsonChange(JsonOperation.APPEND, path, tuple(new[len(old) :])))
+        return changes
+    return [JsonChange(JsonOperation.SET, path, (new,))]
@@ -0,0 +1,56 @@
+from typing import Type
+
+from loguru import logger
+from redis.exceptions import ResponseError
+
+from ibg.socketio.models.room import Room
+from ibg.socketio.models.shared import RedisJsonModel
+from ibg.socketio.models.socket import UndercoverGame
+from ibg.socketio.models.user import User
+
+
+class PrimaryKeyMigrator:
+    """
+    Move the documents saved with a generated primary key (a ULID) to the key of their id, which is the primary key
+    of the models since they are read with `get(id)` instead of a RediSearch query.
+    The migration runs with `Migrator().run()` when the app starts and can run on several workers at the same time:
+    a document is only copied when its new key doesn't exist yet, then its old key is deleted.
+    """
+
+    def __init__(self, models: tuple[Type[RedisJsonModel], ...] = (Room, UndercoverGame, User)):
+        self.models = models
+
+    async def run(self) -> int:
+        """
+        Migrate the documents of every model.
+
+        :return: The number of documents moved to the key of their id.
+        """
+        migrated = 0
+        for model in self.models:
+            migrated += await self._migrate(model)
+        if migrated:
+            logger.info(f"Moved {migrated} Redis documents to the key of their id")
+        return migrated
+
+    async def _migrate(self, model: Type[RedisJsonModel]) -> int:
+        db = model.db()
+        migrated = 0
+        async for key in db.scan_iter(match=model.make_primary_key("*")):
+            try:
+                document = await db.json().get(key)
+            except ResponseError:
+                # The index schema hashes of the Migrator share the prefix of the documents
+                continue
+            if not isinstance(document, dict) or not document.get("id"):
+                continue
+            new_key = model.make_primary_key(document["id"])
+            if key == new_key:
+                continue
+            document["pk"] = document["id"]
+            async with db.pipeline(transaction=True) as pipeline:
+                pipeline.json().set(new_key, "$", document, nx=True)
+                pipeline.delete(key)
+                await pipeline.execute()
+            migrated += 1
+        return migrated
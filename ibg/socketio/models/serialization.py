@@ -0,0 +1,108 @@
+import json
+from copy import deepcopy
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+from uuid import uuid4
+
+from pydantic import BaseModel
+from pydantic_core import SchemaSerializer, core_schema
+
+SOCKET_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def format_datetime(value: datetime) -> str:
+    return value.strftime(SOCKET_DATETIME_FORMAT)
+
+
+def _format_datetimes(schema: Any) -> None:
+    if isinstance(schema, dict):
+        if schema.get("type") == "datetime":
+            schema["serialization"] = core_schema.plain_serializer_function_ser_schema(
+                format_datetime, when_used="json"
+            )
+        for value in schema.values():
+            _format_datetimes(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            _format_datetimes(value)
+
+
+class RawJSON:
+    """
+    A value already encoded to JSON, embedded as is in the socket packets it is sent with.
+    """
+
+    __slots__ = ("json",)
+
+    def __init__(self, encoded: str | bytes):
+        self.json = encoded.decode() if isinstance(encoded, bytes) else encoded
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, RawJSON) and self.json == other.json
+
+    def __repr__(self) -> str:
+        return f"RawJSON({self.json!r})"
+
+
+class ModelSerializer:
+    """
+    Serialize the instances of a model to the JSON sent to the sockets, in a single pass of the pydantic-core
+    serializer: UUIDs and enums become strings, and datetimes use SOCKET_DATETIME_FORMAT.
+    The serializer is compiled once from the core schema of the model.
+    """
+
+    def __init__(self, model: type[BaseModel]):
+        schema = deepcopy(model.__pydantic_core_schema__)
+        _format_datetimes(schema)
+        self._serializer = SchemaSerializer(schema)
+
+    def to_python(self, instance: BaseModel) -> dict[str, Any]:
+        return self._serializer.to_python(instance, mode="json")
+
+    def to_json(self, instance: BaseModel) -> bytes:
+        return self._serializer.to_json(instance)
+
+    def to_raw_json(self, instance: BaseModel) -> RawJSON:
+        return RawJSON(self.to_json(instance))
+
+
+@lru_cache
+def get_model_serializer(model: type[BaseModel]) -> ModelSerializer:
+    """
+    Return the serializer of a model, compiled on first use.
+
+    :param model: The model to serialize.
+    :return: The serializer of the model.
+    """
+    return ModelSerializer(model)
+
+
+class SocketJSON:
+    """
+    The JSON module of the socket server and of its client manager. It encodes like the json module, except that the
+    RawJSON values of a payload are copied into the output instead of being encoded again, so a payload encoded once
+    can be sent in several events.
+    """
+
+    loads = staticmethod(json.loads)
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        fragments: list[str] = []
+        # Stands for the RawJSON values while the rest of the payload is encoded, drawn for each payload so that no
+        # string of the payload can match it
+        placeholder = ""
+
+        def default(value: Any) -> str:
+            nonlocal placeholder
+            if isinstance(value, RawJSON):
+                placeholder = placeholder or f"raw-json-{uuid4().hex}-"
+                fragments.append(value.json)
+                return f"{placeholder}{len(fragments) - 1}"
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+        encoded = json.dumps(obj, default=default, **kwargs)
+        for index, fragment in enumerate(fragments):
+            encoded = encoded.replace(f'"{placeholder}{index}"', fragment, 1)
+        return encoded
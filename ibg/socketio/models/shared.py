@@ -1,36 +1,194 @@
+import json
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator
+
 import socketio
 from aredis_om import JsonModel
-from sqlmodel import Session
+from pydantic import PrivateAttr
+from redis.exceptions import ResponseError
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from ibg.api.controllers.event_writer import EventWriter, get_event_writer
 from ibg.api.controllers.game import GameController
 from ibg.api.controllers.room import RoomController
 from ibg.api.controllers.undercover import UndercoverController
 from ibg.api.controllers.user import UserController
-from ibg.database import create_app_engine, get_redis_om_connection
+from ibg.database import get_engine_registry, get_redis_registry, redis_connection_options
+from ibg.settings import Settings
+from ibg.socketio.models.json_changes import JsonChange, JsonOperation, diff_json
+from ibg.socketio.models.serialization import SocketJSON
 
 
-class IBGSocket(socketio.AsyncServer):
-    def __init__(self):
+class SocketControllers:
+    """
+    The controllers used while handling one socket event, all bound to the session of that event.
+    """
+
+    def __init__(self, session: AsyncSession):
 
         from ibg.socketio.controllers.room import SocketRoomController  # Import here to avoid circular import
 
-        super().__init__(async_mode="asgi", cors_allowed_origins="*")
-        with Session(create_app_engine()) as session:
-            self.room_controller = RoomController(session)
-            self.game_controller = GameController(session)
-            self.user_controller = UserController(session)
-            self.undercover_controller = UndercoverController(session)
-            self.socket_room_controller = SocketRoomController(
-                self.room_controller,
-                self.game_controller,
-                self.user_controller,
-                self.undercover_controller,
-            )
+        self.session = session
+        self.room_controller = RoomController(session)
+        self.game_controller = GameController(session)
+        self.user_controller = UserController(session)
+        self.undercover_controller = UndercoverController(session)
+        self.event_writer = get_event_writer()
+        self.socket_room_controller = SocketRoomController(
+            self.room_controller,
+            self.game_controller,
+            self.user_controller,
+            self.undercover_controller,
+            self.event_writer,
+        )
+
+
+socket_controllers: ContextVar[SocketControllers] = ContextVar("socket_controllers")
+
+
+def create_client_manager(settings: Settings) -> socketio.AsyncManager | None:
+    """
+    Create the client manager of the socket server.
+    By default, the rooms and the sockets live in the memory of the worker, so an emit only reaches the sockets
+    connected to that worker. With `socketio_redis_manager`, every emit is also published on the `redis_om_url` Redis
+    and delivered by the workers that hold the sockets, so the app can run on several workers and nodes. It connects
+    with the same options as the connection pool of the app.
+
+    :param settings: The settings of the app.
+    :return: The Redis client manager, or None to keep the in-memory one.
+    """
+    if not settings.socketio_redis_manager:
+        return None
+    return socketio.AsyncRedisManager(
+        settings.redis_om_url,
+        channel=settings.socketio_redis_channel,
+        json=SocketJSON,
+        redis_options=redis_connection_options(settings),
+    )
+
+
+class IBGSocket(socketio.AsyncServer):
+    def __init__(self, client_manager: socketio.AsyncManager | None = None):
+        super().__init__(async_mode="asgi", cors_allowed_origins="*", client_manager=client_manager, json=SocketJSON)
+
+    async def emit(self, event, data=None, to=None, room=None, skip_sid=None, namespace=None, **kwargs):
+        """
+        Emit an event. An event sent to sockets that are all connected to this worker is delivered directly instead of
+        being published to the other workers by the client manager. `to` is a socket, a room or a list of them.
+        """
+        to = to or room
+        targets = [to] if isinstance(to, str) else to
+        if targets and all(self.manager.is_connected(target, namespace or "/") for target in targets):
+            kwargs["ignore_queue"] = True
+        await super().emit(event, data, to=to, skip_sid=skip_sid, namespace=namespace, **kwargs)
+
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncIterator[SocketControllers]:
+        """
+        Check a session out of the pool for the duration of one socket event and expose its controllers
+        through the `*_controller` attributes. The session is committed when the event succeeds, rolled back
+        when it fails, and returned to the pool in both cases.
 
+        :return: The controllers bound to the event session.
+        """
+        async with get_engine_registry().session() as session:
+            controllers = SocketControllers(session)
+            token = socket_controllers.set(controllers)
+            try:
+                yield controllers
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                socket_controllers.reset(token)
 
-redis_connection = get_redis_om_connection()
+    @property
+    def room_controller(self) -> RoomController:
+        return socket_controllers.get().room_controller
+
+    @property
+    def game_controller(self) -> GameController:
+        return socket_controllers.get().game_controller
+
+    @property
+    def user_controller(self) -> UserController:
+        return socket_controllers.get().user_controller
+
+    @property
+    def undercover_controller(self) -> UndercoverController:
+        return socket_controllers.get().undercover_controller
+
+    @property
+    def event_writer(self) -> EventWriter:
+        return socket_controllers.get().event_writer
+
+    @property
+    def socket_room_controller(self):
+        return socket_controllers.get().socket_room_controller
 
 
 class RedisJsonModel(JsonModel):
-    class Meta:
-        database = redis_connection
+    """
+    A JsonModel that remembers the document it last read from or wrote to Redis, so `save_changes` only writes the
+    paths that changed (JSON.SET, JSON.ARRAPPEND, JSON.DEL) instead of the whole document.
+    A model with an `id` field uses it as its primary key, so it is read with a direct `get(id)` (JSON.GET) instead of
+    a RediSearch query.
+    """
+
+    _document: dict[str, Any] | None = PrivateAttr(default=None)
+
+    @classmethod
+    def db(cls):
+        # Read the client from the registry when it's used, so the pool is created by the lifespan and not on import
+        return get_redis_registry().client
+
+    def model_post_init(self, __context: Any) -> None:
+        # The models read from Redis are built with their primary key, the new ones take their id as primary key
+        if "pk" in self.model_fields_set:
+            self._document = self.to_document()
+        elif "id" in self.model_fields:
+            self.pk = self.id
+
+    def to_document(self) -> dict[str, Any]:
+        return json.loads(self.model_dump_json())
+
+    async def save(self, pipeline=None):
+        result = await super().save(pipeline)
+        self._document = self.to_document()
+        return result
+
+    async def save_changes(self) -> list[JsonChange]:
+        """
+        Write the changes made since the model was read or saved. A model that was never saved is written in full,
+        as is a model whose document was deleted or changed in Redis in a way the changes can't be applied to.
+
+        :return: The changes written, empty when the whole document was written.
+        """
+        document = self.to_document()
+        if self._document is None:
+            await self.save()
+            return []
+        changes = diff_json(self._document, document)
+        if not changes:
+            return changes
+        key = self.key()
+        async with self.db().pipeline(transaction=True) as pipeline:
+            pipeline.exists(key)
+            for change in changes:
+                if change.operation == JsonOperation.SET:
+                    pipeline.json().set(key, change.path, *change.values)
+                elif change.operation == JsonOperation.APPEND:
+                    pipeline.json().arrappend(key, change.path, *change.values)
+                else:
+                    pipeline.json().delete(key, change.path)
+            exists, *results = await pipeline.execute(raise_on_error=False)
+        # JSON.SET and JSON.ARRAPPEND answer nil, or an error, when the path doesn't exist
+        if not exists or any(
+            result is None or isinstance(result, ResponseError) or result == [None] for result in results
+        ):
+            await self.save()
+            return []
+        self._document = document
+        return changes
@@ -1,9 +1,11 @@
-from typing import Any
+from collections import Counter, defaultdict
+from typing import Any, Iterable
 from uuid import UUID
 
 from aredis_om import Field as RedisField
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
+from ibg.api.models.undercover import UndercoverRole
 from ibg.socketio.models.shared import RedisJsonModel
 from ibg.socketio.models.user import UndercoverSocketPlayer
 
@@ -34,13 +36,136 @@ class UndercoverTurn(BaseModel):
     eliminated_player: UUID | None = None
 
 
+class VoteTally:
+    """
+    The number of votes against each player in a turn. The players are also grouped by number of votes, so the most
+    voted players are known without going through the tally, even when a player changes their vote.
+    """
+
+    def __init__(self, voted_ids: Iterable[UUID] = ()):
+        self.counts: dict[UUID, int] = {}
+        self.max_count = 0
+        self._players_by_count: defaultdict[int, set[UUID]] = defaultdict(set)
+        for voted_id in voted_ids:
+            self.add(voted_id)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, VoteTally) and self.counts == other.counts
+
+    def add(self, voted_id: UUID) -> None:
+        count = self.counts.get(voted_id, 0)
+        self._players_by_count[count].discard(voted_id)
+        self.counts[voted_id] = count + 1
+        self._players_by_count[count + 1].add(voted_id)
+        self.max_count = max(self.max_count, count + 1)
+
+    def remove(self, voted_id: UUID) -> None:
+        count = self.counts[voted_id]
+        self._players_by_count[count].discard(voted_id)
+        if count == 1:
+            del self.counts[voted_id]
+        else:
+            self.counts[voted_id] = count - 1
+            self._players_by_count[count - 1].add(voted_id)
+        # The player was alone with the most votes, they still have the most with one vote less
+        if count == self.max_count and not self._players_by_count[count]:
+            self.max_count -= 1
+
+    def most_voted(self) -> set[UUID]:
+        return self._players_by_count[self.max_count] if self.max_count else set()
+
+
 class UndercoverGame(Game):
+    """
+    An undercover game. Besides its document, the game keeps an index of its players by user id, the tally of the
+    votes of the current turn and the number of alive players of each role, so a vote and the end of turn checks
+    don't go through the players. They are rebuilt when the game is read from Redis and kept up to date by `vote`,
+    `eliminate` and `start_turn`, which are the only ways to change the players and the turns of a game.
+    """
+
     civilian_word: str
     undercover_word: str
     players: list[UndercoverSocketPlayer]
     eliminated_players: list[UndercoverSocketPlayer] = []
     turns: list[UndercoverTurn] = []
 
+    _players_by_id: dict[UUID, UndercoverSocketPlayer] = PrivateAttr(default_factory=dict)
+    _positions: dict[UUID, int] = PrivateAttr(default_factory=dict)
+    _mayor: UndercoverSocketPlayer | None = PrivateAttr(default=None)
+    _alive_counts: Counter[UndercoverRole] = PrivateAttr(default_factory=Counter)
+    _tally: VoteTally = PrivateAttr(default_factory=VoteTally)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._players_by_id = {player.user_id: player for player in self.players}
+        self._positions = {player.user_id: position for position, player in enumerate(self.players)}
+        self._mayor = next((player for player in self.players if player.is_mayor), None)
+        self._alive_counts = Counter(player.role for player in self.players if player.is_alive)
+        self._tally = VoteTally(self.turns[-1].votes.values() if self.turns else ())
+
+    def get_player(self, user_id: UUID) -> UndercoverSocketPlayer | None:
+        return self._players_by_id.get(user_id)
+
+    @property
+    def mayor(self) -> UndercoverSocketPlayer | None:
+        return self._mayor
+
+    @property
+    def number_of_alive_players(self) -> int:
+        return sum(self._alive_counts.values())
+
+    def number_of_alive_players_with_role(self, role: UndercoverRole) -> int:
+        return self._alive_counts[role]
+
+    @property
+    def all_votes_in(self) -> bool:
+        return len(self.turns[-1].votes) == self.number_of_alive_players
+
+    def vote(self, player: UndercoverSocketPlayer, voted_player: UndercoverSocketPlayer) -> None:
+        """
+        Record the vote of a player for the current turn, replacing their previous vote.
+
+        :param player: The player that votes.
+        :param voted_player: The player voted against.
+        :return: None
+        """
+        votes = self.turns[-1].votes
+        previous_voted_id = votes.get(player.user_id)
+        if previous_voted_id is not None:
+            self._tally.remove(previous_voted_id)
+        votes[player.user_id] = voted_player.user_id
+        self._tally.add(voted_player.user_id)
+
+    def number_of_votes_against(self, player: UndercoverSocketPlayer) -> int:
+        return self._tally.counts.get(player.user_id, 0)
+
+    def most_voted_players(self) -> list[UndercoverSocketPlayer]:
+        """
+        Return the players with the most votes of the current turn, in the order of the players of the game.
+
+        :return: The most voted players, more than one when there is a tie.
+        """
+        return [
+            self._players_by_id[user_id]
+            for user_id in sorted(self._tally.most_voted(), key=self._positions.__getitem__)
+        ]
+
+    def eliminate(self, player: UndercoverSocketPlayer) -> None:
+        """
+        Eliminate a player and close the current turn, its votes are counted.
+
+        :param player: The player to eliminate.
+        :return: None
+        """
+        player.is_alive = False
+        self.eliminated_players.append(player)
+        self.turns[-1].eliminated_player = player.user_id
+        self._alive_counts[player.role] -= 1
+
+    def start_turn(self) -> None:
+        self.turns.append(UndercoverTurn())
+        self._tally = VoteTally()
+
 
 class StartNewTurn(BaseModel):
     room_id: str
@@ -50,5 +175,5 @@ class StartNewTurn(BaseModel):
 class VoteForAPerson(BaseModel):
     room_id: str
     game_id: str
-    user_id: str
-    voted_user_id: str
+    user_id: UUID
+    voted_user_id: UUID
@@ -3,9 +3,10 @@ from starlette.responses import HTMLResponse
 
 from ibg.api.models.room import RoomCreate
 from ibg.api.models.view import RoomView
+from ibg.socketio.controllers.room_shards import get_room_shards
 from ibg.socketio.models.room import JoinRoomUser, LeaveRoomUser
 from ibg.socketio.models.shared import IBGSocket
-from ibg.socketio.routers.shared import send_event_to_client, serialize_model, socketio_exception_handler
+from ibg.socketio.routers.shared import encode_model, send_event_to_client, socketio_exception_handler
 
 router = APIRouter(
     responses={404: {"description": "Not found"}},
@@ -151,8 +152,10 @@ def get_website():
 
 
 def room_events(sio: IBGSocket) -> None:
+    room_shards = get_room_shards()
 
     @sio.event
+    @room_shards.route("public_room_id")
     @socketio_exception_handler(sio)
     async def join_room(sid, data) -> None:
         # Validation
@@ -162,7 +165,7 @@ def room_events(sio: IBGSocket) -> None:
         room = await sio.socket_room_controller.user_join_room(sid, join_room_user)
         await sio.enter_room(sid=sid, room=room.public_id)
 
-        room_view = serialize_model(RoomView.model_validate(room))
+        room_view = encode_model(RoomView.model_validate(room))
 
         # Send Notification to the user that they have joined
         await send_event_to_client(
@@ -200,7 +203,7 @@ def room_events(sio: IBGSocket) -> None:
         room = await sio.socket_room_controller.create_room(sid, create_room_user)
         await sio.enter_room(sid, room.public_id)
 
-        room_view = serialize_model(RoomView.model_validate(room))
+        room_view = encode_model(RoomView.model_validate(room))
 
         # Send Notification to the user that they have joined
         await send_event_to_client(
@@ -211,6 +214,7 @@ def room_events(sio: IBGSocket) -> None:
         )
 
     @sio.event
+    @room_shards.route("room_id")
     @socketio_exception_handler(sio)
     async def leave_room(sid, data) -> None:
         # Validation
@@ -240,7 +244,7 @@ def room_events(sio: IBGSocket) -> None:
                 "user_id": str(leave_room_user.user_id),
                 "username": leave_room_user.username,
                 "message": f"User {leave_room_user.username} has left the room.",
-                "data": serialize_model(RoomView.model_validate(room)),
+                "data": encode_model(RoomView.model_validate(room)),
             },
             room=str(leave_room_user.room_id),
         )
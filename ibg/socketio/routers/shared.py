@@ -1,44 +1,122 @@
+import asyncio
+import json
+import time
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
 from typing import Any
-from uuid import UUID
 
 from loguru import logger
 from pydantic import BaseModel, ValidationError
 
 from ibg.api.models.error import BaseError
+from ibg.socketio.models.serialization import RawJSON, get_model_serializer
 from ibg.socketio.models.shared import IBGSocket
 
 
-def serialize_model(data: Any) -> Any:
+def serialize_model(model: BaseModel) -> dict[str, Any]:
     """
-    Recursively convert a Pydantic model and any nested UUIDs to a dictionary with stringified UUIDs.
-    Handles lists, dicts, and Pydantic models. Converts UUIDs to strings.
+    Convert a model to a JSON-ready dictionary, with the serializer compiled for its type.
+
+    :param model: The model to convert.
+    :return: The dictionary, with stringified UUIDs and datetimes.
     """
-    if isinstance(data, BaseModel):
-        return {key: serialize_model(value) for key, value in data.model_dump().items()}
-    elif isinstance(data, UUID):
-        return str(data)
-    elif isinstance(data, dict):
-        return {key: serialize_model(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [serialize_model(item) for item in data]
-    elif isinstance(data, datetime):
-        return data.strftime("%Y-%m-%d %H:%M:%S")
-    return data
+    return get_model_serializer(type(model)).to_python(model)
+
+
+def encode_model(model: BaseModel) -> RawJSON:
+    """
+    Encode a model to JSON once, to send it in several events without encoding it again.
+
+    :param model: The model to encode.
+    :return: The encoded model, to put in the data of the events.
+    """
+    return get_model_serializer(type(model)).to_raw_json(model)
 
 
 async def send_event_to_client(sio: IBGSocket, event_name: str, data: dict[str, Any], room: str) -> None:
     await sio.emit(event_name, data, room=room)
 
 
+class FanOutMetrics(BaseModel):
+    fan_outs: int = 0
+    recipients: int = 0
+    emits: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+
+class FanOutStatus(FanOutMetrics):
+    latency_avg: float
+
+
+class EventFanOut:
+    """
+    Send an event to many sockets, each with its own payload, in one pass.
+    The sockets that get the same payload are sent a single multi-target emit, so the client manager encodes the
+    packet once (and publishes it once with `socketio_redis_manager`), and the emits of the different payloads run
+    concurrently instead of one await per socket.
+    """
+
+    def __init__(self):
+        self.metrics = FanOutMetrics()
+
+    async def send(self, sio: IBGSocket, event_name: str, payloads: dict[str, dict[str, Any]]) -> float:
+        """
+        Send an event to every socket of `payloads`.
+
+        :param sio: The socket server.
+        :param event_name: The name of the event.
+        :param payloads: The payload of each socket, keyed by socket id.
+        :return: The time spent sending the event, in seconds.
+        """
+        start = time.perf_counter()
+        sids_by_payload: dict[str, list[str]] = {}
+        for sid, payload in payloads.items():
+            sids_by_payload.setdefault(json.dumps(payload, sort_keys=True), []).append(sid)
+        await asyncio.gather(
+            *(
+                sio.emit(event_name, payloads[sids[0]], to=sids[0] if len(sids) == 1 else sids)
+                for sids in sids_by_payload.values()
+            )
+        )
+        latency = time.perf_counter() - start
+        self.metrics.fan_outs += 1
+        self.metrics.recipients += len(payloads)
+        self.metrics.emits += len(sids_by_payload)
+        self.metrics.latency_total += latency
+        self.metrics.latency_max = max(self.metrics.latency_max, latency)
+        return latency
+
+    def status(self) -> FanOutStatus:
+        return FanOutStatus(
+            **self.metrics.model_dump(),
+            latency_avg=self.metrics.latency_total / self.metrics.fan_outs if self.metrics.fan_outs else 0.0,
+        )
+
+
+_event_fan_out: EventFanOut | None = None
+
+
+def get_event_fan_out() -> EventFanOut:
+    """
+    Return the event fan-out of this worker, creating it on first use.
+
+    :return: The event fan-out.
+    """
+    global _event_fan_out
+    if _event_fan_out is None:
+        _event_fan_out = EventFanOut()
+    return _event_fan_out
+
+
 def socketio_exception_handler(sio):
     def decorator(func):
         @wraps(func)
         async def wrapper(sid, *args, **kwargs):
             try:
-                return await func(sid, *args, **kwargs)
+                async with sio.unit_of_work():
+                    return await func(sid, *args, **kwargs)
             except BaseError as e:
                 path = Path(e.__traceback__.tb_frame.f_code.co_filename)
                 filename = path.name
@@ -2,26 +2,37 @@ import random
 from uuid import UUID
 
 from aredis_om import NotFoundError
+from loguru import logger
+from sqlalchemy.exc import NoResultFound
 
 from ibg.api.models.error import (
     CantVoteBecauseYouDeadError,
     CantVoteForDeadPersonError,
     CantVoteForYourselfError,
+    CantVoteTurnIsOverError,
     GameNotFoundError,
     RoomNotFoundError,
+    UserNotFoundError,
 )
 from ibg.api.models.event import EventCreate
 from ibg.api.models.game import GameCreate, GameType
 from ibg.api.models.table import Game, Room
-from ibg.api.models.undercover import UndercoverRole, Word
+from ibg.api.models.undercover import TermPair, UndercoverRole, Word
+from ibg.socketio.controllers.game_store import get_game_store
+from ibg.socketio.controllers.room_shards import get_room_shards
 from ibg.socketio.models.room import Room as RedisRoom
 from ibg.socketio.models.shared import IBGSocket
-from ibg.socketio.models.socket import StartGame, StartNewTurn, UndercoverGame, UndercoverTurn, VoteForAPerson
+from ibg.socketio.models.socket import StartGame, StartNewTurn, UndercoverGame, VoteForAPerson
 from ibg.socketio.models.user import UndercoverSocketPlayer
-from ibg.socketio.routers.shared import send_event_to_client, socketio_exception_handler
+from ibg.socketio.routers.shared import get_event_fan_out, send_event_to_client, socketio_exception_handler
+
+RECENT_TERM_PAIRS_TO_EXCLUDE = 5
 
 
 def undercover_events(sio: IBGSocket) -> None:
+    room_shards = get_room_shards()
+    game_store = get_game_store()
+    event_fan_out = get_event_fan_out()
 
     async def _start_new_turn(db_room: Room, db_game: Game, redis_game: UndercoverGame) -> None:
         """
@@ -30,9 +41,9 @@ def undercover_events(sio: IBGSocket) -> None:
         :param start_new_turn_data: The data to start a new turn.
         :return: None
         """
-        turn = sio.game_controller.create_turn(game_id=db_game.id)
-        sio.game_controller.create_turn_event(
-            game_id=db_game.id,
+        turn = await sio.game_controller.create_turn(game_id=db_game.id)
+        await sio.event_writer.write_turn_event(
+            turn_id=turn.id,
             event_create=EventCreate(
                 name="start_turn",
                 data={
@@ -43,40 +54,42 @@ def undercover_events(sio: IBGSocket) -> None:
                 user_id=db_room.owner_id,
             ),
         )
-        redis_game.turns.append(UndercoverTurn())
-        await redis_game.save()
+        redis_game.start_turn()
+        await game_store.snapshot(redis_game)
 
-    async def _get_civilian_and_undercover_words() -> tuple[Word, Word]:
+    async def _get_civilian_and_undercover_words(room_id: UUID) -> tuple[TermPair, Word, Word]:
         """
-        Get the civilian and undercover words for the game.
+        Get the civilian and undercover words for the game, avoiding the term pairs the room played recently.
 
-        :param game_id: The id of the game.
-        :return: tuple[str, str]
+        :param room_id: The id of the room the game is played in.
+        :return: tuple[TermPair, Word, Word]
         """
-        term_pair = await sio.undercover_controller.get_random_term_pair()
-        civilian_word_id = term_pair.word1_id
-        undercover_word_id = term_pair.word2_id
-        if random.choice([True, False]):
-            civilian_word_id, undercover_word_id = (
-                term_pair.word2_id,
-                term_pair.word1_id,
+        recent_term_pair_ids = await sio.undercover_controller.get_recent_term_pair_ids(
+            room_id, number_of_games=RECENT_TERM_PAIRS_TO_EXCLUDE
+        )
+        try:
+            term_pair, word1, word2 = await sio.undercover_controller.get_random_term_pair_with_words(
+                excluded_term_pair_ids=recent_term_pair_ids
             )
-        civilian_word = await sio.undercover_controller.get_word_by_id(civilian_word_id)
-        undercover_word = await sio.undercover_controller.get_word_by_id(undercover_word_id)
-        return civilian_word, undercover_word
+        except NoResultFound:
+            # The room already played every pair of the word bank, allow repetitions
+            term_pair, word1, word2 = await sio.undercover_controller.get_random_term_pair_with_words()
+        if random.choice([True, False]):
+            return term_pair, word2, word1
+        return term_pair, word1, word2
 
     async def _create_undercover_game(
         start_game_input: StartGame,
-    ) -> tuple[Game, UndercoverGame]:
+    ) -> tuple[Room, Game, UndercoverGame]:
         """
         Create an undercover game, assign roles to players, and save the game to the Redis database.
 
         :param start_game_input: The input to start the game.
-        :return: The created undercover game.
+        :return: The room, the created game and the created undercover game.
         """
         db_room = await sio.room_controller.get_room_by_id(start_game_input.room_id)
         try:
-            room = await RedisRoom.find(RedisRoom.id == str(db_room.id)).first()
+            room = await RedisRoom.get(str(db_room.id))
         except NotFoundError:
             raise RoomNotFoundError(room_id=start_game_input.room_id)
         players = room.users
@@ -95,13 +108,14 @@ def undercover_events(sio: IBGSocket) -> None:
             for player, role in zip(players, roles)
         ]
         undercover_players[random.randint(0, len(undercover_players) - 1)].is_mayor = True
-        civilian_word, undercover_word = await _get_civilian_and_undercover_words()
+        term_pair, civilian_word, undercover_word = await _get_civilian_and_undercover_words(db_room.id)
         db_game = await sio.game_controller.create_game(
             GameCreate(
                 room_id=db_room.id,
                 number_of_players=len(players),
                 type=GameType.UNDERCOVER,
                 game_configurations={
+                    "term_pair_id": str(term_pair.id),
                     "civilian_word": civilian_word.word,
                     "undercover_word": undercover_word.word,
                     "civilian_word_id": str(civilian_word.id),
@@ -116,11 +130,25 @@ def undercover_events(sio: IBGSocket) -> None:
             id=str(db_game.id),
             players=undercover_players,
         )
-        await redis_game.save()
+        game_store.add(redis_game)
         await _start_new_turn(db_room, db_game, redis_game)
-        return db_game, redis_game
+        return db_room, db_game, redis_game
+
+    def _role_assigned_payload(game: UndercoverGame, player: UndercoverSocketPlayer) -> dict[str, str]:
+        """
+        Build the role_assigned event of a player, with their role and their word.
+
+        :param game: The game the player plays in.
+        :param player: The player.
+        :return: The payload of the event.
+        """
+        if player.role == UndercoverRole.MR_WHITE:
+            return {"role": player.role.value, "word": "You are Mr. White. You have to guess the word."}
+        word = game.undercover_word if player.role == UndercoverRole.UNDERCOVER else game.civilian_word
+        return {"role": player.role.value, "word": word}
 
     @sio.event
+    @room_shards.route("room_id")
     @socketio_exception_handler(sio)
     async def start_undercover_game(sid, data) -> None:
         """
@@ -135,33 +163,17 @@ def undercover_events(sio: IBGSocket) -> None:
         start_game_input = StartGame(**data)
 
         # Function Logic
-        db_game, redis_game = await _create_undercover_game(start_game_input)
+        db_room, db_game, redis_game = await _create_undercover_game(start_game_input)
 
         # Send Notification to each player to assign role
-        for player in redis_game.players:
-            if player.role == UndercoverRole.MR_WHITE:
-                await send_event_to_client(
-                    sio,
-                    "role_assigned",
-                    {
-                        "role": player.role.value,
-                        "word": "You are Mr. White. You have to guess the word.",
-                    },
-                    room=player.sid,
-                )
-            else:
-                word = (
-                    redis_game.undercover_word if player.role == UndercoverRole.UNDERCOVER else redis_game.civilian_word
-                )
-                await send_event_to_client(
-                    sio,
-                    "role_assigned",
-                    {
-                        "role": player.role.value,
-                        "word": word,
-                    },
-                    room=player.sid,
-                )
+        latency = await event_fan_out.send(
+            sio,
+            "role_assigned",
+            {player.sid: _role_assigned_payload(redis_game, player) for player in redis_game.players},
+        )
+        logger.debug(
+            f"Sent the roles of game {redis_game.id} to {len(redis_game.players)} players in {latency * 1000:.2f}ms"
+        )
 
         # Send Notification to Room that game has started
         await send_event_to_client(
@@ -170,12 +182,13 @@ def undercover_events(sio: IBGSocket) -> None:
             {
                 "message": "Undercover Game has started. Check your role and word.",
                 "players": [player.username for player in redis_game.players],
-                "mayor": next(player.username for player in redis_game.players if player.is_mayor),
+                "mayor": redis_game.mayor.username,
             },
-            room=str(db_game.room.public_id),
+            room=str(db_room.public_id),
         )
 
     @sio.event
+    @room_shards.route("room_id")
     @socketio_exception_handler(sio)
     async def start_new_turn(sid, data) -> None:
         """
@@ -200,7 +213,7 @@ def undercover_events(sio: IBGSocket) -> None:
             room=start_new_turn_data.room_id,
         )
 
-    async def _eliminate_player_based_on_votes(
+    def _eliminate_player_based_on_votes(
         game: UndercoverGame,
     ) -> tuple[UndercoverSocketPlayer, int]:
         """
@@ -209,54 +222,39 @@ def undercover_events(sio: IBGSocket) -> None:
         :param game: The game to eliminate the player from.
         :return: None
         """
-        votes = game.turns[-1].votes
-        vote_counts = {player.user_id: 0 for player in game.players}
-        for voted_id in votes.values():
-            vote_counts[voted_id] += 1
-
-        # Get the player with the most votes
-        max_votes = max(vote_counts.values())
-        players_with_max_votes = [player_id for player_id, vote_count in vote_counts.items() if vote_count == max_votes]
-
-        # If there is a tie, check if the mayor's vote can break the tie
-        if len(players_with_max_votes) > 1:
-            mayor_vote = next(
-                (votes[player.user_id] for player in game.players if player.is_mayor),
-                None,
-            )
-            if mayor_vote in players_with_max_votes:
-                player_with_most_vote = mayor_vote
-            else:
-                player_with_most_vote = players_with_max_votes[
-                    0
-                ]  # If mayor's vote doesn't break the tie, choose the first player
-        else:
-            player_with_most_vote = players_with_max_votes[0]
+        most_voted_players = game.most_voted_players()
+        eliminated_player = most_voted_players[0]
 
-        eliminated_player = next(player for player in game.players if player.user_id == player_with_most_vote)
-        game.eliminated_players.append(eliminated_player)
-        await game.save()
+        # If there is a tie, check if the mayor's vote can break the tie, else choose the first player
+        if len(most_voted_players) > 1 and game.mayor is not None:
+            mayor_vote = game.turns[-1].votes.get(game.mayor.user_id)
+            if any(player.user_id == mayor_vote for player in most_voted_players):
+                eliminated_player = game.get_player(mayor_vote)
 
-        return eliminated_player, vote_counts[player_with_most_vote]
+        number_of_votes = game.number_of_votes_against(eliminated_player)
+        game.eliminate(eliminated_player)
 
-    async def _set_vote(
-        game: UndercoverGame, data: VoteForAPerson
-    ) -> tuple[UndercoverSocketPlayer, UndercoverSocketPlayer]:
+        return eliminated_player, number_of_votes
+
+    def _set_vote(game: UndercoverGame, data: VoteForAPerson) -> tuple[UndercoverSocketPlayer, UndercoverSocketPlayer]:
         """
-        Get the player that is voting and the player that is voted for.
+        Record the vote of a player for the current turn. If the votes of the turn were already counted, raise a
+        CantVoteTurnIsOverError.
 
         :param game: The game to get the players from.
         :param data: The data to get the players from.
         :return: tuple[UndercoverSocketPlayer, UndercoverSocketPlayer]
         """
-        player_to_vote: UndercoverSocketPlayer = next(
-            player for player in game.players if player.user_id == data.user_id
-        )
+        if game.turns[-1].eliminated_player is not None:
+            raise CantVoteTurnIsOverError(user_id=data.user_id, game_id=game.id)
+        player_to_vote = game.get_player(data.user_id)
+        if player_to_vote is None:
+            raise UserNotFoundError(user_id=data.user_id)
         if player_to_vote.is_alive is False:
             raise CantVoteBecauseYouDeadError(user_id=data.user_id)
-        voted_player: UndercoverSocketPlayer = next(
-            player for player in game.players if player.user_id == data.voted_user_id
-        )
+        voted_player = game.get_player(data.voted_user_id)
+        if voted_player is None:
+            raise UserNotFoundError(user_id=data.voted_user_id)
         if voted_player.is_alive is False:
             raise CantVoteForDeadPersonError(
                 user_id=data.user_id,
@@ -264,11 +262,10 @@ def undercover_events(sio: IBGSocket) -> None:
             )
         if player_to_vote.user_id == voted_player.user_id:
             raise CantVoteForYourselfError(user_id=data.user_id)
-        game.turns[-1].votes[UUID(data.user_id)] = voted_player.user_id
-        await game.save()
+        game.vote(player_to_vote, voted_player)
         return player_to_vote, voted_player
 
-    async def _check_if_a_team_has_win(game: UndercoverGame) -> UndercoverRole | None:
+    def _check_if_a_team_has_win(game: UndercoverGame) -> UndercoverRole | None:
         """
         Check if a team has won the game. If the undercovers have won, return UndercoverRole.UNDERCOVER.
         If the civilians have won, return UndercoverRole.CIVILIAN.
@@ -277,21 +274,16 @@ def undercover_events(sio: IBGSocket) -> None:
         :param game: The game to check if a team has won.
         :return: UndercoverRole | None
         """
-        num_alive_undercover = len(
-            [player for player in game.players if player.role == UndercoverRole.UNDERCOVER and player.is_alive]
-        )
-        num_alive_civilian = len(
-            [player for player in game.players if player.role == UndercoverRole.CIVILIAN and player.is_alive]
-        )
-        num_alive_mr_white = len(
-            [player for player in game.players if player.role == UndercoverRole.MR_WHITE and player.is_alive]
-        )
+        num_alive_undercover = game.number_of_alive_players_with_role(UndercoverRole.UNDERCOVER)
+        num_alive_civilian = game.number_of_alive_players_with_role(UndercoverRole.CIVILIAN)
+        num_alive_mr_white = game.number_of_alive_players_with_role(UndercoverRole.MR_WHITE)
         if num_alive_undercover == 0 and num_alive_mr_white == 0:
             return UndercoverRole.CIVILIAN
         if num_alive_civilian == 0 or num_alive_mr_white == 0:
             return UndercoverRole.UNDERCOVER
 
     @sio.event
+    @room_shards.route("room_id")
     @socketio_exception_handler(sio)
     async def vote_for_a_player(sid, data) -> None:
         """
@@ -303,14 +295,30 @@ def undercover_events(sio: IBGSocket) -> None:
         :return: None
         """
         data = VoteForAPerson(**data)
+
+        def record_vote(
+            game: UndercoverGame,
+        ) -> tuple[list[UndercoverSocketPlayer], tuple[UndercoverSocketPlayer, int, UndercoverRole | None] | None]:
+            _set_vote(game, data)
+            if not game.all_votes_in:
+                return [game.get_player(user_id) for user_id in game.turns[-1].votes], None
+            return [], (*_eliminate_player_based_on_votes(game), _check_if_a_team_has_win(game))
+
+        # The votes of a game are recorded and counted one at a time, even across workers, so the last vote of a turn
+        # is seen by a single event and the player is eliminated exactly once
         try:
-            game = await UndercoverGame.find(UndercoverGame.id == data.game_id).first()
+            game, (players_that_voted, elimination) = await game_store.update(data.game_id, record_vote)
         except NotFoundError:
             raise GameNotFoundError(game_id=data.game_id)
-        player_to_vote, voted_player = await _set_vote(game, data)
-        if len(game.turns[-1].votes) == len(game.players) - len(game.eliminated_players):
-            eliminated_player, number_of_vote = await _eliminate_player_based_on_votes(game)
-
+        all_votes_in = elimination is not None
+        if all_votes_in:
+            eliminated_player, number_of_vote, team_that_won = elimination
+            await game_store.snapshot(game)
+            if team_that_won is not None:
+                # The elimination wrote the final snapshot of the game
+                game_store.discard(game.id)
+
+        if all_votes_in:
             # Send Notification to Room that a player has been eliminated
             await send_event_to_client(
                 sio,
@@ -329,7 +337,6 @@ def undercover_events(sio: IBGSocket) -> None:
                 {"message": f"You have been eliminated with {number_of_vote} votes against you."},
                 room=eliminated_player.sid,
             )
-            team_that_won = await _check_if_a_team_has_win(game)
             if team_that_won == UndercoverRole.CIVILIAN:
                 await send_event_to_client(
                     sio,
@@ -348,9 +355,7 @@ def undercover_events(sio: IBGSocket) -> None:
                     },
                     room=game.room_id,
                 )
-
         else:
-            players_that_voted = [player for player in game.players if player.id in game.turns[-1].votes.values()]
             await send_event_to_client(
                 sio,
                 "vote_casted",
@@ -4,19 +4,43 @@ import uvicorn
 from aredis_om import Migrator
 from fastapi import FastAPI
 
+from ibg.api.controllers.event_writer import get_event_writer
+from ibg.api.controllers.password_hasher import get_password_hasher
+from ibg.api.controllers.word_bank import word_bank
 from ibg.app import create_app
-from ibg.database import create_app_engine, create_db_and_tables
+from ibg.database import close_redis_registry, create_db_and_tables, get_engine_registry, get_redis_registry
 from ibg.logger_config import configure_logger
+from ibg.socketio.controllers.game_store import get_game_store
+from ibg.socketio.controllers.room_shards import get_room_shards
+from ibg.socketio.models.migrations import PrimaryKeyMigrator
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     configure_logger()
+    redis_registry = get_redis_registry()
+    await redis_registry.connect()
     await Migrator().run()
-    engine = create_app_engine()
-    create_db_and_tables(engine)
-    engine.dispose()
+    await PrimaryKeyMigrator().run()
+    engine_registry = get_engine_registry()
+    await create_db_and_tables(engine_registry.engine)
+    async with engine_registry.session() as session:
+        await word_bank.load(session)
+    await word_bank.listen(redis_registry.client)
+    event_writer = get_event_writer()
+    event_writer.start()
+    room_shards = get_room_shards()
+    await room_shards.listen(redis_registry.client)
+    game_store = get_game_store()
+    game_store.start()
     yield
+    await room_shards.stop()
+    await game_store.stop()
+    await event_writer.stop()
+    get_password_hasher().shutdown()
+    await word_bank.stop()
+    await engine_registry.dispose()
+    await close_redis_registry()
 
 
 app = create_app(lifespan=lifespan)
@@ -1,28 +1,25 @@
 import asyncio
 
-from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel
 
-# Update with your actual database URL
-sqlite_file_name = "test.db"
-sqlite_url = f"sqlite+aiosqlite:///{sqlite_file_name}"
+from ibg.api.models import table  # noqa: F401 - registers the tables on SQLModel.metadata
+from ibg.database import get_engine_registry
 
 
 async def reset_database():
-    # Create Async Engine
-    engine: AsyncEngine = create_async_engine(sqlite_url, echo=True)
+    engine_registry = get_engine_registry()
 
     # Drop all tables
-    async with engine.begin() as conn:
+    async with engine_registry.engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.drop_all)
         print("All tables dropped.")
 
     # Recreate all tables
-    async with engine.begin() as conn:
+    async with engine_registry.engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
         print("All tables recreated.")
 
-    await engine.dispose()
+    await engine_registry.dispose()
 
 
 if __name__ == "__main__":
@@ -5,7 +5,6 @@ from datetime import timedelta
 
 import pycountry
 from faker import Faker
-from sqlmodel import Session, SQLModel, create_engine
 
 from ibg.api.controllers.room import RoomController
 from ibg.api.controllers.undercover import UndercoverController
@@ -15,20 +14,15 @@ from ibg.api.models.room import RoomCreate, RoomJoin, RoomStatus
 from ibg.api.models.table import Game, User
 from ibg.api.models.undercover import Word
 from ibg.api.models.user import UserCreate
+from ibg.database import create_db_and_tables, get_engine_registry
 from ibg.socketio.models.room import Room as RedisRoom
 from ibg.socketio.models.user import User as RedisUser
 
-DATABASE_URL = "sqlite:///database.db"
-
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine_registry = get_engine_registry()
 
 fake = Faker()
 
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
-
-
 sample_words = [
     {
         "id": fake.uuid4(),
@@ -168,7 +162,7 @@ def generate_sample_games(users: list[User], num_games: int) -> list[Game]:
 
 
 async def insert_sample_data() -> None:
-    with Session(engine, expire_on_commit=False) as session:
+    async with engine_registry.session() as session:
         user_controller = UserController(session)
         room_controller = RoomController(session)
         # game_controller = GameController(session)
@@ -213,7 +207,7 @@ async def insert_sample_data() -> None:
         for sample_word in sample_words:
             new_word = Word(**sample_word)
             session.add(new_word)
-            session.commit()
+            await session.commit()
 
         for sample_pair in sample_pairs:
             await undercover_controller.create_term_pair(
@@ -229,7 +223,12 @@ async def insert_sample_data() -> None:
     # )
 
 
+async def main() -> None:
+    await create_db_and_tables(engine_registry.engine)
+    await insert_sample_data()
+    await engine_registry.dispose()
+
+
 if __name__ == "__main__":
-    create_db_and_tables()
-    asyncio.run(insert_sample_data())
+    asyncio.run(main())
     print("Database populated with sample data.")
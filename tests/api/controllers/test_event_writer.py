@@ -0,0 +1,242 @@
+import asyncio
+import random
+import string
+from uuid import uuid4
+
+import pycountry
+import pytest
+from faker import Faker
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ibg.api.controllers.event_writer import EventWriter
+from ibg.api.controllers.game import GameController
+from ibg.api.controllers.room import RoomController
+from ibg.api.controllers.user import UserController
+from ibg.api.models.event import EventCreate
+from ibg.api.models.game import GameCreate, GameType
+from ibg.api.models.relationship import RoomActivityLink, TurnEventLink
+from ibg.api.models.room import RoomCreate, RoomStatus
+from ibg.api.models.table import Activity, Event, Room
+from ibg.api.models.user import UserCreate
+
+
+@pytest.fixture(name="event_writer")
+def get_event_writer(engine: AsyncEngine) -> EventWriter:
+    return EventWriter(
+        session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+        batch_size=4,
+        flush_interval=10,
+        max_queue_size=100,
+    )
+
+
+async def _create_room(user_controller: UserController, room_controller: RoomController, faker: Faker) -> Room:
+    owner = await user_controller.create_user(
+        UserCreate(
+            username=faker.user_name(),
+            email_address=faker.email(),
+            country=random.choice([country.alpha_3 for country in pycountry.countries]),
+            password=faker.password(),
+        )
+    )
+    return await room_controller.create_room(
+        RoomCreate(
+            owner_id=owner.id,
+            password="".join(random.choice(string.digits) for _ in range(4)),
+            status=RoomStatus.ONLINE,
+        )
+    )
+
+
+def _activity(room: Room, index: int) -> EventCreate:
+    return EventCreate(name="join_room", data={"index": index, "room_id": room.id}, user_id=room.owner_id)
+
+
+async def _count(session: AsyncSession, model) -> int:
+    return (await session.exec(select(func.count()).select_from(model))).one()
+
+
+@pytest.mark.asyncio
+async def test_event_writer_writes_in_batches(
+    user_controller: UserController,
+    room_controller: RoomController,
+    event_writer: EventWriter,
+    faker: Faker,
+):
+    room = await _create_room(user_controller, room_controller, faker)
+    event_writer.start()
+
+    for index in range(10):
+        await event_writer.write_room_activity(room.id, _activity(room, index))
+    await event_writer.stop()
+
+    assert event_writer.metrics.queued == event_writer.metrics.written == 10
+    # Two full batches, then the rest when the writer stops
+    assert event_writer.metrics.flushes == 3
+    assert await _count(room_controller.session, Activity) == 10
+    assert await _count(room_controller.session, RoomActivityLink) == 10
+    activities = (await room_controller.session.exec(select(Activity))).all()
+    assert sorted(activity.data["index"] for activity in activities) == list(range(10))
+    assert activities[0].data["room_id"] == str(room.id)
+
+
+@pytest.mark.asyncio
+async def test_event_writer_flushes_after_interval(
+    user_controller: UserController,
+    room_controller: RoomController,
+    event_writer: EventWriter,
+    faker: Faker,
+):
+    room = await _create_room(user_controller, room_controller, faker)
+    event_writer.flush_interval = 0.05
+    event_writer.start()
+
+    await event_writer.write_room_activity(room.id, _activity(room, 0))
+    await asyncio.sleep(0.2)
+    assert event_writer.status().queue_depth == 0
+    assert await _count(room_controller.session, Activity) == 1
+    await event_writer.stop()
+    assert event_writer.metrics.flushes == 1
+
+
+@pytest.mark.asyncio
+async def test_event_writer_applies_backpressure(
+    user_controller: UserController,
+    room_controller: RoomController,
+    engine: AsyncEngine,
+    faker: Faker,
+):
+    room = await _create_room(user_controller, room_controller, faker)
+    event_writer = EventWriter(
+        session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+        batch_size=1,
+        flush_interval=0,
+        max_queue_size=1,
+    )
+    database_is_slow = asyncio.Event()
+    write = event_writer._write
+
+    async def slow_write(batch):
+        await database_is_slow.wait()
+        await write(batch)
+
+    event_writer._write = slow_write
+    event_writer.start()
+
+    # The first activity is being flushed and the second one fills the queue
+    await event_writer.write_room_activity(room.id, _activity(room, 0))
+    await asyncio.sleep(0.01)
+    await event_writer.write_room_activity(room.id, _activity(room, 1))
+    third_write = asyncio.create_task(event_writer.write_room_activity(room.id, _activity(room, 2)))
+    await asyncio.sleep(0.05)
+    assert not third_write.done()
+    assert event_writer.metrics.backpressure_waits == 1
+    assert event_writer.status().queue_depth == 1
+
+    database_is_slow.set()
+    await third_write
+    await event_writer.stop()
+    assert event_writer.metrics.written == 3
+    assert await _count(room_controller.session, Activity) == 3
+
+
+@pytest.mark.asyncio
+async def test_event_writer_skips_records_it_cannot_write(
+    user_controller: UserController,
+    room_controller: RoomController,
+    event_writer: EventWriter,
+    faker: Faker,
+):
+    room = await _create_room(user_controller, room_controller, faker)
+    event_writer.start()
+
+    await event_writer.write_room_activity(room.id, _activity(room, 0))
+    await event_writer.write_room_activity(uuid4(), _activity(room, 1))
+    await event_writer.write_room_activity(room.id, _activity(room, 2))
+    await event_writer.stop()
+
+    assert event_writer.metrics.written == 2
+    assert event_writer.metrics.failed == 1
+    assert await _count(room_controller.session, Activity) == 2
+
+
+@pytest.mark.asyncio
+async def test_event_writer_writes_turn_events_immediately_when_not_running(
+    user_controller: UserController,
+    room_controller: RoomController,
+    game_controller: GameController,
+    event_writer: EventWriter,
+    faker: Faker,
+):
+    room = await _create_room(user_controller, room_controller, faker)
+    game = await game_controller.create_game(GameCreate(room_id=room.id, type=GameType.UNDERCOVER, number_of_players=4))
+    turn = await game_controller.create_turn(game.id)
+
+    event = await event_writer.write_turn_event(
+        turn.id, EventCreate(name="start_turn", data={"turn_id": turn.id}, user_id=room.owner_id)
+    )
+
+    assert event_writer.metrics.written == 1
+    db_event = (await game_controller.session.exec(select(Event).where(Event.id == event.id))).one()
+    assert db_event.turn_id == turn.id
+    assert db_event.data == {"turn_id": str(turn.id)}
+    link = (await game_controller.session.exec(select(TurnEventLink))).one()
+    assert (link.turn_id, link.event_id) == (turn.id, event.id)
+
+
+@pytest.mark.asyncio
+async def test_event_writer_keeps_running_when_a_batch_fails(
+    user_controller: UserController,
+    room_controller: RoomController,
+    event_writer: EventWriter,
+    faker: Faker,
+    monkeypatch,
+):
+    room = await _create_room(user_controller, room_controller, faker)
+    write = event_writer._write
+    failures = [OSError("Connection reset by peer")]
+
+    async def write_or_fail(batch):
+        if failures:
+            raise failures.pop()
+        await write(batch)
+
+    monkeypatch.setattr(event_writer, "_write", write_or_fail)
+    event_writer.start()
+
+    for index in range(8):
+        await event_writer.write_room_activity(room.id, _activity(room, index))
+    await asyncio.sleep(0.1)
+
+    assert event_writer.running
+    assert event_writer.metrics.failed == 4
+    await event_writer.stop()
+    assert event_writer.metrics.written == 4
+    assert await _count(room_controller.session, Activity) == 4
+
+
+@pytest.mark.asyncio
+async def test_event_writer_writes_the_records_left_by_a_cancelled_task(
+    user_controller: UserController,
+    room_controller: RoomController,
+    event_writer: EventWriter,
+    faker: Faker,
+):
+    room = await _create_room(user_controller, room_controller, faker)
+    event_writer.start()
+    event_writer._task.cancel()
+    await asyncio.sleep(0)
+
+    # Queued while the task was running, never taken by it
+    for index in range(6):
+        event_writer._queue.put_nowait(
+            Activity(room_id=room.id, user_id=room.owner_id, name="join_room", data={"index": index})
+        )
+    await event_writer.stop()
+
+    assert event_writer.metrics.written == 6
+    assert event_writer.metrics.flushes == 2
+    assert await _count(room_controller.session, Activity) == 6
@@ -1,14 +1,15 @@
 import datetime
 import random
 import string
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 import pycountry
 import pytest
 from faker import Faker
 from freezegun import freeze_time
 from sqlalchemy.exc import NoResultFound
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ibg.api.controllers.game import GameController
 from ibg.api.controllers.room import RoomController
@@ -22,9 +23,11 @@ from ibg.api.models.error import (
 )
 from ibg.api.models.event import EventCreate
 from ibg.api.models.game import GameCreate, GameType, GameUpdate
+from ibg.api.models.relationship import RoomGameLink, RoomUserLink, TurnEventLink, UserGameLink
 from ibg.api.models.room import RoomCreate, RoomStatus, RoomType
-from ibg.api.models.table import Game
+from ibg.api.models.table import Event, Game, Turn
 from ibg.api.models.user import UserCreate
+from ibg.api.models.view import GAME_VIEW_LOADERS, GameView
 
 
 @pytest.mark.asyncio
@@ -62,6 +65,54 @@ async def test_create_game(
     assert game.end_time is None
 
 
+@pytest.mark.asyncio
+async def test_create_game_links_room_users_in_one_insert(
+    user_controller: UserController,
+    room_controller: RoomController,
+    game_controller: GameController,
+    faker: Faker,
+    count_queries,
+):
+    users = [
+        await user_controller.create_user(
+            UserCreate(
+                username=faker.user_name(),
+                email_address=faker.unique.email(),
+                country=random.choice([country.alpha_3 for country in pycountry.countries]),
+                password=faker.password(),
+            )
+        )
+        for _ in range(20)
+    ]
+    room = await room_controller.create_room(
+        RoomCreate(
+            owner_id=users[0].id,
+            password="".join(random.choice(string.digits) for _ in range(4)),
+            status=RoomStatus.ONLINE,
+        )
+    )
+    # The owner left and joined again, so they have two links to the room
+    game_controller.session.add_all(
+        [RoomUserLink(room_id=room.id, user_id=user.id) for user in users[1:]]
+        + [RoomUserLink(room_id=room.id, user_id=users[0].id, connected=False)]
+    )
+    await game_controller.session.commit()
+
+    with count_queries() as queries:
+        game = await game_controller.create_game(
+            GameCreate(room_id=room.id, type=GameType.UNDERCOVER, number_of_players=len(users))
+        )
+    # The room users, the game, the room link and every user link
+    assert len(queries) == 4
+    user_game_links = (
+        await game_controller.session.exec(select(UserGameLink).where(UserGameLink.game_id == game.id))
+    ).all()
+    assert {user_game_link.user_id for user_game_link in user_game_links} == {user.id for user in users}
+    assert len(user_game_links) == len(users)
+    room_game_link = (await game_controller.session.exec(select(RoomGameLink))).one()
+    assert (room_game_link.room_id, room_game_link.game_id) == (room.id, game.id)
+
+
 @pytest.mark.asyncio
 async def test_create_multiple_games(
     user_controller: UserController,
@@ -92,7 +143,7 @@ async def test_create_multiple_games(
             number_of_players=faker.random_int(min=4, max=10),
         )
         games.append(await game_controller.create_game(game_create))
-    result = game_controller.session.exec(select(Game)).all()
+    result = (await game_controller.session.exec(select(Game))).all()
     assert len(result) == 3
     for game, db_game in zip(games, result):
         assert game.room_id == db_game.room_id
@@ -134,7 +185,7 @@ async def test_create_multiple_games_in_different_rooms(
             number_of_players=faker.random_int(min=4, max=10),
         )
         games.append(await game_controller.create_game(game_create))
-    result = game_controller.session.exec(select(Game)).all()
+    result = (await game_controller.session.exec(select(Game))).all()
     assert len(result) == 3
     for game, db_game in zip(games, result):
         assert game.room_id == db_game.room_id
@@ -173,7 +224,7 @@ async def test_def_create_game_raises_exception_if_room_is_not_active(
     user_controller: UserController,
     room_controller: RoomController,
     game_controller: GameController,
-    session: Session,
+    session: AsyncSession,
     faker: Faker,
 ):
     owner = await user_controller.create_user(
@@ -193,7 +244,7 @@ async def test_def_create_game_raises_exception_if_room_is_not_active(
     )
     room.type = RoomType.INACTIVE
     session.add(room)
-    session.commit()
+    await session.commit()
     with pytest.raises(ErrorRoomIsNotActive, match=f"Room with id {room.id} is not active"):
         _ = await game_controller.create_game(
             GameCreate(
@@ -236,7 +287,8 @@ async def test_get_all_games(
         games.append(await game_controller.create_game(game_create))
     result = await game_controller.get_games()
     assert len(result) == 3
-    for game, db_game in zip(games, result):
+    # Games are listed by id
+    for game, db_game in zip(sorted(games, key=lambda game: game.id), result):
         assert game.room_id == db_game.room_id
         assert game.type == db_game.type
         assert game.number_of_players == db_game.number_of_players
@@ -280,6 +332,43 @@ async def test_get_game_by_id(
     assert game.end_time == result.end_time
 
 
+@pytest.mark.asyncio
+async def test_get_game_by_id_loads_game_view(
+    user_controller: UserController,
+    room_controller: RoomController,
+    game_controller: GameController,
+    faker: Faker,
+    count_queries,
+):
+    owner = await user_controller.create_user(
+        UserCreate(
+            username=faker.user_name(),
+            email_address=faker.email(),
+            country=random.choice([country.alpha_3 for country in pycountry.countries]),
+            password=faker.password(),
+        )
+    )
+    room = await room_controller.create_room(
+        RoomCreate(
+            owner_id=owner.id,
+            password="".join(random.choice(string.digits) for _ in range(4)),
+            status=RoomStatus.ONLINE,
+        )
+    )
+    game = await game_controller.create_game(
+        GameCreate(room_id=room.id, type=GameType.UNDERCOVER, number_of_players=faker.random_int(min=4, max=10))
+    )
+    game_controller.session.expunge_all()
+
+    with count_queries() as queries:
+        game_view = GameView.model_validate(await game_controller.get_game_by_id(game.id, GAME_VIEW_LOADERS))
+    # The game and its room, then its users, then its turns
+    assert len(queries) == 3
+    assert game_view.room.id == room.id
+    assert [user.id for user in game_view.users] == [owner.id]
+    assert game_view.turns == []
+
+
 @pytest.mark.asyncio
 async def test_get_game_by_id_raises_exception_if_game_does_not_exist(
     user_controller: UserController,
@@ -542,6 +631,57 @@ async def test_create_turn_event(
     assert event.turn.completed == turn.completed
 
 
+@pytest.mark.asyncio
+async def test_create_turn_and_events_in_one_transaction(
+    user_controller: UserController,
+    room_controller: RoomController,
+    game_controller: GameController,
+    faker: Faker,
+    count_queries,
+):
+    owner = await user_controller.create_user(
+        UserCreate(
+            username=faker.user_name(),
+            email_address=faker.email(),
+            country=random.choice([country.alpha_3 for country in pycountry.countries]),
+            password=faker.password(),
+        )
+    )
+    room = await room_controller.create_room(
+        RoomCreate(
+            owner_id=owner.id,
+            password="".join(random.choice(string.digits) for _ in range(4)),
+            status=RoomStatus.ONLINE,
+        )
+    )
+    game = await game_controller.create_game(
+        GameCreate(room_id=room.id, type=GameType.UNDERCOVER, number_of_players=faker.random_int(min=4, max=10))
+    )
+    _ = await game_controller.create_turn(game.id)
+
+    with count_queries() as queries:
+        turn = await game_controller.create_turn(game.id)
+    # The game update, the turn and its link
+    assert len(queries) == 3
+    with count_queries() as queries:
+        events = [
+            await game_controller.create_turn_event(
+                game_id=game.id, event_create=EventCreate(name=faker.word(), data={"index": index}, user_id=owner.id)
+            )
+            for index in range(3)
+        ]
+    # The event and its link, for each event
+    assert len(queries) == 6
+
+    assert (await game_controller.get_game_by_id(game.id)).current_turn_id == turn.id
+    assert [event.turn_id for event in events] == [turn.id] * 3
+    assert [event.data for event in events] == [{"index": index} for index in range(3)]
+    turn_event_links = (
+        await game_controller.session.exec(select(TurnEventLink).where(TurnEventLink.turn_id == turn.id))
+    ).all()
+    assert {turn_event_link.event_id for turn_event_link in turn_event_links} == {event.id for event in events}
+
+
 @pytest.mark.asyncio
 async def test_create_turn_event_raises_exception_if_game_does_not_exist(
     game_controller: GameController,
@@ -589,6 +729,54 @@ async def test_create_event_raises_exception_if_game_does_not_have_turn(
         )
 
 
+@pytest.mark.asyncio
+async def test_create_event_raises_exception_if_game_gets_its_first_turn_during_the_insert(
+    user_controller: UserController,
+    room_controller: RoomController,
+    game_controller: GameController,
+    session: AsyncSession,
+    faker: Faker,
+    monkeypatch,
+):
+    owner = await user_controller.create_user(
+        UserCreate(
+            username=faker.user_name(),
+            email_address=faker.email(),
+            country=random.choice([country.alpha_3 for country in pycountry.countries]),
+            password=faker.password(),
+        )
+    )
+    room = await room_controller.create_room(
+        RoomCreate(
+            owner_id=owner.id,
+            password="".join(random.choice(string.digits) for _ in range(4)),
+            status=RoomStatus.ONLINE,
+        )
+    )
+    game = await game_controller.create_game(
+        GameCreate(
+            room_id=room.id,
+            type=GameType.UNDERCOVER,
+            number_of_players=faker.random_int(min=4, max=10),
+        )
+    )
+    game_id = game.id
+    get_latest_turn = game_controller.get_latest_turn
+
+    # The first turn of the game is created after the insert of the event found no turn
+    async def create_turn_then_get_latest_turn(game_id: UUID) -> Turn:
+        await game_controller.create_turn(game_id=game_id)
+        return await get_latest_turn(game_id)
+
+    monkeypatch.setattr(game_controller, "get_latest_turn", create_turn_then_get_latest_turn)
+    with pytest.raises(NoTurnInsideGameError):
+        await game_controller.create_turn_event(
+            game_id=game_id,
+            event_create=EventCreate(name="event", data={"key": "value"}, user_id=uuid4()),
+        )
+    assert (await session.exec(select(Event))).all() == []
+
+
 @pytest.mark.asyncio
 async def test_get_latest_turn(
     user_controller: UserController,
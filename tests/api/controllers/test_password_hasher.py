@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import pytest
+
+from ibg.api.controllers.password_hasher import PasswordHasher
+from ibg.api.models.error import PasswordHasherBusyError
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_refuses_the_hashes_over_its_queue_size():
+    password_hasher = PasswordHasher(rounds=4, workers=1, max_queue_size=2)
+
+    results = await asyncio.gather(*(password_hasher.hash(f"password-{i}") for i in range(5)), return_exceptions=True)
+
+    hashed_passwords = [result for result in results if isinstance(result, str)]
+    assert len(hashed_passwords) == 2
+    assert [(await password_hasher.verify(f"password-{i}", hashed_passwords[i]))[0] for i in range(2)] == [True, True]
+    assert [type(result) for result in results[2:]] == [PasswordHasherBusyError] * 3
+    status = password_hasher.status()
+    assert (status.hashes, status.rejected, status.queue_depth) == (2, 3, 0)
+    # The queue has room again
+    is_valid, _ = await password_hasher.verify("password", await password_hasher.hash("password"))
+    assert is_valid
+    password_hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_does_not_block_the_event_loop():
+    password_hasher = PasswordHasher(rounds=12, workers=1)
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    hashed_password = await password_hasher.hash("password")
+    ticker.cancel()
+
+    assert hashed_password.startswith("$2b$12$")
+    # The event loop kept running while the password was hashed
+    assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < 0.1
+    assert password_hasher.status().hash_time_max > 0.1
+    password_hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_hashes_with_a_random_salt(password_hasher: PasswordHasher):
+    hashed_password = await password_hasher.hash("password")
+
+    assert len(hashed_password) == 60
+    assert hashed_password.startswith("$2b$04$")
+    assert hashed_password != await password_hasher.hash("password")
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_verifies_the_passwords(password_hasher: PasswordHasher):
+    hashed_password = await password_hasher.hash("password")
+
+    assert await password_hasher.verify("password", hashed_password) == (True, None)
+    assert await password_hasher.verify("wrong_password", hashed_password) == (False, None)
@@ -1,3 +1,4 @@
+import asyncio
 import random
 import string
 
@@ -5,12 +6,14 @@ import pycountry
 import pytest
 from faker import Faker
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ibg.api.controllers.room import RoomController
 from ibg.api.controllers.user import UserController
 from ibg.api.models.error import (
     RoomNotFoundError,
+    RoomPublicIdUnavailableError,
     UserAlreadyInRoomError,
     UserNotFoundError,
     UserNotInRoomError,
@@ -18,7 +21,11 @@ from ibg.api.models.error import (
 )
 from ibg.api.models.relationship import RoomUserLink
 from ibg.api.models.room import RoomCreate, RoomJoin, RoomLeave, RoomStatus, RoomType
+from ibg.api.models.table import Room, User
 from ibg.api.models.user import UserCreate
+from ibg.api.models.view import ROOM_VIEW_LOADERS
+from ibg.database import create_app_engine
+from ibg.settings import Settings
 
 
 @pytest.mark.asyncio
@@ -26,7 +33,7 @@ async def test_create_room_with_valid_owner_and_password(
     user_controller: UserController,
     room_controller: RoomController,
     faker: Faker,
-    session: Session,
+    session: AsyncSession,
 ):
     # Arrange
     owner = UserCreate(
@@ -45,7 +52,7 @@ async def test_create_room_with_valid_owner_and_password(
     # Act
     room = await room_controller.create_room(room_create=room_create)
     db_room = await room_controller.get_room_by_id(room.id)
-    room_user_link = session.exec(select(RoomUserLink).where(RoomUserLink.room_id == room.id)).one()
+    room_user_link = (await session.exec(select(RoomUserLink).where(RoomUserLink.room_id == room.id))).one()
 
     # Assert
     assert room.owner_id == owner.id == db_room.owner_id
@@ -178,6 +185,43 @@ async def test_join_room_twice(user_controller: UserController, room_controller:
         _ = await room_controller.join_room(RoomJoin(room_id=room.id, user_id=user_to_join.id, password=room.password))
 
 
+@pytest.mark.asyncio
+async def test_join_room_while_connected_to_another_room(
+    room_controller: RoomController, faker: Faker, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+):
+    first_owner, second_owner, user = _create_owners(session, faker, 3)
+    await session.commit()
+    first_room = await room_controller.create_room(
+        RoomCreate(status=RoomStatus.ONLINE, owner_id=first_owner.id, password="1234")
+    )
+    second_room = await room_controller.create_room(
+        RoomCreate(status=RoomStatus.ONLINE, owner_id=second_owner.id, password="1234")
+    )
+    await room_controller.join_room(RoomJoin(room_id=first_room.id, user_id=user.id, password="1234"))
+
+    with pytest.raises(UserAlreadyInRoomError, match=f"is already in room with id {first_room.id}"):
+        await room_controller.join_room(RoomJoin(room_id=second_room.id, user_id=user.id, password="1234"))
+
+    # The user joined the first room between the check and the insert of the link
+    get_connected_link = room_controller._get_connected_link
+    checks = []
+
+    async def get_connected_link_before_join(user_id):
+        checks.append(user_id)
+        return None if len(checks) == 1 else await get_connected_link(user_id)
+
+    monkeypatch.setattr(room_controller, "_get_connected_link", get_connected_link_before_join)
+    user_id, first_room_id = user.id, first_room.id
+    with pytest.raises(UserAlreadyInRoomError, match=f"is already in room with id {first_room_id}"):
+        await room_controller.join_room(RoomJoin(room_id=second_room.id, user_id=user_id, password="1234"))
+    connected_links = (
+        await session.exec(
+            select(RoomUserLink).where(RoomUserLink.user_id == user_id).where(RoomUserLink.connected == True)  # noqa
+        )
+    ).all()
+    assert [link.room_id for link in connected_links] == [first_room_id]
+
+
 @pytest.mark.asyncio
 async def test_join_room_to_nonexistent_room(
     user_controller: UserController, room_controller: RoomController, faker: Faker
@@ -212,6 +256,103 @@ async def test_create_room_user_non_existent_owner(
         _ = await room_controller.create_room(room_create=room_create)
 
 
+def _create_owners(session: AsyncSession, faker: Faker, number_of_owners: int) -> list[User]:
+    owners = [
+        User(username=faker.user_name(), email_address=f"owner-{index}@example.com", password=faker.password())
+        for index in range(number_of_owners)
+    ]
+    session.add_all(owners)
+    return owners
+
+
+@pytest.mark.asyncio
+async def test_create_room_draws_another_public_id_when_taken(
+    room_controller: RoomController, faker: Faker, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+):
+    first_owner, second_owner = _create_owners(session, faker, 2)
+    await session.commit()
+    public_ids = iter(["AAAAA", "AAAAA", "BBBBB"])
+    monkeypatch.setattr("ibg.api.controllers.room.create_random_public_id", lambda: next(public_ids))
+
+    first_room = await room_controller.create_room(
+        RoomCreate(status=RoomStatus.ONLINE, owner_id=first_owner.id, password="1234")
+    )
+    second_room = await room_controller.create_room(
+        RoomCreate(status=RoomStatus.ONLINE, owner_id=second_owner.id, password="1234")
+    )
+
+    assert first_room.public_id == "AAAAA"
+    assert second_room.public_id == "BBBBB"
+    assert [user.id for user in second_room.users] == [second_owner.id]
+
+
+@pytest.mark.asyncio
+async def test_create_room_reuses_the_public_id_of_an_inactive_room(
+    room_controller: RoomController, faker: Faker, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+):
+    first_owner, second_owner = _create_owners(session, faker, 2)
+    await session.commit()
+    monkeypatch.setattr("ibg.api.controllers.room.create_random_public_id", lambda: "AAAAA")
+    first_room = await room_controller.create_room(
+        RoomCreate(status=RoomStatus.ONLINE, owner_id=first_owner.id, password="1234")
+    )
+
+    with pytest.raises(RoomPublicIdUnavailableError):
+        await room_controller.create_room(
+            RoomCreate(status=RoomStatus.ONLINE, owner_id=second_owner.id, password="1234")
+        )
+    await room_controller.leave_room(RoomLeave(room_id=first_room.id, user_id=first_owner.id))
+    second_room = await room_controller.create_room(
+        RoomCreate(status=RoomStatus.ONLINE, owner_id=second_owner.id, password="1234")
+    )
+
+    assert second_room.public_id == "AAAAA"
+    assert (await room_controller.get_active_room_by_public_id("AAAAA")).id == second_room.id
+
+
+@pytest.mark.asyncio
+async def test_create_rooms_concurrently(
+    database_url: str, faker: Faker, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+):
+    number_of_rooms = 2000
+    owners = _create_owners(session, faker, number_of_rooms)
+    await session.commit()
+    # Draw from 10 times as many public ids as there are rooms, so that some rooms draw a public id already taken
+    draws = []
+
+    def create_random_public_id() -> str:
+        draws.append(f"{random.randrange(number_of_rooms * 10):05d}")
+        return draws[-1]
+
+    monkeypatch.setattr("ibg.api.controllers.room.create_random_public_id", create_random_public_id)
+    # SQLite has a single writer, a few connections are enough to interleave the creations
+    engine = create_app_engine(
+        Settings(
+            database_url=database_url,
+            redis_om_url="",
+            logfire_token="fake_token",
+            database_pool_size=5,
+            database_max_overflow=0,
+        )
+    )
+
+    async def create_room(owner: User) -> Room:
+        async with AsyncSession(engine, expire_on_commit=False) as room_session:
+            return await RoomController(room_session).create_room(
+                RoomCreate(status=RoomStatus.ONLINE, owner_id=owner.id, password="1234")
+            )
+
+    try:
+        rooms = await asyncio.gather(*(create_room(owner) for owner in owners))
+    finally:
+        await engine.dispose()
+
+    public_ids = (await session.exec(select(Room.public_id).where(Room.type == RoomType.ACTIVE))).all()
+    assert len(public_ids) == len(set(public_ids)) == number_of_rooms
+    assert sorted(public_ids) == sorted(room.public_id for room in rooms)
+    assert len(draws) > number_of_rooms
+
+
 @pytest.mark.asyncio
 async def test_get_empty_list_rooms(room_controller: RoomController):
     rooms = await room_controller.get_rooms()
@@ -241,28 +382,64 @@ async def test_get_rooms(user_controller: UserController, room_controller: RoomC
         )
         for user in users
     ]
+    # Rooms are listed by id
+    create_rooms.sort(key=lambda room: room.id)
     db_rooms = await room_controller.get_rooms()
     assert len(db_rooms) == 3
-    assert db_rooms[0].owner_id == users[0].id
+    assert db_rooms[0].owner_id == create_rooms[0].owner_id
     assert db_rooms[0].status == create_rooms[0].status
     assert db_rooms[0].type == create_rooms[0].type
     assert db_rooms[0].password == create_rooms[0].password
     assert db_rooms[0].id == create_rooms[0].id
     assert db_rooms[0].public_id == create_rooms[0].public_id
-    assert db_rooms[1].owner_id == users[1].id
+    assert db_rooms[1].owner_id == create_rooms[1].owner_id
     assert db_rooms[1].status == create_rooms[1].status
     assert db_rooms[1].type == create_rooms[1].type
     assert db_rooms[1].password == create_rooms[1].password
     assert db_rooms[1].id == create_rooms[1].id
     assert db_rooms[1].public_id == create_rooms[1].public_id
     assert db_rooms[2].public_id == create_rooms[2].public_id
-    assert db_rooms[2].owner_id == users[2].id
+    assert db_rooms[2].owner_id == create_rooms[2].owner_id
     assert db_rooms[2].status == create_rooms[2].status
     assert db_rooms[2].type == create_rooms[2].type
     assert db_rooms[2].password == create_rooms[2].password
     assert db_rooms[2].id == create_rooms[2].id
 
 
+@pytest.mark.asyncio
+async def test_get_rooms_paginates_and_streams(
+    user_controller: UserController, room_controller: RoomController, faker: Faker
+):
+    rooms = []
+    for _ in range(3):
+        user = await user_controller.create_user(
+            UserCreate(
+                username=faker.user_name(),
+                email_address=faker.unique.email(),
+                country=random.choice([country.alpha_3 for country in pycountry.countries]),
+                password=faker.password(),
+            )
+        )
+        rooms.append(
+            await room_controller.create_room(
+                RoomCreate(
+                    status=RoomStatus.ONLINE,
+                    owner_id=user.id,
+                    password="".join(random.choice(string.digits) for _ in range(4)),
+                )
+            )
+        )
+    rooms.sort(key=lambda room: room.id)
+
+    first_page = await room_controller.get_rooms(limit=2)
+    last_page = await room_controller.get_rooms(limit=2, after=first_page[-1].id)
+    assert [room.id for room in first_page + last_page] == [room.id for room in rooms]
+
+    streamed_rooms = [room async for room in room_controller.stream_rooms(after=rooms[0].id, loaders=ROOM_VIEW_LOADERS)]
+    assert [room.id for room in streamed_rooms] == [room.id for room in rooms[1:]]
+    assert [[user.id for user in room.users] for room in streamed_rooms] == [[room.owner_id] for room in rooms[1:]]
+
+
 @pytest.mark.asyncio
 async def test_get_room_by_id(user_controller: UserController, room_controller: RoomController, faker: Faker):
     user = await user_controller.create_user(
@@ -457,7 +634,7 @@ async def test_leave_room_non_existent_room(
 async def test_leave_room_owner(
     user_controller: UserController,
     room_controller: RoomController,
-    session: Session,
+    session: AsyncSession,
     faker: Faker,
 ):
     owner = await user_controller.create_user(
@@ -476,7 +653,7 @@ async def test_leave_room_owner(
         )
     )
     empty_room = await room_controller.leave_room(RoomLeave(room_id=room.id, user_id=owner.id))
-    room_user_link = session.exec(select(RoomUserLink).where(RoomUserLink.room_id == room.id)).one()
+    room_user_link = (await session.exec(select(RoomUserLink).where(RoomUserLink.room_id == room.id))).one()
 
     assert empty_room.status == room.status
     assert empty_room.owner_id == owner.id
@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta
 from uuid import uuid4
 
 import pytest
@@ -5,7 +6,10 @@ from faker import Faker
 from sqlalchemy.exc import NoResultFound
 from sqlmodel import select
 
+from ibg.api.controllers.game import GameController
+from ibg.api.controllers.room import RoomController
 from ibg.api.controllers.undercover import UndercoverController
+from ibg.api.controllers.user import UserController
 from ibg.api.models.error import (
     TermPairAlreadyExistsError,
     TermPairNotFoundError,
@@ -13,7 +17,10 @@ from ibg.api.models.error import (
     WordNotFoundErrorId,
     WordNotFoundErrorName,
 )
+from ibg.api.models.game import GameCreate, GameType
+from ibg.api.models.room import RoomCreate, RoomStatus
 from ibg.api.models.undercover import TermPair, Word, WordCreate, WordUpdate
+from ibg.api.models.user import UserCreate
 
 
 @pytest.mark.asyncio
@@ -57,7 +64,7 @@ async def test_get_all_words(undercover_controller: UndercoverController, faker:
             long_description=faker.text(),
         )
         words.append(await undercover_controller.create_word(word_create))
-    result = undercover_controller.session.exec(select(Word)).all()
+    result = (await undercover_controller.session.exec(select(Word))).all()
     assert len(result) == 3
     for word, db_word in zip(words, result):
         assert word.word == db_word.word
@@ -201,6 +208,8 @@ async def test_get_words_by_category(undercover_controller: UndercoverController
         )
         for _ in range(2)
     ]
+    # Words are listed by id
+    words.sort(key=lambda word: word.id)
     result = await undercover_controller.get_words_by_category(category_one)
     assert len(result) == 2
     assert words[0].word == result[0].word
@@ -283,7 +292,7 @@ async def test_get_all_term_pairs(undercover_controller: UndercoverController, f
             )
         )
         term_pairs.append(await undercover_controller.create_term_pair(word1.id, word2.id))
-    result = undercover_controller.session.exec(select(TermPair)).all()
+    result = (await undercover_controller.session.exec(select(TermPair))).all()
     assert len(result) == 3
     for term_pair, db_term_pair in zip(term_pairs, result):
         assert term_pair.word1_id == db_term_pair.word1_id
@@ -355,6 +364,122 @@ async def test_get_random_term_pair_raises_exception_if_no_term_pairs_exist(
         await undercover_controller.get_random_term_pair()
 
 
+async def _create_term_pair(
+    undercover_controller: UndercoverController, faker: Faker, category: str | None = None
+) -> tuple[TermPair, Word, Word]:
+    words = [
+        await undercover_controller.create_word(
+            WordCreate(
+                word=faker.unique.word(),
+                category=category or faker.word(),
+                short_description=faker.sentence(),
+                long_description=faker.text(),
+            )
+        )
+        for _ in range(2)
+    ]
+    return await undercover_controller.create_term_pair(words[0].id, words[1].id), words[0], words[1]
+
+
+@pytest.mark.asyncio
+async def test_get_random_term_pair_with_words(undercover_controller: UndercoverController, faker: Faker):
+    term_pairs = {}
+    for _ in range(5):
+        term_pair, word1, word2 = await _create_term_pair(undercover_controller, faker)
+        term_pairs[term_pair.id] = (term_pair, word1, word2)
+    for _ in range(20):
+        term_pair, word1, word2 = await undercover_controller.get_random_term_pair_with_words()
+        assert term_pair.id in term_pairs
+        assert word1.id == term_pair.word1_id
+        assert word2.id == term_pair.word2_id
+        assert word1.word == term_pairs[term_pair.id][1].word
+        assert word2.word == term_pairs[term_pair.id][2].word
+
+
+@pytest.mark.asyncio
+async def test_get_random_term_pair_with_words_can_pick_every_term_pair(
+    undercover_controller: UndercoverController, faker: Faker, monkeypatch
+):
+    term_pairs = sorted(
+        [(await _create_term_pair(undercover_controller, faker))[0] for _ in range(3)], key=lambda t: t.id
+    )
+    offsets = []
+
+    def randrange(count):
+        assert count == 3
+        return offsets.pop()
+
+    monkeypatch.setattr("ibg.api.controllers.undercover.random.randrange", randrange)
+    for index, term_pair in enumerate(term_pairs):
+        offsets.append(index)
+        result, _, _ = await undercover_controller.get_random_term_pair_with_words()
+        assert result.id == term_pair.id
+
+
+@pytest.mark.asyncio
+async def test_get_random_term_pair_with_words_by_category(undercover_controller: UndercoverController, faker: Faker):
+    for _ in range(5):
+        await _create_term_pair(undercover_controller, faker, category="Pillars of Islam")
+    term_pair, _, _ = await _create_term_pair(undercover_controller, faker, category="Islamic History")
+    for _ in range(10):
+        result, word1, _ = await undercover_controller.get_random_term_pair_with_words(category="Islamic History")
+        assert result.id == term_pair.id
+        assert word1.category == "Islamic History"
+    with pytest.raises(NoResultFound):
+        await undercover_controller.get_random_term_pair_with_words(category="Islamic Rituals")
+
+
+@pytest.mark.asyncio
+async def test_get_random_term_pair_with_words_excludes_term_pairs(
+    undercover_controller: UndercoverController, faker: Faker
+):
+    term_pairs = [(await _create_term_pair(undercover_controller, faker))[0] for _ in range(3)]
+    excluded_term_pair_ids = [term_pairs[0].id, term_pairs[1].id]
+    for _ in range(10):
+        result, _, _ = await undercover_controller.get_random_term_pair_with_words(
+            excluded_term_pair_ids=excluded_term_pair_ids
+        )
+        assert result.id == term_pairs[2].id
+    with pytest.raises(NoResultFound):
+        await undercover_controller.get_random_term_pair_with_words(
+            excluded_term_pair_ids=[term_pair.id for term_pair in term_pairs]
+        )
+
+
+@pytest.mark.asyncio
+async def test_get_recent_term_pair_ids(
+    undercover_controller: UndercoverController,
+    user_controller: UserController,
+    room_controller: RoomController,
+    game_controller: GameController,
+    faker: Faker,
+):
+    owner = await user_controller.create_user(
+        UserCreate(
+            username=faker.user_name(),
+            email_address=faker.email(),
+            password=faker.password(),
+        )
+    )
+    room = await room_controller.create_room(RoomCreate(owner_id=owner.id, password="1234", status=RoomStatus.ONLINE))
+    term_pair_ids = []
+    for index in range(4):
+        term_pair, _, _ = await _create_term_pair(undercover_controller, faker)
+        term_pair_ids.append(term_pair.id)
+        await game_controller.create_game(
+            GameCreate(
+                room_id=room.id,
+                type=GameType.UNDERCOVER,
+                number_of_players=4,
+                start_time=datetime.now() + timedelta(minutes=index),
+                game_configurations={"term_pair_id": str(term_pair.id)},
+            )
+        )
+
+    result = await undercover_controller.get_recent_term_pair_ids(room.id, number_of_games=3)
+    assert result == term_pair_ids[::-1][:3]
+
+
 @pytest.mark.asyncio
 async def test_delete_term_pair(undercover_controller: UndercoverController, faker: Faker):
     word1 = await undercover_controller.create_word(
@@ -385,3 +510,20 @@ async def test_delete_term_pair_raises_exception_if_term_pair_does_not_exist(
 ):
     with pytest.raises(TermPairNotFoundError):
         await undercover_controller.delete_term_pair(uuid4())
+
+
+@pytest.mark.asyncio
+async def test_get_words_and_term_pairs_paginate_by_id(undercover_controller: UndercoverController, faker: Faker):
+    created = [await _create_term_pair(undercover_controller, faker) for _ in range(3)]
+    words = sorted((word for _, word1, word2 in created for word in (word1, word2)), key=lambda word: word.id)
+    term_pairs = sorted((term_pair for term_pair, _, _ in created), key=lambda term_pair: term_pair.id)
+
+    first_page = await undercover_controller.get_words(limit=4)
+    last_page = await undercover_controller.get_words(limit=4, after=first_page[-1].id)
+    assert [word.id for word in [*first_page, *last_page]] == [word.id for word in words]
+    assert len(last_page) == 2
+
+    page = await undercover_controller.get_term_pairs(limit=1, after=term_pairs[0].id)
+    assert [term_pair.id for term_pair in page] == [term_pairs[1].id]
+    streamed = [term_pair async for term_pair in undercover_controller.stream_term_pairs(after=term_pairs[0].id)]
+    assert [term_pair.id for term_pair in streamed] == [term_pair.id for term_pair in term_pairs[1:]]
@@ -3,8 +3,10 @@ import random
 import pycountry
 import pytest
 from faker import Faker
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from ibg.api.controllers.password_hasher import PasswordHasher
 from ibg.api.controllers.user import UserController
 from ibg.api.models.error import UserAlreadyExistsError, UserNotFoundError
 from ibg.api.models.table import User
@@ -12,7 +14,9 @@ from ibg.api.models.user import UserCreate, UserUpdate
 
 
 @pytest.mark.asyncio
-async def test_creates_new_user_with_valid_input(user_controller: UserController, session: Session, faker: Faker):
+async def test_creates_new_user_with_valid_input(
+    user_controller: UserController, password_hasher: PasswordHasher, session: AsyncSession, faker: Faker
+):
     # Arrange
     user_create = UserCreate(
         username=faker.user_name(),
@@ -23,13 +27,15 @@ async def test_creates_new_user_with_valid_input(user_controller: UserController
 
     # Act
     result = await user_controller.create_user(user_create)
-    db_user = session.exec(select(User).where(User.id == result.id)).one()
+    db_user = (await session.exec(select(User).where(User.id == result.id))).one()
 
     # Assert
     assert result.username == user_create.username == db_user.username
     assert result.email_address == user_create.email_address == db_user.email_address
     assert result.country == user_create.country == db_user.country
-    assert result.password == user_create.password == db_user.password
+    assert result.password == db_user.password != user_create.password
+    is_valid, _ = await password_hasher.verify(user_create.password, db_user.password)
+    assert is_valid
     assert db_user.id == result.id
 
 
@@ -51,6 +57,42 @@ async def test_create_two_users_with_same_email_address(user_controller: UserCon
         await user_controller.create_user(user_create)
 
 
+async def _create_users(user_controller: UserController, faker: Faker, number_of_users: int) -> list[User]:
+    return [
+        await user_controller.create_user(
+            UserCreate(
+                username=faker.user_name(),
+                email_address=faker.unique.email(),
+                country=random.choice([country.alpha_3 for country in pycountry.countries]),
+                password=faker.password(),
+            )
+        )
+        for _ in range(number_of_users)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_users_paginates_by_id(user_controller: UserController, faker: Faker):
+    users = sorted(await _create_users(user_controller, faker, 5), key=lambda user: user.id)
+
+    first_page = await user_controller.get_users(limit=2)
+    second_page = await user_controller.get_users(limit=2, after=first_page[-1].id)
+    last_page = await user_controller.get_users(limit=2, after=second_page[-1].id)
+
+    assert [user.id for user in first_page + second_page + last_page] == [user.id for user in users]
+    assert len(last_page) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_users(user_controller: UserController, faker: Faker):
+    users = sorted(await _create_users(user_controller, faker, 5), key=lambda user: user.id)
+
+    streamed_users = [user async for user in user_controller.stream_users()]
+    assert [user.id for user in streamed_users] == [user.id for user in users]
+    streamed_users = [user async for user in user_controller.stream_users(after=users[2].id)]
+    assert [user.id for user in streamed_users] == [user.id for user in users[3:]]
+
+
 @pytest.mark.asyncio
 async def test_raises_exception_if_user_create_is_none(user_controller: UserController):
     with pytest.raises(Exception):
@@ -69,7 +111,7 @@ async def test_empty_list_when_no_users(user_controller: UserController):
 
 
 @pytest.mark.asyncio
-async def test_list_few_users(user_controller: UserController, faker: Faker):
+async def test_list_few_users(user_controller: UserController, password_hasher: PasswordHasher, faker: Faker):
     # Arrange
     users = [
         UserCreate(
@@ -86,15 +128,21 @@ async def test_list_few_users(user_controller: UserController, faker: Faker):
 
     # Assert
     assert len(db_users) == 5
-    for user, created_user, db_user in zip(users, created_users, db_users):
+    # Users are listed by id
+    created = sorted(zip(users, created_users), key=lambda created: created[1].id)
+    for (user, created_user), db_user in zip(created, db_users):
         assert user.username == created_user.username == db_user.username
         assert user.email_address == created_user.email_address == db_user.email_address
         assert user.country == created_user.country == db_user.country
-        assert user.password == created_user.password == db_user.password
+        assert created_user.password == db_user.password
+        is_valid, _ = await password_hasher.verify(user.password, db_user.password)
+        assert is_valid
 
 
 @pytest.mark.asyncio
-async def test_returns_user_with_valid_uuid(user_controller: UserController, faker: Faker):
+async def test_returns_user_with_valid_uuid(
+    user_controller: UserController, password_hasher: PasswordHasher, faker: Faker
+):
     # Arrange
     user_create = UserCreate(
         username=faker.user_name(),
@@ -112,7 +160,9 @@ async def test_returns_user_with_valid_uuid(user_controller: UserController, fak
     assert result.username == user_create.username == new_user.username
     assert result.email_address == user_create.email_address == new_user.email_address
     assert result.country == user_create.country == new_user.country
-    assert result.password == user_create.password == new_user.password
+    assert result.password == new_user.password
+    is_valid, _ = await password_hasher.verify(user_create.password, result.password)
+    assert is_valid
 
 
 @pytest.mark.asyncio
@@ -157,7 +207,7 @@ async def test_update_user_with_invalid_user_id(user_controller: UserController,
 
 
 @pytest.mark.asyncio
-async def test_delete_user(user_controller: UserController, session: Session, faker: Faker):
+async def test_delete_user(user_controller: UserController, session: AsyncSession, faker: Faker):
     # Arrange
     user_create = UserCreate(
         username=faker.user_name(),
@@ -186,7 +236,9 @@ async def test_delete_user_bad_behavior(user_controller: UserController, faker:
 
 
 @pytest.mark.asyncio
-async def test_update_user_password(user_controller: UserController, session: Session, faker: Faker):
+async def test_update_user_password(
+    user_controller: UserController, password_hasher: PasswordHasher, session: AsyncSession, faker: Faker
+):
     # Arrange
     user_create = UserCreate(
         username=faker.user_name(),
@@ -206,7 +258,8 @@ async def test_update_user_password(user_controller: UserController, session: Se
     assert updated_user.username == new_user.username
     assert updated_user.email_address == new_user.email_address
     assert updated_user.country == new_user.country
-    assert updated_user.password == new_password
+    is_valid, _ = await password_hasher.verify(new_password, updated_user.password)
+    assert is_valid
 
 
 @pytest.mark.asyncio
@@ -218,3 +271,53 @@ async def test_update_user_password_that_doesnt_exist(user_controller: UserContr
     # Act & Assert
     with pytest.raises(UserNotFoundError, match="User with id .* not found"):
         await user_controller.update_user_password(non_existent_id, new_password)
+
+
+@pytest.mark.asyncio
+async def test_verify_password_rehashes_the_outdated_hashes(
+    user_controller: UserController, session: AsyncSession, faker: Faker
+):
+    # Arrange
+    user_create = UserCreate(
+        username=faker.user_name(),
+        email_address=faker.email(),
+        country=random.choice([country.alpha_3 for country in pycountry.countries]),
+        password=faker.password(),
+    )
+    user = await user_controller.create_user(user_create)
+    hashed_password = user.password
+    password_hasher = PasswordHasher(rounds=5, workers=1)
+    stronger_user_controller = UserController(session, password_hasher)
+
+    # Act & Assert
+    assert await user_controller.verify_password(user.id, user_create.password) is True
+    assert user.password == hashed_password
+    assert await stronger_user_controller.verify_password(user.id, "wrong password") is False
+    assert user.password == hashed_password
+    # The hash of the cost factor 4 is replaced by a hash of the cost factor 5
+    assert await stronger_user_controller.verify_password(user.id, user_create.password) is True
+    db_user = (await session.exec(select(User).where(User.id == user.id))).one()
+    assert db_user.password.startswith("$2b$05$")
+    is_valid, _ = await password_hasher.verify(user_create.password, db_user.password)
+    assert is_valid
+    assert password_hasher.status().rehashes == 1
+    password_hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_verify_password_hashes_the_plain_passwords(
+    user_controller: UserController, session: AsyncSession, faker: Faker
+):
+    # Arrange
+    password = faker.password()
+    # A user stored before the passwords were hashed
+    user = User(username=faker.user_name(), email_address=faker.email(), country="FRA", password=password)
+    session.add(user)
+    await session.commit()
+
+    # Act & Assert
+    assert await user_controller.verify_password(user.id, "wrong password") is False
+    assert user.password == password
+    assert await user_controller.verify_password(user.id, password) is True
+    assert user.password.startswith("$2b$04$")
+    assert await user_controller.verify_password(user.id, password) is True
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from faker import Faker
+from fakeredis.aioredis import FakeRedis
+from sqlalchemy.exc import NoResultFound
+
+from ibg.api.controllers.undercover import UndercoverController
+from ibg.api.controllers.word_bank import WordBank
+from ibg.api.models.undercover import WordCreate, WordUpdate
+
+
+async def _create_word(undercover_controller: UndercoverController, faker: Faker, category: str | None = None):
+    return await undercover_controller.create_word(
+        WordCreate(
+            word=faker.unique.word(),
+            category=category or faker.word(),
+            short_description=faker.sentence(),
+            long_description=faker.text(),
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_word_bank_serves_reads_from_memory(undercover_controller: UndercoverController, faker: Faker):
+    word = await _create_word(undercover_controller, faker)
+    word_bank = undercover_controller.word_bank
+
+    assert (await undercover_controller.get_word_by_id(word.id)).word == word.word
+    assert word_bank.metrics.misses == 1
+    assert word_bank.metrics.loads == 1
+
+    assert (await undercover_controller.get_word_by_word(word.word)).id == word.id
+    assert [w.id for w in await undercover_controller.get_words_by_category(word.category)] == [word.id]
+    assert [w.id for w in await undercover_controller.get_words()] == [word.id]
+    assert word_bank.metrics.hits == 3
+    assert word_bank.metrics.loads == 1
+    assert word_bank.metrics.words == 1
+
+
+@pytest.mark.asyncio
+async def test_word_bank_is_invalidated_on_write(undercover_controller: UndercoverController, faker: Faker):
+    word = await _create_word(undercover_controller, faker)
+    assert len(await undercover_controller.get_words()) == 1
+
+    await undercover_controller.update_word(
+        word.id, WordUpdate(**word.model_dump(exclude={"id", "word"}), word="updated")
+    )
+    assert not undercover_controller.word_bank.loaded
+    assert (await undercover_controller.get_word_by_id(word.id)).word == "updated"
+
+    other_word = await _create_word(undercover_controller, faker)
+    term_pair = await undercover_controller.create_term_pair(word.id, other_word.id)
+    assert [t.id for t in await undercover_controller.get_term_pairs()] == [term_pair.id]
+
+    await undercover_controller.delete_term_pair(term_pair.id)
+    assert await undercover_controller.get_term_pairs() == []
+    assert undercover_controller.word_bank.metrics.invalidations == 5
+    assert undercover_controller.word_bank.metrics.loads == 4
+
+
+@pytest.mark.asyncio
+async def test_word_bank_random_term_pair(undercover_controller: UndercoverController, faker: Faker):
+    words = [await _create_word(undercover_controller, faker, category="animals") for _ in range(4)]
+    first = await undercover_controller.create_term_pair(words[0].id, words[1].id)
+    second = await undercover_controller.create_term_pair(words[2].id, words[3].id)
+    await undercover_controller.get_words()
+
+    for _ in range(10):
+        term_pair, word1, word2 = await undercover_controller.get_random_term_pair_with_words(
+            category="animals", excluded_term_pair_ids=[first.id]
+        )
+        assert term_pair.id == second.id
+        assert (word1.id, word2.id) == (words[2].id, words[3].id)
+    with pytest.raises(NoResultFound):
+        await undercover_controller.get_random_term_pair_with_words(excluded_term_pair_ids=[first.id, second.id])
+    with pytest.raises(NoResultFound):
+        await undercover_controller.get_random_term_pair_with_words(category="plants")
+
+
+@pytest.mark.asyncio
+async def test_word_bank_invalidation_is_broadcast(undercover_controller: UndercoverController, faker: Faker):
+    redis = FakeRedis(decode_responses=True)
+    other_worker = WordBank()
+    await other_worker.load(undercover_controller.session)
+    await other_worker.listen(redis)
+    await undercover_controller.word_bank.listen(redis)
+    await asyncio.sleep(0.1)
+
+    await _create_word(undercover_controller, faker)
+    for _ in range(50):
+        if not other_worker.loaded:
+            break
+        await asyncio.sleep(0.01)
+    assert not other_worker.loaded
+    # A worker ignores its own broadcasts
+    assert undercover_controller.word_bank.metrics.invalidations == 1
+
+    await other_worker.stop()
+    await undercover_controller.word_bank.stop()
@@ -0,0 +1,166 @@
+import asyncio
+from typing import Awaitable, Callable
+from uuid import UUID
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ibg.api.controllers.room import RoomController
+from ibg.api.models.error import UserAlreadyInRoomError
+from ibg.api.models.relationship import RoomUserLink
+from ibg.api.models.room import RoomCreate, RoomStatus
+from ibg.api.models.table import Turn
+from ibg.database import create_app_engine, create_db_and_tables
+from ibg.settings import Settings
+
+NUMBER_OF_ROWS = 10_000
+
+# Fill the tables in SQL, the rows are not built in Python. With ANALYZE, ten thousand rows are enough for the
+# planner to prefer the indexes. Every tenth room is active, a room has ten users, three
+# quarters of them connected, and a game has twenty turns
+FILL_STATEMENTS = [
+    """
+    WITH RECURSIVE row(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM row WHERE i < :rows)
+    INSERT INTO roomuserlink (room_id, user_id, joined_at, connected)
+    SELECT printf('%032x', i / 10), lower(hex(randomblob(16))), datetime('now'), i % 4 != 0 FROM row
+    """,
+    """
+    WITH RECURSIVE row(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM row WHERE i < :rows)
+    INSERT INTO room (id, public_id, owner_id, password, status, created_at, type)
+    SELECT printf('%032x', i), printf('%05d', (i / 10) % 100000), lower(hex(randomblob(16))), '1234', 'ONLINE',
+        datetime('now'), CASE WHEN i % 10 = 0 THEN 'ACTIVE' ELSE 'INACTIVE' END
+    FROM row
+    """,
+    """
+    WITH RECURSIVE row(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM row WHERE i < :rows)
+    INSERT INTO turn (id, game_id, start_time, completed)
+    SELECT printf('%032x', i), printf('%032x', i / 20), datetime('now', '-' || i || ' seconds'), 0 FROM row
+    """,
+]
+
+
+async def fill_tables(engine: AsyncEngine) -> None:
+    await create_db_and_tables(engine)
+    async with engine.connect() as connection:
+        # The rows reference users and games that don't exist
+        await connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        for statement in FILL_STATEMENTS:
+            await connection.exec_driver_sql(statement.replace(":rows", str(NUMBER_OF_ROWS)))
+        await connection.commit()
+        # Give the query planner the statistics of the tables, as a database that has been running would have
+        await connection.exec_driver_sql("ANALYZE")
+    # Don't keep the connection without foreign keys in the pool
+    await engine.dispose()
+
+
+@pytest.fixture(name="large_engine", scope="module")
+def generate_large_sqlite_engine(tmp_path_factory) -> AsyncEngine:
+    database_url = f"sqlite+aiosqlite:///{tmp_path_factory.mktemp('large_database') / 'large.db'}"
+    engine = create_app_engine(Settings(database_url=database_url, redis_om_url="", logfire_token="fake_token"))
+    asyncio.run(fill_tables(engine))
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+async def get_query_plans(engine: AsyncEngine, run: Callable[[AsyncSession], Awaitable]) -> list[str]:
+    """
+    Run queries in a session and return the plan SQLite chose for each SELECT, e.g.
+    "SEARCH room USING INDEX ix_room_active_public_id (public_id=?)".
+    """
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record_statement)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            try:
+                await run(session)
+            except UserAlreadyInRoomError:
+                pass
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record_statement)
+    plans = []
+    async with engine.connect() as connection:
+        for statement, parameters in statements:
+            rows = (await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+            plans.append(" / ".join(row.detail for row in rows))
+    return plans
+
+
+async def get_connected_link(engine: AsyncEngine) -> RoomUserLink:
+    async with AsyncSession(engine) as session:
+        statement = select(RoomUserLink).where(RoomUserLink.connected == True).limit(1)  # noqa: E712
+        return (await session.exec(statement)).one()
+
+
+@pytest.mark.asyncio
+async def test_create_room_reads_the_room_of_the_owner_from_the_connected_users_index(large_engine: AsyncEngine):
+    link = await get_connected_link(large_engine)
+
+    plans = await get_query_plans(
+        large_engine,
+        lambda session: RoomController(session).create_room(
+            RoomCreate(status=RoomStatus.ONLINE, owner_id=link.user_id, password="1234")
+        ),
+    )
+
+    assert plans == ["SEARCH roomuserlink USING INDEX ix_roomuserlink_connected_user_id (user_id=?)"]
+
+
+@pytest.mark.asyncio
+async def test_room_membership_is_read_from_the_membership_index(large_engine: AsyncEngine):
+    link = await get_connected_link(large_engine)
+
+    plans = await get_query_plans(
+        large_engine,
+        lambda session: RoomController(session).check_if_user_is_in_room(link.user_id, link.room_id),
+    )
+
+    assert plans == [
+        "SEARCH roomuserlink USING INDEX ix_roomuserlink_room_id_user_id_connected"
+        " (room_id=? AND user_id=? AND connected=?)"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_link_of_a_user_leaving_a_room_is_read_from_the_membership_index(large_engine: AsyncEngine):
+    link = await get_connected_link(large_engine)
+
+    # The lookup of the link in leave_room, the room and the user are read before it
+    async def read_link(session: AsyncSession):
+        await session.exec(
+            select(RoomUserLink).where(RoomUserLink.room_id == link.room_id).where(RoomUserLink.user_id == link.user_id)
+        )
+
+    plans = await get_query_plans(large_engine, read_link)
+
+    assert plans == [
+        "SEARCH roomuserlink USING INDEX ix_roomuserlink_room_id_user_id_connected (room_id=? AND user_id=?)"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_active_room_is_read_from_the_active_public_ids_index(large_engine: AsyncEngine):
+    plans = await get_query_plans(
+        large_engine, lambda session: RoomController(session).get_active_room_by_public_id("00042")
+    )
+
+    assert plans == ["SEARCH room USING INDEX ix_room_active_public_id (public_id=?)"]
+
+
+@pytest.mark.asyncio
+async def test_latest_turn_of_a_game_is_read_from_the_turns_index(large_engine: AsyncEngine):
+    game_id = UUID(int=42)
+
+    async def read_latest_turn(session: AsyncSession):
+        await session.exec(select(Turn).where(Turn.game_id == game_id).order_by(Turn.start_time.desc()).limit(1))
+
+    plans = await get_query_plans(large_engine, read_latest_turn)
+
+    assert plans == ["SEARCH turn USING INDEX ix_turn_game_id_start_time (game_id=?)"]
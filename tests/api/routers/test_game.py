@@ -70,6 +70,7 @@ async def test_get_games(game_controller: GameController, app: FastAPI, client:
             "id": str(game.id),
             "room_id": str(game.room_id),
             "user_id": str(game.user_id),
+            "current_turn_id": None,
             "start_time": game.start_time.isoformat(),
             "end_time": game.end_time.isoformat(),
             "number_of_players": game.number_of_players,
@@ -125,6 +126,7 @@ async def test_create_game(game_controller: GameController, app: FastAPI, client
         "id": str(mock_game.id),
         "room_id": str(mock_game.room_id),
         "user_id": str(mock_game.user_id),
+        "current_turn_id": None,
         "start_time": mock_game.start_time.isoformat(),
         "end_time": mock_game.end_time.isoformat(),
         "number_of_players": mock_game.number_of_players,
@@ -198,6 +200,7 @@ async def test_get_game_by_id(game_controller: GameController, app: FastAPI, cli
         "id": str(mock_game.id),
         "room_id": str(mock_game.room_id),
         "user_id": str(mock_game.user_id),
+        "current_turn_id": None,
         "start_time": mock_game.start_time.isoformat(),
         "end_time": mock_game.end_time.isoformat(),
         "number_of_players": mock_game.number_of_players,
@@ -268,6 +271,7 @@ async def test_update_game(game_controller: GameController, app: FastAPI, client
         "id": str(mock_game.id),
         "room_id": str(mock_game.room_id),
         "user_id": str(mock_game.user_id),
+        "current_turn_id": None,
         "start_time": mock_game.start_time.isoformat(),
         "end_time": mock_game.end_time.isoformat(),
         "number_of_players": mock_game.number_of_players,
@@ -308,6 +312,7 @@ async def test_end_game(game_controller: GameController, app: FastAPI, client: T
         "id": str(mock_game.id),
         "room_id": str(mock_game.room_id),
         "user_id": str(mock_game.user_id),
+        "current_turn_id": None,
         "start_time": mock_game.start_time.isoformat(),
         "end_time": mock_game.end_time.isoformat(),
         "number_of_players": mock_game.number_of_players,
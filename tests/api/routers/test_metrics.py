@@ -0,0 +1,182 @@
+import pytest
+from fastapi import FastAPI
+from redis.exceptions import ConnectionError
+from sqlalchemy.exc import TimeoutError
+from starlette.testclient import TestClient
+
+from ibg.api.controllers.event_writer import EventWriter, get_event_writer
+from ibg.api.controllers.password_hasher import PasswordHasher, get_password_hasher
+from ibg.api.controllers.word_bank import WordBank, WordBankMetrics
+from ibg.database import EngineRegistry, RedisRegistry, get_redis_registry
+from ibg.dependencies import get_database_registry, get_word_bank
+from ibg.settings import Settings
+from ibg.socketio.controllers.room_shards import RoomShards, get_room_shards
+
+
+@pytest.mark.asyncio
+async def test_get_database_metrics(app: FastAPI, client: TestClient):
+    engine_registry = EngineRegistry(Settings(database_pool_size=1, database_max_overflow=0, database_pool_timeout=0.1))
+    app.dependency_overrides[get_database_registry] = lambda: engine_registry
+
+    for _ in range(10):
+        async with engine_registry.session() as session:
+            await session.connection()
+    async with engine_registry.session() as session:
+        await session.connection()
+        # The only connection of the pool is in use
+        with pytest.raises(TimeoutError):
+            async with engine_registry.session() as other_session:
+                await other_session.connection()
+
+    get_metrics_route_response = client.get("/metrics/database")
+    assert get_metrics_route_response.status_code == 200
+    metrics = get_metrics_route_response.json()
+    assert metrics["checkouts"] == 11
+    assert metrics["checkins"] == 11
+    assert metrics["checked_out"] == 0
+    assert metrics["connects"] == 1
+    assert metrics["waits"] == 1
+    assert metrics["pool_size"] == 1
+    assert metrics["wait_time_avg"] >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_get_redis_metrics(app: FastAPI, client: TestClient):
+    redis_registry = RedisRegistry(Settings(redis_max_connections=2, redis_pool_timeout=0.1))
+    app.dependency_overrides[get_redis_registry] = lambda: redis_registry
+
+    for _ in range(10):
+        assert await redis_registry.client.ping()
+    connection = await redis_registry.pool.get_connection()
+    other_connection = await redis_registry.pool.get_connection()
+    # Every connection of the pool is in use
+    with pytest.raises(ConnectionError):
+        await redis_registry.client.ping()
+
+    get_metrics_route_response = client.get("/metrics/redis")
+    assert get_metrics_route_response.status_code == 200
+    metrics = get_metrics_route_response.json()
+    assert metrics["checkouts"] == 12
+    assert metrics["checkins"] == 10
+    assert metrics["connects"] == 2
+    assert metrics["exhausted"] == 1
+    assert metrics["waits"] == 1
+    assert metrics["max_connections"] == 2
+    assert metrics["in_use"] == 2
+    assert metrics["utilization"] == 1.0
+    await redis_registry.pool.release(connection)
+    await redis_registry.pool.release(other_connection)
+    assert redis_registry.status().idle == 2
+    await redis_registry.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_word_bank_metrics(app: FastAPI, client: TestClient):
+    word_bank = WordBank()
+    word_bank.metrics.hits = 3
+    word_bank.metrics.misses = 1
+    app.dependency_overrides[get_word_bank] = lambda: word_bank
+
+    get_metrics_route_response = client.get("/metrics/word_bank")
+    assert get_metrics_route_response.status_code == 200
+    assert get_metrics_route_response.json() == WordBankMetrics(hits=3, misses=1).model_dump()
+
+
+@pytest.mark.asyncio
+async def test_get_event_writer_metrics(app: FastAPI, client: TestClient):
+    event_writer = EventWriter(max_queue_size=50)
+    event_writer.metrics.written = 10
+    event_writer.metrics.record_flush(0.2)
+    event_writer.metrics.record_flush(0.4)
+    app.dependency_overrides[get_event_writer] = lambda: event_writer
+
+    get_metrics_route_response = client.get("/metrics/event_writer")
+    assert get_metrics_route_response.status_code == 200
+    metrics = get_metrics_route_response.json()
+    assert metrics["written"] == 10
+    assert metrics["flushes"] == 2
+    assert metrics["flush_time_max"] == 0.4
+    assert metrics["flush_time_avg"] == pytest.approx(0.3)
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_queue_size"] == 50
+    assert metrics["running"] is False
+
+
+@pytest.mark.asyncio
+async def test_get_room_shards_metrics(app: FastAPI, client: TestClient):
+    room_shards = RoomShards(worker_id=1, worker_count=4)
+    room_shards.metrics.forwarded = 3
+    app.dependency_overrides[get_room_shards] = lambda: room_shards
+
+    get_metrics_route_response = client.get("/metrics/room_shards")
+    assert get_metrics_route_response.status_code == 200
+    assert get_metrics_route_response.json() == {
+        "handled": 0,
+        "forwarded": 3,
+        "received": 0,
+        "unrouted": 0,
+        "worker_id": 1,
+        "worker_count": 4,
+        "listening": False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_game_store_metrics(app: FastAPI, client: TestClient):
+    # Import here because environment variables need to be set before importing the socket models
+    from ibg.socketio.controllers.game_store import GameStore, get_game_store
+
+    game_store = GameStore()
+    game_store.metrics.recoveries = 2
+    game_store.metrics.snapshots = 5
+    app.dependency_overrides[get_game_store] = lambda: game_store
+
+    get_metrics_route_response = client.get("/metrics/game_store")
+    assert get_metrics_route_response.status_code == 200
+    metrics = get_metrics_route_response.json()
+    assert metrics["recoveries"] == 2
+    assert metrics["snapshots"] == 5
+    assert metrics["games"] == 0
+    assert metrics["single_owner"] is True
+    assert metrics["running"] is False
+
+
+@pytest.mark.asyncio
+async def test_get_fan_out_metrics(app: FastAPI, client: TestClient):
+    # Import here because environment variables need to be set before importing the socket models
+    from ibg.socketio.routers.shared import EventFanOut, get_event_fan_out
+
+    event_fan_out = EventFanOut()
+    event_fan_out.metrics.fan_outs = 2
+    event_fan_out.metrics.recipients = 24
+    event_fan_out.metrics.emits = 6
+    event_fan_out.metrics.latency_total = 0.004
+    app.dependency_overrides[get_event_fan_out] = lambda: event_fan_out
+
+    get_metrics_route_response = client.get("/metrics/fan_out")
+    assert get_metrics_route_response.status_code == 200
+    metrics = get_metrics_route_response.json()
+    assert metrics["recipients"] == 24
+    assert metrics["emits"] == 6
+    assert metrics["latency_avg"] == 0.002
+
+
+@pytest.mark.asyncio
+async def test_get_password_hasher_metrics(app: FastAPI, client: TestClient):
+    password_hasher = PasswordHasher(rounds=4, workers=1, max_queue_size=8)
+    app.dependency_overrides[get_password_hasher] = lambda: password_hasher
+
+    is_valid, _ = await password_hasher.verify("password", await password_hasher.hash("password"))
+    assert is_valid
+
+    get_metrics_route_response = client.get("/metrics/password_hasher")
+    assert get_metrics_route_response.status_code == 200
+    metrics = get_metrics_route_response.json()
+    assert metrics["hashes"] == 1
+    assert metrics["verifications"] == 1
+    assert metrics["rehashes"] == 0
+    assert metrics["rounds"] == 4
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_queue_size"] == 8
+    assert metrics["hash_time_avg"] > 0
+    password_hasher.shutdown()
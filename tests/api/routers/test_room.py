@@ -7,6 +7,7 @@ from fastapi import FastAPI
 from starlette.testclient import TestClient
 
 from ibg.api.controllers.room import RoomController
+from ibg.api.controllers.user import UserController
 from ibg.api.controllers.shared import create_random_public_id
 from ibg.api.models.error import (
     RoomNotFoundError,
@@ -16,8 +17,11 @@ from ibg.api.models.error import (
     WrongRoomPasswordError,
 )
 from ibg.api.models.game import GameType
-from ibg.api.models.room import RoomStatus, RoomType
+from ibg.api.models.room import RoomCreate, RoomStatus, RoomType
 from ibg.api.models.table import Game, Room, User
+from ibg.api.models.user import UserCreate
+from ibg.api.models.view import RoomView
+from ibg.api.routers.shared import get_view_adapter
 from ibg.dependencies import get_room_controller
 
 
@@ -262,6 +266,7 @@ async def test_get_room_with_multiple_users_and_multiple_games(
                 "id": str(game1.id),
                 "room_id": str(room_id),
                 "user_id": str(user.id),
+                "current_turn_id": None,
                 "start_time": start_time.isoformat(),
                 "end_time": end_time.isoformat(),
                 "number_of_players": 2,
@@ -272,6 +277,7 @@ async def test_get_room_with_multiple_users_and_multiple_games(
                 "id": str(game2.id),
                 "room_id": str(room_id),
                 "user_id": str(user2.id),
+                "current_turn_id": None,
                 "start_time": start_time.isoformat(),
                 "end_time": end_time.isoformat(),
                 "number_of_players": 2,
@@ -613,3 +619,56 @@ async def test_join_room_wrong_password(room_controller: RoomController, app: Fa
         "message": f"The password to join the room with id : {room_id} is incorrect",
         "status_code": 403,
     }
+
+
+@pytest.mark.asyncio
+async def test_get_rooms_query_count_does_not_grow_with_rooms(
+    user_controller: UserController,
+    room_controller: RoomController,
+    faker: Faker,
+    app: FastAPI,
+    client: TestClient,
+    count_queries,
+):
+    app.dependency_overrides.pop(get_room_controller, None)
+
+    async def create_room() -> Room:
+        owner = await user_controller.create_user(
+            UserCreate(
+                username=faker.user_name(),
+                email_address=faker.unique.email(),
+                country="FRA",
+                password=faker.password(),
+            )
+        )
+        return await room_controller.create_room(
+            RoomCreate(owner_id=owner.id, password="1234", status=RoomStatus.ONLINE)
+        )
+
+    room = await create_room()
+    # The rooms, then their users, then their games
+    with count_queries() as queries:
+        assert client.get("/rooms").status_code == 200
+    assert len(queries) == 3
+    with count_queries() as queries:
+        assert client.get(f"/rooms/{room.id}").json()["users"][0]["id"] == str(room.owner_id)
+    assert len(queries) == 3
+
+    for _ in range(5):
+        await create_room()
+    with count_queries() as queries:
+        assert len(client.get("/rooms").json()) >= 6
+    assert len(queries) == 3
+
+
+@pytest.mark.asyncio
+async def test_rendered_routes_keep_their_response_model(client: TestClient):
+    # The type adapters of the views are built once
+    assert get_view_adapter(list[RoomView]) is get_view_adapter(list[RoomView])
+    openapi = client.get("/openapi.json").json()
+    get_rooms_schema = openapi["paths"]["/rooms"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert get_rooms_schema["items"]["$ref"] == "#/components/schemas/RoomView"
+    create_room_responses = openapi["paths"]["/rooms"]["post"]["responses"]
+    assert create_room_responses["201"]["content"]["application/json"]["schema"]["$ref"] == (
+        "#/components/schemas/RoomView"
+    )
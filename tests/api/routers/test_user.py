@@ -1,15 +1,18 @@
+import json
 import uuid
 from unittest.mock import AsyncMock
 
 import pytest
 from fastapi import FastAPI
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.testclient import TestClient
 
 from ibg.api.controllers.user import UserController
 from ibg.api.models.error import UserAlreadyExistsError
 from ibg.api.models.table import User
-from ibg.dependencies import get_user_controller
+from ibg.dependencies import get_session_factory, get_user_controller
 
 
 @pytest.mark.asyncio
@@ -94,6 +97,65 @@ async def test_get_users(user_controller: UserController, app: FastAPI, client:
     ]
 
 
+@pytest.mark.asyncio
+async def test_get_users_gives_next_cursor(user_controller: UserController, app: FastAPI, client: TestClient):
+    mock_users = [
+        User(
+            id=uuid.uuid4(),
+            username=f"JohnDoe{i}",
+            email_address=f"john.doe{i}@test.com",
+            country="FRA",
+            password="securepassword",
+        )
+        for i in range(2)
+    ]
+    after = uuid.uuid4()
+
+    def _mock_get_users():
+        user_controller.get_users = AsyncMock(return_value=mock_users)
+        return user_controller
+
+    app.dependency_overrides[get_user_controller] = _mock_get_users
+
+    get_users_route_response = client.get("/users", params={"limit": 2, "after": str(after)})
+    assert get_users_route_response.status_code == 200
+    assert get_users_route_response.headers["X-Next-Cursor"] == str(mock_users[-1].id)
+    user_controller.get_users.assert_awaited_once_with(2, after)
+
+    get_users_route_response = client.get("/users", params={"limit": 3})
+    assert "X-Next-Cursor" not in get_users_route_response.headers
+    assert client.get("/users", params={"limit": 0}).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_users_as_ndjson(app: FastAPI, client: TestClient, session: AsyncSession, engine: AsyncEngine):
+    users = [
+        User(
+            username=f"StreamedUser{i}",
+            email_address=f"streamed.user{i}@test.com",
+            country="FRA",
+            password="securepassword",
+        )
+        for i in range(3)
+    ]
+    session.add_all(users)
+    await session.commit()
+    app.dependency_overrides[get_session_factory] = lambda: lambda: AsyncSession(engine, expire_on_commit=False)
+
+    get_users_route_response = client.get("/users", headers={"Accept": "application/x-ndjson"})
+    assert get_users_route_response.status_code == 200
+    assert get_users_route_response.headers["content-type"] == "application/x-ndjson"
+    streamed_users = [json.loads(line) for line in get_users_route_response.text.splitlines()]
+    streamed_ids = [streamed_user["id"] for streamed_user in streamed_users]
+    assert streamed_ids == sorted(streamed_ids)
+    assert {str(user.id) for user in users} <= set(streamed_ids)
+    assert all("password" not in streamed_user for streamed_user in streamed_users)
+
+    for user in users:
+        await session.delete(user)
+    await session.commit()
+
+
 @pytest.mark.asyncio
 async def test_create_user(user_controller: UserController, app: FastAPI, client: TestClient):
 
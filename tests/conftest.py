@@ -1,18 +1,27 @@
+import asyncio
 import os
+from contextlib import contextmanager
+from typing import Callable, ContextManager
 
 import pytest
+import pytest_asyncio
 import redis
 from faker import Faker
 from fastapi import FastAPI
-from sqlalchemy import Engine, create_engine
-from sqlmodel import Session, SQLModel
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from testcontainers.core.container import DockerContainer
-from testcontainers.postgres import PostgresContainer
 
 from ibg.api.controllers.game import GameController
+from ibg.api.controllers.password_hasher import PasswordHasher
 from ibg.api.controllers.room import RoomController
 from ibg.api.controllers.undercover import UndercoverController
 from ibg.api.controllers.user import UserController
+from ibg.api.controllers.word_bank import WordBank
+from ibg.database import create_app_engine, create_db_and_tables
+from ibg.settings import Settings
 
 
 @pytest.fixture(name="faker")
@@ -20,28 +29,54 @@ def get_faker() -> Faker:
     return Faker("fr_FR")
 
 
-@pytest.fixture(name="postgres", scope="session", autouse=True)
-def generate_test_pgsql():
-    with PostgresContainer("postgres:latest") as postgres:
-        postgres.with_env("POSTGRES_USER", "test")
-        postgres.with_env("POSTGRES_PASSWORD", "testpassword")
-        postgres.with_env("POSTGRES_DB", "testdb")
-        yield postgres
+@pytest.fixture(name="database_url", scope="session", autouse=True)
+def generate_test_sqlite_url(tmp_path_factory) -> str:
+    return f"sqlite+aiosqlite:///{tmp_path_factory.mktemp('database') / 'test.db'}"
 
 
 @pytest.fixture(name="engine", scope="session", autouse=True)
-def generate_socket_test_pgsql_engine(postgres):
-    engine = create_engine(postgres.get_connection_url())
-    SQLModel.metadata.create_all(engine)
+def generate_test_sqlite_engine(database_url: str) -> AsyncEngine:
+    engine = create_app_engine(Settings(database_url=database_url, redis_om_url="", logfire_token="fake_token"))
+    asyncio.run(create_db_and_tables(engine))
     yield engine
+    asyncio.run(engine.dispose())
 
 
-@pytest.fixture(name="session")
-def generate_test_db_session(engine: Engine) -> Session:
-    with Session(engine) as session:
+@pytest_asyncio.fixture(name="session")
+async def generate_test_db_session(engine: AsyncEngine) -> AsyncSession:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
 
+async def reset_database(engine: AsyncEngine) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.drop_all)
+        await connection.run_sync(SQLModel.metadata.create_all)
+
+
+@pytest.fixture(name="count_queries")
+def get_query_counter() -> Callable[[], ContextManager[list[str]]]:
+    """
+    Record the SQL statements sent by every engine while the context is open, e.g.
+    `with count_queries() as queries: ...` then `assert len(queries) == 3`.
+    """
+
+    @contextmanager
+    def count_queries():
+        queries = []
+
+        def record_query(conn, cursor, statement, parameters, context, executemany):
+            queries.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", record_query)
+        try:
+            yield queries
+        finally:
+            event.remove(Engine, "before_cursor_execute", record_query)
+
+    return count_queries
+
+
 @pytest.fixture(name="redis_container", scope="session", autouse=True)
 def redis_container() -> DockerContainer:
     with DockerContainer("redislabs/redisearch:latest").with_exposed_ports(6379) as container:
@@ -56,13 +91,12 @@ def redis_host_and_port(redis_container: DockerContainer) -> tuple[str, int]:
 
 
 @pytest.fixture(autouse=True)
-def clear_database_and_redis(engine: Engine, redis_host_and_port: tuple[str, int], request):
+def clear_database_and_redis(engine: AsyncEngine, redis_host_and_port: tuple[str, int], request):
     yield
     # We check if the test is a controller test to avoid dropping the database, we're doing this for performance reasons
     if "controller" in str(request.node.fspath):
         host, port = redis_host_and_port
-        SQLModel.metadata.drop_all(engine)
-        SQLModel.metadata.create_all(engine)
+        asyncio.run(reset_database(engine))
         if "sockets" in str(request.node.fspath):
             r = redis.Redis(host=host, port=port, db=0)
             r.flushdb()
@@ -70,32 +104,41 @@ def clear_database_and_redis(engine: Engine, redis_host_and_port: tuple[str, int
                 r.delete(key)
 
 
+@pytest.fixture(name="password_hasher", scope="session")
+def get_password_hasher() -> PasswordHasher:
+    # The lowest cost factor of bcrypt, to keep the tests fast
+    password_hasher = PasswordHasher(rounds=4, workers=1)
+    yield password_hasher
+    password_hasher.shutdown()
+
+
 @pytest.fixture(name="user_controller")
-def get_user_controller(session: Session) -> UserController:
-    return UserController(session)
+def get_user_controller(session: AsyncSession, password_hasher: PasswordHasher) -> UserController:
+    return UserController(session, password_hasher)
 
 
 @pytest.fixture(name="undercover_controller")
-def get_undercover_controller(session: Session) -> UndercoverController:
-    return UndercoverController(session)
+def get_undercover_controller(session: AsyncSession) -> UndercoverController:
+    return UndercoverController(session, WordBank())
 
 
 @pytest.fixture(name="game_controller")
-def get_game_controller(session: Session) -> GameController:
+def get_game_controller(session: AsyncSession) -> GameController:
     return GameController(session)
 
 
 @pytest.fixture(name="room_controller")
-def get_room_controller(session: Session) -> RoomController:
+def get_room_controller(session: AsyncSession) -> RoomController:
     return RoomController(session)
 
 
 @pytest.fixture(name="app", scope="session")
-def get_test_app(postgres: PostgresContainer, redis_host_and_port: tuple[str, int]) -> FastAPI:
+def get_test_app(database_url: str, redis_host_and_port: tuple[str, int]) -> FastAPI:
     host, port = redis_host_and_port
-    os.environ["DATABASE_URL"] = postgres.get_connection_url()
+    os.environ["DATABASE_URL"] = database_url
     os.environ["REDIS_OM_URL"] = f"redis://{host}:{port}"
     os.environ["LOGFIRE_TOKEN"] = "fake_token"
+    os.environ["PASSWORD_HASHER_ROUNDS"] = "4"
     from ibg.app import create_app  # Import here because environment variables need to be set before importing the app
     from main import lifespan  # Import here because environment variables need to be set before importing the app
 
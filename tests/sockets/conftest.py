@@ -116,11 +116,11 @@ def server_required():
 
 
 @pytest.fixture(scope="session", autouse=True, name="server")
-def server(postgres, redis_host_and_port: tuple[str, int]):
+def server(database_url: str, redis_host_and_port: tuple[str, int]):
     """
     Fixture to start the server before running the tests. The server will be stopped after the tests are done.
 
-    :param postgres: The postgres fixture
+    :param database_url: The database_url fixture
     :param redis_host_and_port: The redis_host_and_port fixture
     :return: The server instance
     """
@@ -128,7 +128,7 @@ def server(postgres, redis_host_and_port: tuple[str, int]):
     host, port = redis_host_and_port
     config = Config("main:app", host="127.0.0.1", port=5000, log_level="debug")
     env_vars = {
-        "DATABASE_URL": postgres.get_connection_url(),
+        "DATABASE_URL": database_url,
         "REDIS_OM_URL": f"redis://{host}:{port}",
         "LOGFIRE_TOKEN": "fake_token",
     }
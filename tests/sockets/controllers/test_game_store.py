@@ -0,0 +1,199 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from redis.exceptions import ConnectionError
+
+from ibg.database import close_redis_registry
+
+
+@pytest_asyncio.fixture(name="game_store")
+async def get_game_store(app: FastAPI):
+    from ibg.socketio.controllers.game_store import (
+        GameStore,
+    )  # Import here because environment variables need to be set
+
+    yield GameStore(snapshot_interval=10)
+    # The connections of the pool are bound to the event loop of the test
+    await close_redis_registry()
+
+
+def _make_game(number_of_players: int = 4):
+    from ibg.api.models.undercover import UndercoverRole
+    from ibg.socketio.models.socket import UndercoverGame, UndercoverTurn
+    from ibg.socketio.models.user import UndercoverSocketPlayer
+
+    return UndercoverGame(
+        civilian_word="apple",
+        undercover_word="pear",
+        room_id=str(uuid4()),
+        id=str(uuid4()),
+        players=[
+            UndercoverSocketPlayer(
+                sid=f"sid-{index}", user_id=uuid4(), username=f"player-{index}", role=UndercoverRole.CIVILIAN
+            )
+            for index in range(number_of_players)
+        ],
+        turns=[UndercoverTurn()],
+    )
+
+
+@pytest.mark.asyncio
+async def test_game_store_votes_only_change_the_game_in_memory(game_store):
+    from ibg.socketio.models.socket import UndercoverGame
+
+    game = _make_game()
+    game_store.add(game)
+    await game_store.snapshot(game)
+
+    for voter, voted in zip(game.players, game.players[1:]):
+        live_game = await game_store.get(game.id)
+        assert live_game is game
+        live_game.vote(voter, voted)
+        await game_store.record_change(live_game)
+
+    assert (await UndercoverGame.get(game.pk)).turns[-1].votes == {}
+    assert game_store.status().dirty == 1
+    await game_store.flush()
+    assert len((await UndercoverGame.get(game.pk)).turns[-1].votes) == 3
+    assert game_store.metrics.hits == 3
+    assert game_store.metrics.snapshots == 2
+    assert game_store.status().dirty == 0
+
+
+@pytest.mark.asyncio
+async def test_game_store_writes_periodic_snapshots(game_store):
+    from ibg.socketio.models.socket import UndercoverGame
+
+    game_store.snapshot_interval = 0.05
+    game = _make_game()
+    game_store.add(game)
+    game_store.start()
+
+    await asyncio.sleep(0.2)
+    assert (await UndercoverGame.get(game.pk)).id == game.id
+    game.vote(game.players[0], game.players[1])
+    await game_store.record_change(game)
+    await game_store.stop()
+
+    assert (await UndercoverGame.get(game.pk)).turns[-1].votes == {game.players[0].user_id: game.players[1].user_id}
+    assert game_store.status().running is False
+
+
+@pytest.mark.asyncio
+async def test_game_store_recovers_games_from_redis(game_store):
+    from aredis_om import NotFoundError
+
+    game = _make_game()
+    await game.save()
+
+    recovered_game = await game_store.get(game.id)
+    assert recovered_game.players == game.players
+    assert await game_store.get(game.id) is recovered_game
+    assert game_store.metrics.recoveries == 1
+    with pytest.raises(NotFoundError):
+        await game_store.get(str(uuid4()))
+
+
+@pytest.mark.asyncio
+async def test_game_store_keeps_games_dirty_when_redis_fails(game_store, monkeypatch):
+    game = _make_game()
+    game_store.add(game)
+
+    async def save(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(type(game), "save", save)
+    await game_store.snapshot(game)
+
+    assert game_store.metrics.snapshot_failures == 1
+    assert game_store.status().dirty == 1
+    assert await game_store.get(game.id) is game
+
+
+@pytest.mark.asyncio
+async def test_game_store_evicts_idle_games(game_store):
+    game_store.idle_timeout = 0
+    game = _make_game()
+    game_store.add(game)
+
+    await game_store.flush()
+    # The game is written to Redis before being evicted
+    assert game_store.metrics.snapshots == 1
+    assert game_store.metrics.evictions == 1
+    assert game_store.status().games == 0
+
+
+@pytest.mark.asyncio
+async def test_game_store_reads_and_writes_redis_without_a_single_owner(game_store):
+    from ibg.socketio.models.socket import UndercoverGame
+
+    game_store.single_owner = False
+    game = _make_game()
+    game_store.add(game)
+    await game_store.snapshot(game)
+
+    first_game, second_game = await game_store.get(game.id), await game_store.get(game.id)
+    assert first_game is not second_game
+    first_game.vote(first_game.players[0], first_game.players[1])
+    await game_store.record_change(first_game)
+    # The change of another worker is read from Redis
+    assert (await game_store.get(game.id)).turns[-1].votes == {game.players[0].user_id: game.players[1].user_id}
+    assert (await UndercoverGame.get(game.pk)).turns[-1].votes == {game.players[0].user_id: game.players[1].user_id}
+    assert game_store.status().games == 0
+    assert game_store.status().dirty == 0
+    assert game_store.metrics.recoveries == 3
+
+
+@pytest.mark.asyncio
+async def test_game_store_applies_a_change_again_when_another_worker_wrote_the_game(game_store, monkeypatch):
+    from ibg.socketio.models.socket import UndercoverGame
+
+    game_store.single_owner = False
+    game = _make_game()
+    await game.save()
+    get = game_store.get
+
+    async def get_then_write_from_another_worker(game_id: str) -> UndercoverGame:
+        live_game = await get(game_id)
+        if game_store.metrics.recoveries == 1:
+            other_game = await UndercoverGame.get(game_id)
+            other_game.vote(other_game.players[2], other_game.players[1])
+            await other_game.save()
+        return live_game
+
+    def vote(live_game: UndercoverGame) -> int:
+        live_game.vote(live_game.players[0], live_game.players[1])
+        return live_game.number_of_votes_against(live_game.players[1])
+
+    monkeypatch.setattr(game_store, "get", get_then_write_from_another_worker)
+    live_game, number_of_votes = await game_store.update(game.id, vote)
+
+    assert game_store.metrics.conflicts == 1
+    assert number_of_votes == 2
+    assert live_game.turns[-1].votes == {
+        game.players[2].user_id: game.players[1].user_id,
+        game.players[0].user_id: game.players[1].user_id,
+    }
+    assert (await UndercoverGame.get(game.pk)).turns[-1].votes == live_game.turns[-1].votes
+
+
+@pytest.mark.asyncio
+async def test_game_store_writes_a_new_turn_once_when_snapshots_overlap(game_store):
+    from ibg.socketio.models.socket import UndercoverGame
+
+    game = _make_game()
+    game_store.add(game)
+    await game_store.snapshot(game)
+
+    game.vote(game.players[0], game.players[1])
+    game.start_turn()
+    await game_store.record_change(game)
+    # The snapshot at the end of the phase runs while the periodic snapshot writes the same game
+    await asyncio.gather(game_store.snapshot(game), game_store.flush(), game_store.snapshot(game))
+
+    redis_game = await UndercoverGame.get(game.pk)
+    assert len(redis_game.turns) == len(game.turns) == 2
+    assert redis_game.turns == game.turns
@@ -0,0 +1,217 @@
+import asyncio
+import random
+
+import pycountry
+import pytest
+import pytest_asyncio
+from faker import Faker
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ibg.database import close_redis_registry, get_redis_registry
+from ibg.api.controllers.event_writer import EventWriter
+from ibg.api.controllers.game import GameController
+from ibg.api.controllers.room import RoomController
+from ibg.api.controllers.undercover import UndercoverController
+from ibg.api.controllers.user import UserController
+from ibg.api.controllers.word_bank import WordBank
+from ibg.api.models.error import RoomNotFoundError, UserAlreadyInRoomError, UserNotInRoomError, WrongRoomPasswordError
+from ibg.api.models.relationship import RoomUserLink
+from ibg.api.models.room import RoomCreate, RoomStatus
+from ibg.api.models.user import UserCreate
+
+
+@pytest_asyncio.fixture(name="socket_room_controller")
+async def get_socket_room_controller(app: FastAPI, engine: AsyncEngine, session: AsyncSession):
+    from ibg.socketio.controllers.room import (
+        SocketRoomController,
+    )  # Import here because environment variables need to be set
+
+    yield SocketRoomController(
+        RoomController(session),
+        GameController(session),
+        UserController(session),
+        UndercoverController(session, WordBank()),
+        EventWriter(session_factory=lambda: AsyncSession(engine, expire_on_commit=False)),
+    )
+    # The connections of the pool are bound to the event loop of the test
+    await close_redis_registry()
+
+
+async def _create_user(user_controller: UserController, faker: Faker):
+    return await user_controller.create_user(
+        UserCreate(
+            username=faker.user_name(),
+            email_address=faker.email(),
+            country=random.choice([country.alpha_3 for country in pycountry.countries]),
+            password=faker.password(),
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_socket_room_controller_joins_and_leaves_the_redis_room(
+    socket_room_controller, user_controller: UserController, faker: Faker
+):
+    from ibg.socketio.models.room import JoinRoomUser, LeaveRoomUser
+    from ibg.socketio.models.room import Room as RedisRoom
+    from ibg.socketio.models.user import User
+
+    owner = await _create_user(user_controller, faker)
+    user = await _create_user(user_controller, faker)
+    room = await socket_room_controller.create_room(
+        "owner-sid", RoomCreate(owner_id=owner.id, password="1234", status=RoomStatus.ONLINE)
+    )
+
+    await socket_room_controller.user_join_room(
+        "user-sid", JoinRoomUser(user_id=user.id, public_room_id=room.public_id, password="1234")
+    )
+    redis_room = await RedisRoom.get(str(room.id))
+    assert [redis_user.id for redis_user in redis_room.users] == [str(owner.id), str(user.id)]
+    assert (await User.get(str(user.id))).sid == "user-sid"
+
+    redis_room = await socket_room_controller.user_leave_room(
+        LeaveRoomUser(user_id=user.id, room_id=room.id, username=user.username)
+    )
+    assert [redis_user.id for redis_user in redis_room.users] == [str(owner.id)]
+    assert (await RedisRoom.get(str(room.id))).users == redis_room.users
+    assert not await User.db().exists(User.make_primary_key(str(user.id)))
+    with pytest.raises(UserNotInRoomError):
+        await socket_room_controller.user_leave_room(
+            LeaveRoomUser(user_id=user.id, room_id=room.id, username=user.username)
+        )
+
+
+@pytest.mark.asyncio
+async def test_join_room_script_adds_a_user_once_under_concurrent_joins(
+    socket_room_controller, user_controller: UserController, faker: Faker
+):
+    from ibg.socketio.controllers.room import JOIN_ROOM_SCRIPT, ROOM_UPDATED, USER_ALREADY_IN_ROOM, user_path
+    from ibg.socketio.models.room import Room as RedisRoom
+    from ibg.socketio.models.user import User
+
+    owner = await _create_user(user_controller, faker)
+    room = await socket_room_controller.create_room(
+        "owner-sid", RoomCreate(owner_id=owner.id, password="1234", status=RoomStatus.ONLINE)
+    )
+    users = [User(id=str(faker.uuid4()), username=faker.user_name(), sid=f"sid-{index}") for index in range(10)]
+
+    # Every user joins 5 times at once
+    statuses = await asyncio.gather(
+        *(
+            get_redis_registry().script(JOIN_ROOM_SCRIPT)(
+                keys=[RedisRoom.make_primary_key(str(room.id)), user.key()],
+                args=[user_path(user.id), user.model_dump_json()],
+            )
+            for user in users
+            for _ in range(5)
+        )
+    )
+
+    assert sorted(status for status, *_ in statuses) == [ROOM_UPDATED] * 10 + [USER_ALREADY_IN_ROOM] * 40
+    redis_room = await RedisRoom.get(str(room.id))
+    assert sorted(redis_user.id for redis_user in redis_room.users) == sorted([str(owner.id)] + [u.id for u in users])
+
+
+@pytest.mark.asyncio
+async def test_socket_room_controller_raises_when_the_redis_room_does_not_exist(
+    socket_room_controller,
+    user_controller: UserController,
+    room_controller: RoomController,
+    session: AsyncSession,
+    faker: Faker,
+):
+    from ibg.socketio.models.room import JoinRoomUser
+    from ibg.socketio.models.user import User
+
+    owner = await _create_user(user_controller, faker)
+    user = await _create_user(user_controller, faker)
+    # A room of the database only, without its Redis room
+    room = await room_controller.create_room(RoomCreate(owner_id=owner.id, password="1234", status=RoomStatus.ONLINE))
+
+    with pytest.raises(RoomNotFoundError):
+        await socket_room_controller.user_join_room(
+            "user-sid", JoinRoomUser(user_id=user.id, public_room_id=room.public_id, password="1234")
+        )
+    assert not await User.db().exists(User.make_primary_key(str(user.id)))
+    links = await session.exec(select(RoomUserLink).where(RoomUserLink.user_id == user.id))
+    assert links.all() == []
+
+
+@pytest.mark.asyncio
+async def test_socket_room_controller_keeps_the_redis_user_when_the_database_refuses_the_user(
+    socket_room_controller, user_controller: UserController, faker: Faker, monkeypatch
+):
+    from ibg.socketio.models.room import JoinRoomUser
+    from ibg.socketio.models.room import Room as RedisRoom
+    from ibg.socketio.models.user import User
+
+    first_owner = await _create_user(user_controller, faker)
+    second_owner = await _create_user(user_controller, faker)
+    user = await _create_user(user_controller, faker)
+    first_room = await socket_room_controller.create_room(
+        "first-owner-sid", RoomCreate(owner_id=first_owner.id, password="1234", status=RoomStatus.ONLINE)
+    )
+    second_room = await socket_room_controller.create_room(
+        "second-owner-sid", RoomCreate(owner_id=second_owner.id, password="1234", status=RoomStatus.ONLINE)
+    )
+    await socket_room_controller.user_join_room(
+        "user-sid", JoinRoomUser(user_id=user.id, public_room_id=first_room.public_id, password="1234")
+    )
+    # The rollback of the refused link expires the rows of the session
+    user_id, second_owner_id, second_room_id = str(user.id), str(second_owner.id), str(second_room.id)
+
+    # Refused before Redis is written: a wrong password, then the user is connected to the first room
+    with pytest.raises(WrongRoomPasswordError):
+        await socket_room_controller.user_join_room(
+            "other-sid", JoinRoomUser(user_id=user.id, public_room_id=second_room.public_id, password="4321")
+        )
+    with pytest.raises(UserAlreadyInRoomError):
+        await socket_room_controller.user_join_room(
+            "other-sid", JoinRoomUser(user_id=user.id, public_room_id=second_room.public_id, password="1234")
+        )
+
+    # Refused after Redis was written: the check misses the first room, as if the user joined it in between, and the
+    # unique index of the connected users refuses the link
+    async def get_no_connected_link(user_id):
+        return None
+
+    monkeypatch.setattr(socket_room_controller._room_controller, "_get_connected_link", get_no_connected_link)
+    with pytest.raises(UserAlreadyInRoomError):
+        await socket_room_controller.user_join_room(
+            "other-sid", JoinRoomUser(user_id=user.id, public_room_id=second_room.public_id, password="1234")
+        )
+
+    assert [redis_user.id for redis_user in (await RedisRoom.get(second_room_id)).users] == [second_owner_id]
+    assert (await User.get(user_id)).sid == "user-sid"
+
+
+@pytest.mark.asyncio
+async def test_socket_room_controller_keeps_the_redis_room_when_the_database_refuses_the_user(
+    socket_room_controller, user_controller: UserController, faker: Faker
+):
+    from ibg.socketio.controllers.room import JOIN_ROOM_SCRIPT, user_path
+    from ibg.socketio.models.room import LeaveRoomUser
+    from ibg.socketio.models.room import Room as RedisRoom
+    from ibg.socketio.models.user import User
+
+    owner = await _create_user(user_controller, faker)
+    user = await _create_user(user_controller, faker)
+    room = await socket_room_controller.create_room(
+        "owner-sid", RoomCreate(owner_id=owner.id, password="1234", status=RoomStatus.ONLINE)
+    )
+    # The user is in the Redis room only
+    redis_user = User(id=str(user.id), username=user.username, sid="user-sid")
+    await get_redis_registry().script(JOIN_ROOM_SCRIPT)(
+        keys=[RedisRoom.make_primary_key(str(room.id)), redis_user.key()],
+        args=[user_path(redis_user.id), redis_user.model_dump_json()],
+    )
+
+    with pytest.raises(UserNotInRoomError):
+        await socket_room_controller.user_leave_room(
+            LeaveRoomUser(user_id=user.id, room_id=room.id, username=user.username)
+        )
+    assert [redis_user.id for redis_user in (await RedisRoom.get(str(room.id))).users] == [str(owner.id), str(user.id)]
+    assert (await User.get(str(user.id))).sid == "user-sid"
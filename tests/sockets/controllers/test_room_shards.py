@@ -0,0 +1,176 @@
+import asyncio
+import random
+import string
+import zlib
+
+import pycountry
+import pytest
+from faker import Faker
+from fakeredis.aioredis import FakeRedis
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ibg.api.controllers.room import RoomController
+from ibg.api.controllers.user import UserController
+from ibg.api.models.room import RoomCreate, RoomStatus
+from ibg.api.models.user import UserCreate
+from ibg.settings import Settings
+from ibg.socketio.controllers.room_shards import RoomShards, owner_of, rooms_have_a_single_owner
+
+
+def _public_id_owned_by(worker_id: int, worker_count: int) -> str:
+    while True:
+        public_id = "".join(random.choice(string.ascii_uppercase + string.digits) for _ in range(5))
+        if owner_of(public_id, worker_count) == worker_id:
+            return public_id
+
+
+def _workers(engine: AsyncEngine, worker_count: int, handled: list, local_fallback: bool = True) -> list:
+    """
+    Create the room shards of each worker, with a handler recording which worker handled the join_room events.
+    """
+    workers = []
+    for worker_id in range(worker_count):
+        room_shards = RoomShards(
+            worker_id=worker_id,
+            worker_count=worker_count,
+            session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+            local_fallback=local_fallback,
+        )
+
+        async def join_room(sid, data, worker_id=worker_id) -> None:
+            handled.append((worker_id, sid, data))
+
+        workers.append((room_shards, room_shards.route("public_room_id")(join_room)))
+    return workers
+
+
+def test_owner_of_is_stable_and_spreads_the_rooms():
+    assert owner_of("AB12C", 4) == zlib.crc32(b"AB12C") % 4
+    owners = [owner_of(f"{index:05d}", 4) for index in range(1000)]
+    assert all(150 < owners.count(worker_id) < 350 for worker_id in range(4))
+    assert {owner_of("AB12C", 1) for _ in range(10)} == {0}
+    with pytest.raises(ValueError):
+        RoomShards(worker_id=2, worker_count=2)
+
+
+@pytest.mark.asyncio
+async def test_room_shards_forward_events_to_the_owner(engine: AsyncEngine):
+    handled = []
+    redis = FakeRedis(decode_responses=True)
+    (first_worker, first_join_room), (second_worker, _) = _workers(engine, 2, handled)
+    await first_worker.listen(redis)
+    await second_worker.listen(redis)
+    await asyncio.sleep(0.1)
+
+    local_data = {"public_room_id": _public_id_owned_by(0, 2), "user_id": "user"}
+    remote_data = {"public_room_id": _public_id_owned_by(1, 2), "user_id": "user"}
+    await first_join_room("sid", local_data)
+    await first_join_room("sid", remote_data)
+    for _ in range(50):
+        if len(handled) == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    assert handled == [(0, "sid", local_data), (1, "sid", remote_data)]
+    assert first_worker.metrics.handled == 1
+    assert first_worker.metrics.forwarded == 1
+    assert second_worker.metrics.received == 1
+    assert second_worker.status().listening is True
+
+    await first_worker.stop()
+    await second_worker.stop()
+    assert second_worker.status().listening is False
+
+
+@pytest.mark.asyncio
+async def test_room_shards_resolve_the_public_id_of_a_room_id(
+    user_controller: UserController,
+    room_controller: RoomController,
+    engine: AsyncEngine,
+    faker: Faker,
+    count_queries,
+):
+    owner = await user_controller.create_user(
+        UserCreate(
+            username=faker.user_name(),
+            email_address=faker.email(),
+            country=random.choice([country.alpha_3 for country in pycountry.countries]),
+            password=faker.password(),
+        )
+    )
+    room = await room_controller.create_room(RoomCreate(owner_id=owner.id, password="1234", status=RoomStatus.ONLINE))
+    room_shards = RoomShards(
+        worker_id=0,
+        worker_count=2,
+        session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+    )
+
+    with count_queries() as queries:
+        assert await room_shards._public_id_of({"room_id": str(room.id)}, "room_id") == room.public_id
+        assert await room_shards._public_id_of({"room_id": str(room.id)}, "room_id") == room.public_id
+    # The public id of a room never changes, so it is only read once
+    assert len(queries) == 1
+    assert await room_shards._public_id_of({"room_id": str(owner.id)}, "room_id") is None
+    assert await room_shards._public_id_of({"room_id": 42}, "room_id") is None
+    assert await room_shards._public_id_of("not a dict", "room_id") is None
+
+
+@pytest.mark.asyncio
+async def test_room_shards_handle_events_when_the_owner_is_unreachable(engine: AsyncEngine):
+    handled = []
+    (first_worker, first_join_room), _ = _workers(engine, 2, handled)
+    await first_worker.listen(FakeRedis(decode_responses=True))
+    await asyncio.sleep(0.1)
+
+    remote_data = {"public_room_id": _public_id_owned_by(1, 2)}
+    await first_join_room("sid", remote_data)
+    # Events without a room are answered by the handler with a validation error
+    await first_join_room("sid", {})
+
+    assert handled == [(0, "sid", remote_data), (0, "sid", {})]
+    assert first_worker.metrics.unrouted == 1
+    assert first_worker.metrics.handled == 1
+    await first_worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_room_shards_drop_events_when_the_owner_is_unreachable_without_local_fallback(engine: AsyncEngine):
+    handled = []
+    (first_worker, first_join_room), _ = _workers(engine, 2, handled, local_fallback=False)
+    await first_worker.listen(FakeRedis(decode_responses=True))
+    await asyncio.sleep(0.1)
+
+    await first_join_room("sid", {"public_room_id": _public_id_owned_by(1, 2)})
+
+    assert handled == []
+    assert first_worker.metrics.unrouted == 1
+    await first_worker.stop()
+
+
+def test_rooms_have_a_single_owner():
+    def settings(**kwargs) -> Settings:
+        return Settings(database_url="", redis_om_url="", logfire_token="", **kwargs)
+
+    assert rooms_have_a_single_owner(settings())
+    # The workers share the rooms without sharding them
+    assert not rooms_have_a_single_owner(settings(socketio_redis_manager=True))
+    # The events of an unreachable owner are handled by the worker that received them
+    assert not rooms_have_a_single_owner(settings(socketio_redis_manager=True, socketio_worker_count=2))
+    assert rooms_have_a_single_owner(
+        settings(socketio_redis_manager=True, socketio_worker_count=2, socketio_local_fallback=False)
+    )
+
+
+@pytest.mark.asyncio
+async def test_room_shards_handle_every_event_with_a_single_worker(engine: AsyncEngine, count_queries):
+    handled = []
+    ((room_shards, join_room),) = _workers(engine, 1, handled)
+    await room_shards.listen(FakeRedis(decode_responses=True))
+
+    with count_queries() as queries:
+        await join_room("sid", {"public_room_id": "AB12C"})
+        await join_room("sid", {"room_id": "5f8a3a34-5d9e-4a57-9a1b-6d4a0f2b8c11"})
+    assert len(queries) == 0
+    assert [worker_id for worker_id, _, _ in handled] == [0, 0]
+    assert room_shards.status().listening is False
@@ -0,0 +1,100 @@
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from ibg.database import close_redis_registry, get_redis_registry
+from ibg.socketio.models.json_changes import JsonChange, JsonOperation, diff_json
+
+
+@pytest_asyncio.fixture(name="redis_connection")
+async def get_redis_connection(app: FastAPI):
+    yield get_redis_registry().client
+    # The connections of the pool are bound to the event loop of the test
+    await close_redis_registry()
+
+
+def _make_game():
+    from ibg.api.models.undercover import UndercoverRole
+    from ibg.socketio.models.socket import UndercoverGame, UndercoverTurn
+    from ibg.socketio.models.user import UndercoverSocketPlayer
+
+    return UndercoverGame(
+        civilian_word="apple",
+        undercover_word="pear",
+        room_id=str(uuid4()),
+        id=str(uuid4()),
+        players=[
+            UndercoverSocketPlayer(
+                sid=f"sid-{index}", user_id=uuid4(), username=f"player-{index}", role=UndercoverRole.CIVILIAN
+            )
+            for index in range(4)
+        ],
+        turns=[UndercoverTurn()],
+    )
+
+
+def test_diff_json_sets_the_smallest_changed_path():
+    old = {"name": "game", "turns": [{"votes": {}}, {"votes": {"a": "b"}}], "winner": None}
+    new = {"name": "game", "turns": [{"votes": {}}, {"votes": {"a": "b", "c-d": "e"}}], "winner": "civilian"}
+
+    assert diff_json(old, new) == [
+        JsonChange(JsonOperation.SET, "$.turns[1].votes['c-d']", ("e",)),
+        JsonChange(JsonOperation.SET, "$.winner", ("civilian",)),
+    ]
+    assert diff_json(old, old) == []
+
+
+def test_diff_json_appends_to_lists_and_deletes_keys():
+    old = {"users": [1, 2], "turns": [{"votes": {"a": "b"}}], "words": {"a": "apple", "b": "pear"}}
+    new = {"users": [1, 2, 3, 4], "turns": [{"votes": {"a": "c"}}, {"votes": {}}], "words": {"a": "apple"}}
+
+    assert diff_json(old, new) == [
+        JsonChange(JsonOperation.APPEND, "$.users", (3, 4)),
+        JsonChange(JsonOperation.SET, "$.turns[0].votes.a", ("c",)),
+        JsonChange(JsonOperation.APPEND, "$.turns", ({"votes": {}},)),
+        JsonChange(JsonOperation.DELETE, "$.words.b"),
+    ]
+
+
+def test_diff_json_sets_lists_that_shrank_and_values_that_changed_type():
+    assert diff_json({"users": [1, 2, 3]}, {"users": [1, 3]}) == [JsonChange(JsonOperation.SET, "$.users", ([1, 3],))]
+    assert diff_json({"winner": None}, {"winner": {"role": "civilian"}}) == [
+        JsonChange(JsonOperation.SET, "$.winner", ({"role": "civilian"},))
+    ]
+
+
+@pytest.mark.asyncio
+async def test_save_changes_only_writes_the_changed_paths(redis_connection):
+    from ibg.socketio.models.socket import UndercoverGame
+
+    game = _make_game()
+    # A new game is written in full
+    assert await game.save_changes() == []
+
+    game.vote(game.players[0], game.players[1])
+    changes = await game.save_changes()
+    assert [change.operation for change in changes] == [JsonOperation.SET]
+    assert changes[0].size < len(game.model_dump_json()) / 5
+
+    stored_game = await UndercoverGame.get(game.pk)
+    assert stored_game == game
+    stored_game.start_turn()
+    stored_game.eliminated_players.append(stored_game.players[1])
+    assert [change.operation for change in await stored_game.save_changes()] == [JsonOperation.APPEND] * 2
+    assert await stored_game.save_changes() == []
+    assert await UndercoverGame.get(game.pk) == stored_game
+
+
+@pytest.mark.asyncio
+async def test_save_changes_writes_the_whole_game_when_it_was_deleted(redis_connection):
+    from ibg.socketio.models.socket import UndercoverGame
+
+    game = _make_game()
+    await game.save()
+    await UndercoverGame.delete(game.pk)
+
+    game.vote(game.players[0], game.players[1])
+    assert await game.save_changes() == []
+    assert await UndercoverGame.get(game.pk) == game
@@ -0,0 +1,59 @@
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from ibg.database import close_redis_registry, get_redis_registry
+
+
+@pytest_asyncio.fixture(name="redis_connection")
+async def get_redis_connection(app: FastAPI):
+    yield get_redis_registry().client
+    # The connections of the pool are bound to the event loop of the test
+    await close_redis_registry()
+
+
+@pytest.mark.asyncio
+async def test_models_are_keyed_by_their_id(redis_connection):
+    from ibg.socketio.models.room import Room
+    from ibg.socketio.models.user import User
+
+    user = User(id=str(uuid4()), username="player", sid="sid")
+    room = Room(id=str(uuid4()), users=[user])
+    await room.save()
+
+    assert room.pk == room.id
+    assert room.key().endswith(f":{room.id}")
+    assert (await Room.get(room.id)).model_dump() == room.model_dump()
+
+
+@pytest.mark.asyncio
+async def test_models_use_the_client_of_the_current_redis_registry(redis_connection):
+    from ibg.socketio.models.room import Room
+
+    assert Room.db() is redis_connection
+    await close_redis_registry()
+    # The next lifespan creates a new registry, with a pool bound to its event loop
+    assert Room.db() is get_redis_registry().client
+    assert Room.db() is not redis_connection
+
+
+@pytest.mark.asyncio
+async def test_primary_key_migrator_moves_documents_to_the_key_of_their_id(redis_connection):
+    from ibg.socketio.models.migrations import PrimaryKeyMigrator
+    from ibg.socketio.models.room import Room
+
+    room_id = str(uuid4())
+    legacy_pk = "01HQZX3J5N8V4W6Y7Z8A9B0C1D"
+    legacy_key = Room.make_primary_key(legacy_pk)
+    await redis_connection.json().set(legacy_key, "$", {"pk": legacy_pk, "id": room_id, "users": [], "games": []})
+    migrator = PrimaryKeyMigrator(models=(Room,))
+
+    assert await migrator.run() == 1
+    assert not await redis_connection.exists(legacy_key)
+    room = await Room.get(room_id)
+    assert room.pk == room_id
+    # The documents already keyed by their id are left as they are
+    assert await migrator.run() == 0
+    await Room.delete(room_id)
@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi import FastAPI
+
+from ibg.api.models.room import RoomStatus, RoomType
+from ibg.api.models.table import Room, User
+from ibg.api.models.view import RoomView
+
+
+def _make_room_view() -> RoomView:
+    room = Room(
+        id=uuid4(),
+        public_id="12345",
+        owner_id=uuid4(),
+        status=RoomStatus.ONLINE,
+        password="1234",
+        type=RoomType.ACTIVE,
+        created_at=datetime(2024, 4, 1, 12, 30, 15, 123456),
+    )
+    room.users = [
+        User(id=uuid4(), username="JohnDoe", email_address="john.doe@test.com", country="FRA", password="password")
+    ]
+    room.games = []
+    return RoomView.model_validate(room)
+
+
+def test_model_serializer_converts_a_model_in_one_pass(app: FastAPI):
+    # Import here because environment variables need to be set
+    from ibg.socketio.models.serialization import get_model_serializer
+
+    room_view = _make_room_view()
+    serializer = get_model_serializer(RoomView)
+
+    assert serializer is get_model_serializer(RoomView)
+    assert serializer.to_python(room_view) == {
+        "id": str(room_view.id),
+        "public_id": "12345",
+        "owner_id": str(room_view.owner_id),
+        "status": "online",
+        "password": "1234",
+        "type": "active",
+        "created_at": "2024-04-01 12:30:15",
+        "users": [
+            {
+                "id": str(room_view.users[0].id),
+                "username": "JohnDoe",
+                "email_address": "john.doe@test.com",
+                "country": "FRA",
+            }
+        ],
+        "games": [],
+    }
+    assert json.loads(serializer.to_json(room_view)) == serializer.to_python(room_view)
+
+
+def test_socket_json_embeds_the_raw_json_values(app: FastAPI):
+    from ibg.socketio.models.serialization import RawJSON, SocketJSON, get_model_serializer
+
+    room_view = _make_room_view()
+    raw_room_view = get_model_serializer(RoomView).to_raw_json(room_view)
+    # A string of the payload that looks like the placeholder of a RawJSON is kept as is
+    data = {"message": "raw-json-0", "data": raw_room_view, "rooms": [raw_room_view, RawJSON("[]")]}
+
+    encoded = SocketJSON.dumps(["room_status", data], separators=(",", ":"))
+
+    assert raw_room_view.json in encoded
+    assert SocketJSON.loads(encoded) == [
+        "room_status",
+        {
+            "message": "raw-json-0",
+            "data": json.loads(raw_room_view.json),
+            "rooms": [json.loads(raw_room_view.json), []],
+        },
+    ]
+    assert SocketJSON.dumps({"number": 1}) == json.dumps({"number": 1})
@@ -0,0 +1,91 @@
+from uuid import uuid4
+
+from fastapi import FastAPI
+
+
+def _make_game(app: FastAPI, number_of_players: int = 6):
+    # Import here because environment variables need to be set
+    from ibg.api.models.undercover import UndercoverRole
+    from ibg.socketio.models.socket import UndercoverGame, UndercoverTurn
+    from ibg.socketio.models.user import UndercoverSocketPlayer
+
+    roles = [UndercoverRole.UNDERCOVER, UndercoverRole.MR_WHITE]
+    roles += [UndercoverRole.CIVILIAN] * (number_of_players - len(roles))
+    return UndercoverGame(
+        civilian_word="apple",
+        undercover_word="pear",
+        room_id=str(uuid4()),
+        id=str(uuid4()),
+        players=[
+            UndercoverSocketPlayer(
+                sid=f"sid-{index}", user_id=uuid4(), username=f"player-{index}", role=role, is_mayor=index == 5
+            )
+            for index, role in enumerate(roles)
+        ],
+        turns=[UndercoverTurn()],
+    )
+
+
+def test_vote_tally_keeps_the_most_voted_players():
+    from ibg.socketio.models.socket import VoteTally
+
+    first, second, third = uuid4(), uuid4(), uuid4()
+    tally = VoteTally([first, first, second])
+    assert tally.most_voted() == {first}
+    assert tally.max_count == 2
+
+    tally.remove(first)
+    assert tally.most_voted() == {first, second}
+    assert tally.max_count == 1
+    tally.add(third)
+    tally.add(third)
+    assert tally.most_voted() == {third}
+    tally.remove(third)
+    tally.remove(third)
+    tally.remove(first)
+    tally.remove(second)
+    assert tally.most_voted() == set()
+    assert tally == VoteTally()
+
+
+def test_undercover_game_counts_the_votes_of_the_turn(app: FastAPI):
+    game = _make_game(app)
+    players = game.players
+
+    assert game.get_player(players[2].user_id) is players[2]
+    assert game.mayor is players[5]
+    for player in players[:5]:
+        game.vote(player, players[5])
+    # A player changes their vote
+    game.vote(players[4], players[0])
+    assert game.all_votes_in is False
+    game.vote(players[5], players[0])
+
+    assert game.all_votes_in is True
+    assert game.number_of_votes_against(players[5]) == 4
+    assert game.number_of_votes_against(players[0]) == 2
+    assert game.most_voted_players() == [players[5]]
+
+
+def test_undercover_game_tracks_the_alive_players_of_each_role(app: FastAPI):
+    from ibg.api.models.undercover import UndercoverRole
+    from ibg.socketio.models.socket import UndercoverGame
+
+    game = _make_game(app)
+    players = game.players
+    game.vote(players[0], players[1])
+    game.vote(players[1], players[0])
+
+    assert game.most_voted_players() == [players[0], players[1]]
+    game.eliminate(players[1])
+    assert game.number_of_alive_players == 5
+    assert game.number_of_alive_players_with_role(UndercoverRole.MR_WHITE) == 0
+    assert game.turns[-1].eliminated_player == players[1].user_id
+
+    # The indexes are rebuilt from the document of the game
+    recovered_game = UndercoverGame(**game.to_document())
+    assert recovered_game.number_of_alive_players == 5
+    assert recovered_game.most_voted_players() == [recovered_game.players[0], recovered_game.players[1]]
+    recovered_game.start_turn()
+    assert recovered_game.most_voted_players() == []
+    assert recovered_game.all_votes_in is False
@@ -0,0 +1,236 @@
+import asyncio
+import random
+
+import pycountry
+import pytest
+import socketio
+from faker import Faker
+from fastapi import FastAPI
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ibg.api.models.table import User
+from ibg.settings import Settings
+
+
+@pytest.fixture(name="sio")
+def get_socket(app: FastAPI):
+    from ibg.socketio.models.shared import IBGSocket  # Import here because environment variables need to be set first
+
+    return IBGSocket()
+
+
+@pytest.fixture(name="exception_handler")
+def get_socketio_exception_handler(app: FastAPI):
+    from ibg.socketio.routers.shared import socketio_exception_handler  # Same as above
+
+    return socketio_exception_handler
+
+
+def _make_user(faker: Faker) -> User:
+    return User(
+        username=faker.user_name(),
+        email_address=faker.email(),
+        country=random.choice([country.alpha_3 for country in pycountry.countries]),
+        password=faker.password(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_socket_event_commits_its_session(sio, exception_handler, session: AsyncSession, faker: Faker):
+    user = _make_user(faker)
+
+    @exception_handler(sio)
+    async def handler(sid, data) -> None:
+        sio.user_controller.session.add(user)
+
+    await handler("sid", {})
+
+    assert (await session.exec(select(User).where(User.id == user.id))).one()
+
+
+@pytest.mark.asyncio
+async def test_socket_event_rolls_back_its_session_on_error(
+    sio, exception_handler, session: AsyncSession, faker: Faker
+):
+    user = _make_user(faker)
+
+    @exception_handler(sio)
+    async def handler(sid, data) -> None:
+        sio.user_controller.session.add(user)
+        raise ValueError("Something went wrong")
+
+    await handler("sid", {})
+
+    assert (await session.exec(select(User).where(User.id == user.id))).first() is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_socket_events_use_their_own_session(sio, exception_handler):
+    sessions_before_sleep = {}
+    sessions_after_sleep = {}
+
+    @exception_handler(sio)
+    async def handler(sid, data) -> None:
+        sessions_before_sleep[data] = sio.room_controller.session
+        await asyncio.sleep(0.01)
+        sessions_after_sleep[data] = sio.game_controller.session
+
+    await asyncio.gather(*(handler("sid", index) for index in range(5)))
+
+    assert sessions_before_sleep == sessions_after_sleep
+    assert len({id(session) for session in sessions_before_sleep.values()}) == 5
+    with pytest.raises(LookupError):
+        _ = sio.room_controller
+
+
+def test_client_manager_is_in_memory_by_default(app: FastAPI):
+    from ibg.socketio.models.shared import create_client_manager  # Same as above
+
+    assert create_client_manager(Settings()) is None
+    assert create_client_manager(Settings(socketio_redis_manager=True)).channel == "ibg:socketio"
+
+
+def test_redis_client_manager_connects_like_the_connection_pool(app: FastAPI):
+    from ibg.database import create_redis_pool
+    from ibg.socketio.models.shared import create_client_manager  # Same as above
+
+    settings = Settings(
+        socketio_redis_manager=True,
+        redis_om_url="rediss://127.0.0.1:6380/0",
+        redis_password="secret",
+        redis_ssl_ca_certs="/etc/ssl/certs/ca.pem",
+        redis_socket_timeout=3.0,
+        redis_retries=5,
+    )
+
+    redis_options = create_client_manager(settings).redis_options
+    pool_options = create_redis_pool(settings).connection_kwargs
+    for option in ("password", "ssl_ca_certs", "ssl_cert_reqs", "socket_connect_timeout", "socket_timeout"):
+        assert redis_options[option] == pool_options[option]
+    assert redis_options["password"] == "secret"
+    assert redis_options["retry"].get_retries() == pool_options["retry"].get_retries() == 5
+
+
+@pytest.mark.asyncio
+async def test_redis_client_manager_emits_across_workers(app: FastAPI, monkeypatch):
+    from ibg.socketio.models.shared import IBGSocket, create_client_manager  # Same as above
+
+    settings = Settings(socketio_redis_manager=True, socketio_redis_channel="ibg:socketio:test")
+    first_worker = IBGSocket(client_manager=create_client_manager(settings))
+    second_worker = IBGSocket(client_manager=create_client_manager(settings))
+    assert isinstance(first_worker.manager, socketio.AsyncRedisManager)
+    received = []
+
+    async def send_eio_packet(eio_sid, eio_packet):
+        received.append((eio_sid, socketio.packet.Packet(encoded_packet=eio_packet.data).data))
+
+    monkeypatch.setattr(first_worker, "_send_eio_packet", send_eio_packet)
+    first_worker.manager.initialize()
+    sid = await first_worker.manager.connect("eio_sid", "/")
+    await first_worker.enter_room(sid, "room")
+    await asyncio.sleep(0.2)
+
+    # The socket is connected to the first worker, the events are sent by the second one
+    await second_worker.emit("room_event", {"number": 1}, room="room")
+    await second_worker.emit("sid_event", {"number": 2}, to=sid)
+    await second_worker.emit("other_room_event", {"number": 3}, room="other_room")
+    for _ in range(50):
+        if len(received) == 2:
+            break
+        await asyncio.sleep(0.02)
+
+    assert received == [("eio_sid", ["room_event", {"number": 1}]), ("eio_sid", ["sid_event", {"number": 2}])]
+    first_worker.manager.thread.cancel()
+
+
+@pytest.mark.asyncio
+async def test_emit_to_a_local_socket_skips_the_redis_client_manager(app: FastAPI, monkeypatch):
+    from ibg.socketio.models.shared import IBGSocket, create_client_manager  # Same as above
+
+    sio = IBGSocket(client_manager=create_client_manager(Settings(socketio_redis_manager=True)))
+    published = []
+    received = []
+
+    async def publish(message):
+        published.append(message["event"])
+
+    async def send_eio_packet(eio_sid, eio_packet):
+        received.append(socketio.packet.Packet(encoded_packet=eio_packet.data).data[0])
+
+    monkeypatch.setattr(sio.manager, "_publish", publish)
+    monkeypatch.setattr(sio, "_send_eio_packet", send_eio_packet)
+    sid = await sio.manager.connect("eio_sid", "/")
+    await sio.enter_room(sid, "room")
+
+    await sio.emit("sid_event", {}, room=sid)
+    await sio.emit("room_event", {}, room="room")
+    await sio.emit("remote_sid_event", {}, to="remote_sid")
+
+    assert received == ["sid_event", "room_event"]
+    # The other workers may hold sockets of the room or the remote socket
+    assert published == ["room_event", "remote_sid_event"]
+
+
+@pytest.mark.asyncio
+async def test_event_fan_out_sends_each_socket_its_payload(app: FastAPI, monkeypatch):
+    from ibg.socketio.models.shared import IBGSocket  # Same as above
+    from ibg.socketio.routers.shared import EventFanOut
+
+    sio = IBGSocket()
+    event_fan_out = EventFanOut()
+    emitted = []
+    received = {}
+
+    async def send_eio_packet(eio_sid, eio_packet):
+        received[eio_sid] = socketio.packet.Packet(encoded_packet=eio_packet.data).data
+
+    original_emit = sio.emit
+
+    async def emit(event, data=None, to=None, **kwargs):
+        emitted.append(to)
+        await original_emit(event, data, to=to, **kwargs)
+
+    monkeypatch.setattr(sio, "_send_eio_packet", send_eio_packet)
+    monkeypatch.setattr(sio, "emit", emit)
+    sids = [await sio.manager.connect(f"eio_sid-{index}", "/") for index in range(6)]
+    payloads = {sid: {"role": "civilian", "word": "apple"} for sid in sids[:4]}
+    payloads[sids[4]] = {"role": "undercover", "word": "pear"}
+    payloads[sids[5]] = {"word": "apple", "role": "civilian"}
+
+    latency = await event_fan_out.send(sio, "role_assigned", payloads)
+
+    # The sockets with the same payload get one emit
+    assert sorted(emitted, key=str) == sorted([sids[:4] + [sids[5]], sids[4]], key=str)
+    assert received == {f"eio_sid-{index}": ["role_assigned", payloads[sid]] for index, sid in enumerate(sids)}
+    status = event_fan_out.status()
+    assert (status.fan_outs, status.recipients, status.emits) == (1, 6, 2)
+    assert status.latency_max == status.latency_avg == latency
+
+
+@pytest.mark.asyncio
+async def test_emit_sends_an_encoded_model_to_every_socket(app: FastAPI, monkeypatch):
+    from ibg.socketio.models.shared import IBGSocket  # Same as above
+    from ibg.socketio.routers.shared import encode_model
+
+    sio = IBGSocket()
+    received = []
+
+    async def send_eio_packet(eio_sid, eio_packet):
+        received.append((eio_sid, socketio.packet.Packet(encoded_packet=eio_packet.data).data))
+
+    monkeypatch.setattr(sio, "_send_eio_packet", send_eio_packet)
+    sids = [await sio.manager.connect(f"eio_sid-{index}", "/") for index in range(3)]
+    for sid in sids:
+        await sio.enter_room(sid, "room")
+    user = _make_user(Faker())
+    encoded_user = encode_model(user)
+
+    await sio.emit("room_event", {"message": "hello", "data": encoded_user}, room="room")
+    await sio.emit("sid_event", {"data": encoded_user}, to=sids[0])
+
+    data = user.model_dump(mode="json")
+    assert sorted(received) == sorted(
+        [(f"eio_sid-{index}", ["room_event", {"message": "hello", "data": data}]) for index in range(3)]
+        + [("eio_sid-0", ["sid_event", {"data": data}])]
+    )
@@ -0,0 +1,133 @@
+import asyncio
+import random
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from ibg.database import close_redis_registry
+
+
+@pytest_asyncio.fixture(name="sio")
+async def get_socket_server(app: FastAPI):
+    # Import here because environment variables need to be set
+    from ibg.socketio.models.shared import IBGSocket
+    from ibg.socketio.routers.undercover import undercover_events
+
+    sio = IBGSocket()
+    undercover_events(sio)
+    yield sio
+    # The connections of the pool are bound to the event loop of the test
+    await close_redis_registry()
+
+
+def _make_game(number_of_players: int):
+    from ibg.api.models.undercover import UndercoverRole
+    from ibg.socketio.models.socket import UndercoverGame, UndercoverTurn
+    from ibg.socketio.models.user import UndercoverSocketPlayer
+
+    roles = [UndercoverRole.UNDERCOVER, UndercoverRole.UNDERCOVER, UndercoverRole.MR_WHITE]
+    roles += [UndercoverRole.CIVILIAN] * (number_of_players - len(roles))
+    return UndercoverGame(
+        civilian_word="apple",
+        undercover_word="pear",
+        room_id=str(uuid4()),
+        id=str(uuid4()),
+        players=[
+            UndercoverSocketPlayer(sid=f"sid-{index}", user_id=uuid4(), username=f"player-{index}", role=role)
+            for index, role in enumerate(roles)
+        ],
+        turns=[UndercoverTurn()],
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_votes_eliminate_a_player_exactly_once(sio, monkeypatch):
+    from ibg.socketio.controllers.game_store import get_game_store
+
+    emitted = []
+
+    async def emit(event, data=None, room=None, **kwargs):
+        emitted.append((event, data, room))
+
+    monkeypatch.setattr(sio, "emit", emit)
+    vote_for_a_player = sio.handlers["/"]["vote_for_a_player"]
+    game_store = get_game_store()
+    games = [_make_game(number_of_players=24) for _ in range(3)]
+    votes = []
+    for game in games:
+        game_store.add(game)
+        target = game.players[3]
+        # Every player votes 5 times for the same civilian, which votes for the next one
+        for player in game.players:
+            voted_player = game.players[4] if player is target else target
+            vote = {
+                "room_id": game.room_id,
+                "game_id": game.id,
+                "user_id": str(player.user_id),
+                "voted_user_id": str(voted_player.user_id),
+            }
+            votes += [(player.sid, vote)] * 5
+    random.shuffle(votes)
+
+    await asyncio.gather(*(vote_for_a_player(sid, vote) for sid, vote in votes))
+
+    for game in games:
+        eliminations = [data for event, data, room in emitted if event == "player_eliminated" and room == game.room_id]
+        assert len(eliminations) == 1
+        assert "with 23 votes" in eliminations[0]["message"]
+        assert game.eliminated_players == [game.players[3]]
+        assert game.players[3].is_alive is False
+        assert game.turns[-1].eliminated_player == game.players[3].user_id
+        assert len(game.turns[-1].votes) == 24
+        game_store.discard(game.id)
+    # The votes that came after the elimination were refused
+    errors = [data for event, data, room in emitted if event == "error"]
+    assert {error["name"] for error in errors} <= {"CantVoteTurnIsOverError"}
+    assert len(errors) + len([event for event, _, _ in emitted if event == "vote_casted"]) + 3 == len(votes)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_votes_eliminate_a_player_exactly_once_without_a_single_owner(sio, monkeypatch):
+    from ibg.socketio.controllers.game_store import get_game_store
+    from ibg.socketio.models.socket import UndercoverGame
+
+    emitted = []
+
+    async def emit(event, data=None, room=None, **kwargs):
+        emitted.append((event, data, room))
+
+    monkeypatch.setattr(sio, "emit", emit)
+    vote_for_a_player = sio.handlers["/"]["vote_for_a_player"]
+    game_store = get_game_store()
+    # Every vote reads the game from Redis, as if the votes were handled by different workers
+    monkeypatch.setattr(game_store, "single_owner", False)
+    game = _make_game(number_of_players=12)
+    await game.save()
+    target = game.players[3]
+    votes = []
+    # Every player votes 3 times for the same civilian, which votes for the next one
+    for player in game.players:
+        voted_player = game.players[4] if player is target else target
+        vote = {
+            "room_id": game.room_id,
+            "game_id": game.id,
+            "user_id": str(player.user_id),
+            "voted_user_id": str(voted_player.user_id),
+        }
+        votes += [(player.sid, vote)] * 3
+    random.shuffle(votes)
+
+    await asyncio.gather(*(vote_for_a_player(sid, vote) for sid, vote in votes))
+
+    eliminations = [data for event, data, room in emitted if event == "player_eliminated"]
+    assert len(eliminations) == 1
+    assert "with 11 votes" in eliminations[0]["message"]
+    redis_game = await UndercoverGame.get(game.pk)
+    assert [player.user_id for player in redis_game.eliminated_players] == [target.user_id]
+    assert redis_game.turns[-1].eliminated_player == target.user_id
+    assert len(redis_game.turns[-1].votes) == 12
+    errors = [data for event, data, room in emitted if event == "error"]
+    assert {error["name"] for error in errors} <= {"CantVoteTurnIsOverError"}
+    assert game_store.metrics.conflicts > 0